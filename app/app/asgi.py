@@ -0,0 +1,42 @@
+"""
+ASGI config for app project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Django 2.1 has no ASGI handler of its own, so the WSGI application runs
+in a thread pool behind asgiref's adapter. Serve it with e.g.
+
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker app.asgi
+"""
+
+import os
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+
+class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    """Adapter instance running its request in a thread of the pool"""
+
+    async def run_wsgi_app(self, body):
+        # asgiref wraps it in a bare sync_to_async, which is thread
+        # sensitive: every request of the worker would wait for the one
+        # shared thread, slower than a sync worker
+        # (the undecorated function, looked up without the descriptor)
+        run = vars(WsgiToAsgiInstance)['run_wsgi_app'].func
+        return await sync_to_async(run, thread_sensitive=False)(self, body)
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """WSGI to ASGI adapter running the requests concurrently"""
+
+    async def __call__(self, scope, receive, send):
+        await ThreadPoolWsgiToAsgiInstance(self.wsgi_application)(
+            scope, receive, send
+        )
+
+
+application = ThreadPoolWsgiToAsgi(get_wsgi_application())
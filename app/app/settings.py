@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -38,13 +39,14 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'rest_framework.authtoken',
     'core',
     'user',
     'recipe',
+    'benchmark',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +56,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# responses are gzipped for the clients sending Accept-Encoding: gzip.
+# API_GZIP=0 turns it off, e.g. behind a proxy compressing them already.
+# Right after the metrics, so their total includes the compression
+if os.environ.get('API_GZIP') != '0':
+    MIDDLEWARE.insert(1, 'django.middleware.gzip.GZipMiddleware')
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -80,15 +88,76 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # the postgresql backend, checking that a kept connection still
+        # works before a request reuses it
+        'ENGINE': 'core.db.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # seconds a connection is kept open for the next requests of
+        # the same worker thread, 0 closes it after every request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get(
+            'DB_CONN_HEALTH_CHECKS', '1'
+        ) == '1',
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+# the local memory cache is per process. Point it at a shared cache
+# (e.g. memcached) when running more than one worker, otherwise a write
+# only invalidates the cached responses of the worker that handled it
+LOCMEM_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', LOCMEM_CACHE_BACKEND),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/2.1/topics/auth/passwords/
+
+# PASSWORD_HASHER picks the hasher of new passwords: pbkdf2, argon2
+# (needs argon2-cffi) or bcrypt (needs bcrypt). The others still
+# check the existing hashes, which are redone on the next login
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'core.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'core.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'core.hashers.TunedBCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    path for name, path in sorted(PASSWORD_HASHER_CHOICES.items())
+    if name != PASSWORD_HASHER
+]
+
+# the cost of the hashers, django's defaults unless set. Lower costs
+# let a core check more logins per second, and resist brute force
+# less. THREADS bounds how many hashes a process runs at once
+PASSWORD_HASHING = {
+    'PBKDF2_ITERATIONS': int(
+        os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 120000)
+    ),
+    'ARGON2_TIME_COST': int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2)),
+    'ARGON2_MEMORY_COST': int(
+        os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 512)
+    ),
+    'ARGON2_PARALLELISM': int(
+        os.environ.get('PASSWORD_ARGON2_PARALLELISM', 2)
+    ),
+    'BCRYPT_ROUNDS': int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12)),
+    'THREADS': int(os.environ.get('PASSWORD_HASHING_THREADS', 2)),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -130,3 +199,103 @@ STATIC_URL = '/static/'
 # core is the name of our app
 # User is the name of our Model as the custom user model
 AUTH_USER_MODEL = 'core.User'
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    # list endpoints are paginated with cursors, so a page costs the same
+    # no matter how deep into the results the client is
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.RecipePagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    # JSON is encoded and decoded with orjson when it's installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# MessagePack and CBOR are offered when their library is installed, to
+# the clients asking for them in Accept or Content-Type. JSON stays the
+# default, for the clients accepting anything
+for module, name in (('msgpack', 'MessagePack'), ('cbor2', 'CBOR')):
+    if find_spec(module) is not None:
+        REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(
+            -1,
+            'core.renderers.%sRenderer' % name
+        )
+        REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(
+            1,
+            'core.parsers.%sParser' % name
+        )
+
+# biggest page a client can ask for with ?page_size=
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+
+# most items a client can send to one of the bulk endpoints
+API_MAX_BULK_SIZE = int(os.environ.get('API_MAX_BULK_SIZE', 1000))
+
+# threads per process running independent queries of a request at the
+# same time, like the tag and ingredient prefetches (0 turns it off).
+# Each of them keeps its own db connection
+CONCURRENT_QUERY_THREADS = int(os.environ.get('CONCURRENT_QUERY_THREADS', 2))
+
+# rows read from the db at a time by the streaming recipe export
+API_EXPORT_CHUNK_SIZE = int(os.environ.get('API_EXPORT_CHUNK_SIZE', 2000))
+
+# reject tags and ingredients named like one the user already has
+UNIQUE_RECIPE_ATTR_NAMES = os.environ.get('UNIQUE_RECIPE_ATTR_NAMES') == '1'
+
+# API tokens expire TTL seconds after the login that created them.
+# With SIGNED, logins get a signed token instead, checked without a
+# query on the token table. Those can't be revoked one by one: they
+# stop working when they expire or the user changes their password
+AUTH_TOKEN = {
+    'TTL': int(os.environ.get('AUTH_TOKEN_TTL', 7 * 24 * 60 * 60)),
+    'SIGNED': os.environ.get('AUTH_TOKEN_SIGNED') == '1',
+}
+
+# token -> user lookups of the API authentication are cached for TTL
+# seconds (0 turns it off), in a per process LRU of MAX_SIZE entries.
+# Other processes don't see its invalidations, so with several workers
+# set CACHE_ALIAS to a shared django cache, which then holds the entries
+TOKEN_AUTH_CACHE = {
+    'TTL': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60)),
+    'MAX_SIZE': int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000)),
+    'CACHE_ALIAS': os.environ.get('TOKEN_AUTH_CACHE_ALIAS'),
+}
+
+# with ENABLED, every request records its query count, db time and
+# render time, sent back in a Server-Timing header (unless SERVER_TIMING
+# is off) and summed per view at /metrics. Off, it costs nothing.
+# /metrics only answers the ALLOWED_IPS addresses or networks (comma
+# separated, like 10.0.0.0/8), the scraper, and is a 404 for anyone else
+REQUEST_METRICS = {
+    'ENABLED': os.environ.get('REQUEST_METRICS') == '1',
+    'SERVER_TIMING': os.environ.get('REQUEST_METRICS_SERVER_TIMING') != '0',
+    'ALLOWED_IPS': [
+        network.strip() for network in os.environ.get(
+            'REQUEST_METRICS_ALLOWED_IPS',
+            '127.0.0.1,::1'
+        ).split(',')
+        if network.strip()
+    ],
+}
+
+# list responses are cached per user for TIMEOUT seconds (0 turns it
+# off), and dropped as soon as the user writes anything. Only another
+# worker can't drop them from a per process cache, so the cache is
+# only on by default when CACHE_BACKEND is a shared one
+API_LIST_CACHE = {
+    'TIMEOUT': int(os.environ.get(
+        'API_LIST_CACHE_TIMEOUT',
+        0 if CACHES['default']['BACKEND'] == LOCMEM_CACHE_BACKEND else 300
+    )),
+    'CACHE_ALIAS': os.environ.get('API_LIST_CACHE_ALIAS', 'default'),
+}
@@ -0,0 +1,67 @@
+"""
+Production settings, on top of the development ones.
+
+Select them with DJANGO_SETTINGS_MODULE=app.settings_prod and serve
+the app with gunicorn (see gunicorn.conf.py), not runserver.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from app.settings import *  # noqa: F401,F403
+from app.settings import \
+    API_LIST_CACHE, \
+    CACHES, \
+    LOCMEM_CACHE_BACKEND, \
+    REST_FRAMEWORK, \
+    TOKEN_AUTH_CACHE
+
+
+# with DEBUG on, django keeps every query of a request in
+# connection.queries and renders the detailed error pages
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = [
+    host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+    if host
+]
+
+# the browsable API renders a whole HTML page, with extra queries for
+# its forms, whenever a browser hits the API. The other renderers, like
+# MessagePack and CBOR, stay as they are
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,
+    DEFAULT_RENDERER_CLASSES=[
+        renderer for renderer in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']
+        if renderer != 'rest_framework.renderers.BrowsableAPIRenderer'
+    ],
+)
+
+# gunicorn runs several workers, and a write only drops the cached lists
+# of the worker that handled it. Each worker would also hand out its own
+# ETag and Last-Modified, so the 304s would mostly fail behind the load
+# balancer. The list cache needs a cache shared by all of them
+if API_LIST_CACHE['TIMEOUT'] > 0 and \
+        CACHES[API_LIST_CACHE['CACHE_ALIAS']]['BACKEND'] == \
+        LOCMEM_CACHE_BACKEND:
+    raise ImproperlyConfigured(
+        'The list cache needs a shared CACHE_BACKEND in production, '
+        'or API_LIST_CACHE_TIMEOUT=0 to turn it off'
+    )
+
+# the same goes for the token cache: a deleted or rotated token, or a
+# deactivated user, would keep authenticating on the other workers until
+# their entries expire. Without a shared cache it's turned off, and
+# asking for it fails to start
+if not TOKEN_AUTH_CACHE['CACHE_ALIAS'] or \
+        CACHES[TOKEN_AUTH_CACHE['CACHE_ALIAS']]['BACKEND'] == \
+        LOCMEM_CACHE_BACKEND:
+    if 'TOKEN_AUTH_CACHE_TTL' in os.environ and TOKEN_AUTH_CACHE['TTL'] > 0:
+        raise ImproperlyConfigured(
+            'The token cache needs TOKEN_AUTH_CACHE_ALIAS naming a shared '
+            'cache in production, or TOKEN_AUTH_CACHE_TTL=0 to turn it off'
+        )
+    TOKEN_AUTH_CACHE = dict(TOKEN_AUTH_CACHE, TTL=0)
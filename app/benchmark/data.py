@@ -0,0 +1,145 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from core.bulk import bulk_create_with_ids, bulk_add_related
+from core.models import Tag, Ingredient, Recipe
+
+
+# every generated user logs in with this password
+PASSWORD = 'benchmark'
+
+EMAIL = 'benchmark-%d@londonappdev.com'
+
+DISTRIBUTIONS = ('uniform', 'skewed')
+
+
+def weights(count, distribution):
+    """Return the relative weights of count items
+
+    uniform gives every item the same weight, skewed follows Zipf's law
+    like real data does: a few users own most of the recipes, and a few
+    tags are on most of them.
+    """
+
+    if distribution == 'uniform':
+        return [1] * count
+
+    return [1 / rank for rank in range(1, count + 1)]
+
+
+def split(total, count, distribution):
+    """Split total into count whole parts, following the distribution"""
+
+    shares = weights(count, distribution)
+    parts = [int(total * share / sum(shares)) for share in shares]
+    # the rounding leftovers go to the first parts
+    for index in range(total - sum(parts)):
+        parts[index % count] += 1
+
+    return parts
+
+
+def generate_data(users=10, recipes=100, tags=20, ingredients=50,
+                  tags_per_recipe=3, ingredients_per_recipe=8,
+                  distribution='uniform', seed=0):
+    """Create users with their tags, ingredients and recipes in bulk
+
+    recipes is the average per user, the distribution decides how they
+    are spread over the users and how the tags and ingredients are
+    picked. The same seed always generates the same data. Returns the
+    users, whose password is PASSWORD.
+    """
+
+    # hashing is slow on purpose, every user gets the same hash
+    password = make_password(PASSWORD)
+
+    user_objs = bulk_create_with_ids(get_user_model(), (
+        get_user_model()(email=EMAIL % index, password=password)
+        for index in range(users)
+    ))
+
+    generate_recipes(
+        user_objs,
+        split(recipes * users, users, distribution),
+        tags=tags,
+        ingredients=ingredients,
+        tags_per_recipe=tags_per_recipe,
+        ingredients_per_recipe=ingredients_per_recipe,
+        distribution=distribution,
+        seed=seed,
+    )
+
+    return user_objs
+
+
+def generate_recipes(user_objs, counts, tags=20, ingredients=50,
+                     tags_per_recipe=3, ingredients_per_recipe=8,
+                     distribution='uniform', seed=0):
+    """Create tags, ingredients and counts[i] recipes for every user
+
+    Returns the recipes, with their search vectors and the recipe counts
+    of everything up to date.
+    """
+
+    rng = random.Random(seed)
+
+    tag_objs = bulk_create_with_ids(Tag, (
+        Tag(user=user, name='Tag %d' % index)
+        for user in user_objs for index in range(tags)
+    ), batch_size=1000)
+    ingredient_objs = bulk_create_with_ids(Ingredient, (
+        Ingredient(user=user, name='Ingredient %d' % index)
+        for user in user_objs for index in range(ingredients)
+    ), batch_size=1000)
+
+    recipe_objs = bulk_create_with_ids(Recipe, (
+        Recipe(
+            user=user,
+            title='Recipe number %d' % index,
+            time_minutes=rng.randint(5, 180),
+            price='%d.%02d' % (rng.randint(1, 99), rng.randint(0, 99)),
+            link='https://example.com/recipes/%d' % index,
+        )
+        for user, count in zip(user_objs, counts)
+        for index in range(count)
+    ), batch_size=1000)
+
+    def pick(objs, count):
+        """Pick count distinct objects of the user, by popularity"""
+
+        chosen = {}
+        item_weights = weights(len(objs), distribution)
+        while len(chosen) < min(count, len(objs)):
+            obj = rng.choices(objs, item_weights)[0]
+            chosen[obj.pk] = obj
+        return list(chosen.values())
+
+    # the tags and ingredients of each user, in creation order
+    user_tags = {user.pk: tag_objs[i * tags:(i + 1) * tags]
+                 for i, user in enumerate(user_objs)}
+    user_ingredients = {
+        user.pk: ingredient_objs[i * ingredients:(i + 1) * ingredients]
+        for i, user in enumerate(user_objs)
+    }
+
+    bulk_add_related(recipe_objs, 'tags', [
+        pick(user_tags[recipe.user_id], tags_per_recipe)
+        for recipe in recipe_objs
+    ], batch_size=1000)
+    bulk_add_related(recipe_objs, 'ingredients', [
+        pick(user_ingredients[recipe.user_id], ingredients_per_recipe)
+        for recipe in recipe_objs
+    ], batch_size=1000)
+
+    # bulk_create skips the signals keeping the search vectors and the
+    # recipe counts up to date
+    Recipe.objects.filter(user__in=user_objs).update_search_vector()
+    Tag.objects.filter(user__in=user_objs).update_recipe_count()
+    Ingredient.objects.filter(user__in=user_objs).update_recipe_count()
+    get_user_model().objects.filter(
+        pk__in=[user.pk for user in user_objs]
+    ).update_recipe_count()
+
+    return recipe_objs
@@ -0,0 +1,226 @@
+import json
+import subprocess
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from benchmark.data import DISTRIBUTIONS, generate_data
+from benchmark.scenarios import SCENARIOS, State
+from benchmark.utils import percentile
+from core.metrics import RequestMetrics
+
+
+def current_commit():
+    """Return the short hash of the checked out commit, if there is one"""
+
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        )
+    except OSError:
+        return ''
+
+    return result.stdout.strip()
+
+
+class Command(BaseCommand):
+    """Django command timing the API scenarios on generated data"""
+
+    help = 'Benchmark the API endpoints on generated data'
+
+    def add_arguments(self, parser):
+        data = parser.add_argument_group('generated data')
+        data.add_argument('--users', type=int, default=10)
+        data.add_argument('--recipes', type=int, default=100,
+                          help='average number of recipes per user')
+        data.add_argument('--tags', type=int, default=20,
+                          help='tags per user')
+        data.add_argument('--ingredients', type=int, default=50,
+                          help='ingredients per user')
+        data.add_argument('--distribution', choices=DISTRIBUTIONS,
+                          default='uniform')
+        data.add_argument('--seed', type=int, default=0)
+
+        parser.add_argument('--scenario', action='append',
+                            dest='scenarios', choices=list(SCENARIOS),
+                            help='scenario to run, can be repeated '
+                                 '(defaults to all of them)')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='untimed requests before the timed ones')
+        parser.add_argument('--memory-requests', type=int, default=20,
+                            help='requests traced for the peak memory')
+        parser.add_argument('--no-list-cache', action='store_true',
+                            help='turn the cache of the list endpoints off')
+        parser.add_argument('--json', metavar='PATH',
+                            help='save the results to compare them later')
+        parser.add_argument('--compare', metavar='PATH',
+                            help='results saved by an earlier run')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as stream:
+                baseline = json.load(stream)
+
+        overrides = {'ALLOWED_HOSTS': ['testserver']}
+        if options['no_list_cache']:
+            overrides['API_LIST_CACHE'] = dict(
+                settings.API_LIST_CACHE,
+                TIMEOUT=0
+            )
+
+        # committed, so the concurrent queries see the data like they
+        # would in production. It's deleted once the timings are done
+        with override_settings(**overrides):
+            start = time.perf_counter()
+            # nothing is left behind if the generation fails half way
+            with transaction.atomic():
+                users = generate_data(
+                    users=options['users'],
+                    recipes=options['recipes'],
+                    tags=options['tags'],
+                    ingredients=options['ingredients'],
+                    distribution=options['distribution'],
+                    seed=options['seed'],
+                )
+            self.stdout.write('Generated the data in {:.1f}s'.format(
+                time.perf_counter() - start
+            ))
+
+            try:
+                results = self.run(State(users, options['seed']), options)
+            finally:
+                get_user_model().objects.filter(
+                    pk__in=[user.pk for user in users]
+                ).delete()
+
+        report = {
+            'commit': current_commit(),
+            'options': {
+                name: options[name]
+                for name in ('users', 'recipes', 'tags', 'ingredients',
+                             'distribution', 'seed', 'requests',
+                             'no_list_cache')
+            },
+            'results': results,
+        }
+        self.write_report(report, baseline)
+
+        if options['json']:
+            with open(options['json'], 'w') as stream:
+                json.dump(report, stream, indent=2)
+
+    def run(self, state, options):
+        """Run the scenarios, return their results by name"""
+
+        client = Client()
+        results = OrderedDict()
+        for name in options['scenarios'] or SCENARIOS:
+            scenario = SCENARIOS[name]
+            if options['verbosity'] >= 2:
+                self.stdout.write('Running %s' % name)
+
+            for _ in range(options['warmup']):
+                self.send(client, scenario, state)
+
+            timings = []
+            queries = []
+            db_times = []
+            for _ in range(options['requests']):
+                # the concurrent queries copy the wrapper, so they're
+                # counted as well
+                metrics = RequestMetrics()
+                with connection.execute_wrapper(metrics):
+                    start = time.perf_counter()
+                    self.send(client, scenario, state)
+                    timings.append(time.perf_counter() - start)
+                queries.append(metrics.queries)
+                db_times.append(metrics.db_time)
+
+            # traced apart, tracing makes the requests a lot slower
+            peaks = [0]
+            for _ in range(options['memory_requests']):
+                tracemalloc.start()
+                try:
+                    self.send(client, scenario, state)
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+
+            results[name] = OrderedDict((
+                ('mean_ms', sum(timings) / len(timings) * 1000),
+                ('p50_ms', percentile(timings, 50) * 1000),
+                ('p95_ms', percentile(timings, 95) * 1000),
+                ('p99_ms', percentile(timings, 99) * 1000),
+                ('queries', sum(queries) / len(queries)),
+                ('db_ms', sum(db_times) / len(db_times) * 1000),
+                ('peak_kib', max(peaks) / 1024),
+            ))
+
+        return results
+
+    def send(self, client, scenario, state):
+        """Send a request of the scenario, failing on an error status"""
+
+        res = scenario.send(client, state)
+        if res.status_code >= 400:
+            raise CommandError('%s got a %s response: %s' % (
+                scenario.name,
+                res.status_code,
+                res.content[:200]
+            ))
+
+    def write_report(self, report, baseline):
+        """Write the results, and how they changed from the baseline"""
+
+        self.stdout.write(
+            'commit {commit}, {users} users x {recipes} recipes '
+            '({distribution}), {requests} requests per scenario'.format(
+                commit=report['commit'] or '?',
+                **report['options']
+            )
+        )
+        self.stdout.write(
+            '  {:22} {:>8} {:>8} {:>8} {:>8} {:>8} {:>8} {:>9}'.format(
+                'scenario', 'mean ms', 'p50', 'p95', 'p99', 'queries',
+                'db ms', 'peak KiB'
+            )
+        )
+
+        for name, result in report['results'].items():
+            line = '  {:22} {mean_ms:8.2f} {p50_ms:8.2f} {p95_ms:8.2f} ' \
+                   '{p99_ms:8.2f} {queries:8.1f} {db_ms:8.2f} ' \
+                   '{peak_kib:9.0f}'.format(name, **result)
+
+            before = (baseline or {}).get('results', {}).get(name)
+            if before:
+                # positive is slower, or more queries, than the baseline
+                line += '  p50 {:+.0%} queries {:+.1f}'.format(
+                    result['p50_ms'] / before['p50_ms'] - 1,
+                    result['queries'] - before['queries']
+                )
+            self.stdout.write(line)
+
+        if baseline:
+            self.stdout.write('compared to commit %s' % (
+                baseline.get('commit') or '?'
+            ))
+            if baseline.get('options') != report['options']:
+                self.stdout.write(self.style.WARNING(
+                    'The baseline ran with other options: %s' % (
+                        baseline.get('options'),
+                    )
+                ))
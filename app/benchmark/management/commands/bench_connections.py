@@ -0,0 +1,83 @@
+import time
+from http.client import HTTPConnection
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+
+from benchmark.utils import describe_timings, serve_in_thread
+from core.db.stats import get_connection_stats, reset_connection_stats
+from core.models import AuthToken
+
+
+class Command(BaseCommand):
+    """Django command load testing the API with and without reuse"""
+
+    help = 'Time API requests with CONN_MAX_AGE 0 and with a max age'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--max-age', type=int, default=60)
+        parser.add_argument('--path', default='/api/recipe/tags/')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.create_user(
+            email='benchmark-connections@londonappdev.com',
+            password='benchmark'
+        )
+        token = AuthToken.objects.issue(user)
+
+        # without the caches the endpoints wouldn't touch the db at all.
+        # The host is only allowed by default when DEBUG is on
+        bench_settings = override_settings(
+            ALLOWED_HOSTS=settings.ALLOWED_HOSTS + ['127.0.0.1'],
+            TOKEN_AUTH_CACHE=dict(settings.TOKEN_AUTH_CACHE, TTL=0),
+            API_LIST_CACHE=dict(settings.API_LIST_CACHE, TIMEOUT=0),
+        )
+
+        # every wrapper shares this dict, the server thread included
+        settings_dict = connections.databases['default']
+        max_age = settings_dict['CONN_MAX_AGE']
+        try:
+            with bench_settings, serve_in_thread() as port:
+                for value in (0, options['max_age']):
+                    settings_dict['CONN_MAX_AGE'] = value
+                    self.run(port, token.key, value, options)
+        finally:
+            settings_dict['CONN_MAX_AGE'] = max_age
+            user.delete()
+
+    def run(self, port, key, max_age, options):
+        """Send the requests and report their timings"""
+
+        reset_connection_stats()
+
+        timings = []
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            conn = HTTPConnection('127.0.0.1', port)
+            conn.request('GET', options['path'], headers={
+                'Authorization': 'Token %s' % key,
+            })
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            timings.append(time.perf_counter() - start)
+
+            if response.status != 200:
+                raise CommandError('%s answered %s' % (
+                    options['path'],
+                    response.status
+                ))
+
+        stats = get_connection_stats()
+        self.stdout.write(
+            'CONN_MAX_AGE={:<4} {}  reuse {:.0%} ({} connects)'.format(
+                max_age,
+                describe_timings(timings),
+                stats['reuse_ratio'],
+                stats['connects'],
+            )
+        )
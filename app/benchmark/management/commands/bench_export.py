@@ -0,0 +1,76 @@
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from benchmark.utils import create_sample_recipes
+from core.models import Recipe
+from core.renderers import FastJSONRenderer
+from recipe.export import export_chunks, stream_json
+from recipe.serializers import RecipeSerializer, RecipeValuesSerializer
+
+
+def measure(func):
+    """Return the milliseconds and peak MiB of memory used by func"""
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed * 1000, peak / 2 ** 20
+
+
+class Command(BaseCommand):
+    """Django command comparing a full list with the streaming export"""
+
+    help = 'Measure the memory used to export every recipe of a user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        # the sample data is rolled back once the measures are done
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email='benchmark@londonappdev.com',
+                password='benchmark'
+            )
+            create_sample_recipes(user, options['recipes'])
+
+            self.run(user, options)
+
+            transaction.set_rollback(True)
+
+    def run(self, user, options):
+        """Measure both ways of exporting the recipes of the user"""
+
+        def recipes():
+            return Recipe.objects.filter(user=user).order_by('-id')
+
+        def full_list():
+            queryset = recipes().with_related_ids().defer('search_vector')
+            data = RecipeSerializer(queryset, many=True).data
+            FastJSONRenderer().render(data)
+
+        def streamed():
+            chunks = export_chunks(
+                RecipeValuesSerializer(),
+                recipes(),
+                settings.API_EXPORT_CHUNK_SIZE
+            )
+            # like the wsgi server, only hold on to the current chunk
+            for _ in stream_json(chunks):
+                pass
+
+        self.stdout.write('Exporting {} recipes:'.format(options['recipes']))
+        for name, func in (('full list', full_list), ('stream', streamed)):
+            ms, mib = measure(func)
+            self.stdout.write('  {:10} {:8.2f} ms {:8.2f} MiB peak'.format(
+                name, ms, mib
+            ))
@@ -0,0 +1,106 @@
+import gzip
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.utils.text import compress_string
+
+from benchmark.management.commands.bench_renderers import sample_payload
+from benchmark.utils import best_time
+from core.parsers import CBORParser, FastJSONParser, MessagePackParser
+from core.renderers import \
+    CBORRenderer, \
+    FastJSONRenderer, \
+    MessagePackRenderer, \
+    cbor2, \
+    msgpack
+
+
+class Command(BaseCommand):
+    """Django command comparing the response formats on a recipe list"""
+
+    help = 'Compare the size and encoding time of JSON, MessagePack ' \
+           'and CBOR on a large recipe list, with and without gzip'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        payload = sample_payload(options['recipes'])
+
+        formats = [('JSON', FastJSONRenderer(), FastJSONParser())]
+        if msgpack is not None:
+            formats.append(
+                ('MessagePack', MessagePackRenderer(), MessagePackParser())
+            )
+        if cbor2 is not None:
+            formats.append(('CBOR', CBORRenderer(), CBORParser()))
+
+        self.stdout.write(
+            'Encoding {} recipes, best of {}:'.format(
+                options['recipes'],
+                options['repeat']
+            )
+        )
+        self.stdout.write(
+            '  {:12} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+                'format', 'KiB', 'gzip KiB', 'encode ms', 'gzip ms',
+                'decode ms'
+            )
+        )
+
+        # what every format must decode back to
+        expected = FastJSONParser().parse(
+            BytesIO(FastJSONRenderer().render(payload))
+        )
+
+        json_size = None
+        for name, renderer, parser in formats:
+            body = renderer.render(payload)
+            # compressed like GZipMiddleware does it
+            compressed = compress_string(body)
+            if parser.parse(BytesIO(body)) != expected:
+                self.stderr.write('%s decoded to other data!' % name)
+
+            encode_ms = best_time(
+                lambda: renderer.render(payload),
+                options['repeat']
+            )
+            gzip_ms = best_time(
+                lambda: compress_string(body),
+                options['repeat']
+            )
+            # what the client does, after the transfer
+            decode_ms = best_time(
+                lambda: parser.parse(BytesIO(gzip.decompress(compressed))),
+                options['repeat']
+            )
+
+            self.stdout.write(
+                '  {:12} {:10.1f} {:10.1f} {:10.2f} {:10.2f} {:10.2f}'.format(
+                    name,
+                    len(body) / 1024,
+                    len(compressed) / 1024,
+                    encode_ms,
+                    gzip_ms,
+                    decode_ms
+                )
+            )
+
+            if json_size is None:
+                json_size = len(compressed)
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    '  {} gzipped is {:.0%} of the gzipped JSON'.format(
+                        name,
+                        len(compressed) / json_size
+                    )
+                ))
+
+        missing = [
+            module for module, loaded in (('msgpack', msgpack),
+                                          ('cbor2', cbor2))
+            if loaded is None
+        ]
+        if missing:
+            self.stdout.write('Not installed: %s' % ', '.join(missing))
@@ -0,0 +1,115 @@
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmark.utils import create_sample_recipes, describe_timings
+from core.models import AuthToken
+
+
+class Command(BaseCommand):
+    """Django command load testing a running server"""
+
+    help = 'Measure the requests per second a running server handles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--path', default='/api/recipe/recipes/')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument(
+            '--cached', action='store_true',
+            help='let the server answer from its list cache',
+        )
+
+    def handle(self, *args, **options):
+        # the server reads the sample data from the same db
+        user = get_user_model().objects.create_user(
+            email='benchmark-http@londonappdev.com',
+            password='benchmark'
+        )
+        try:
+            create_sample_recipes(user, options['recipes'])
+            token = AuthToken.objects.issue(user)
+            self.run(token.key, options)
+        finally:
+            user.delete()
+
+    def run(self, key, options):
+        """Send the requests from concurrent threads and report"""
+
+        url = urlsplit(options['url'])
+        timings = []
+        errors = []
+        lock = threading.Lock()
+        # the request numbers still to send
+        numbers = iter(range(options['requests']))
+
+        def send():
+            conn = HTTPConnection(url.hostname, url.port or 80)
+            while True:
+                with lock:
+                    number = next(numbers, None)
+                if number is None:
+                    break
+
+                path = options['path']
+                if not options['cached']:
+                    # every url is new to the list cache of the server
+                    path += '%sbench=%d' % (
+                        '&' if '?' in path else '?',
+                        number
+                    )
+
+                start = time.perf_counter()
+                try:
+                    conn.request('GET', path, headers={
+                        'Authorization': 'Token %s' % key,
+                    })
+                    response = conn.getresponse()
+                    response.read()
+                except OSError as error:
+                    with lock:
+                        errors.append(error)
+                    break
+                elapsed = time.perf_counter() - start
+
+                with lock:
+                    timings.append(elapsed)
+                    if response.status != 200:
+                        errors.append(response.status)
+
+                if response.will_close:
+                    conn.close()
+                    conn = HTTPConnection(url.hostname, url.port or 80)
+            conn.close()
+
+        threads = [
+            threading.Thread(target=send)
+            for _ in range(options['concurrency'])
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if errors:
+            raise CommandError('%s requests failed, e.g. with %s' % (
+                len(errors),
+                errors[0]
+            ))
+
+        self.stdout.write(
+            '{} requests, {} concurrent: {:.1f} req/s'.format(
+                len(timings),
+                options['concurrency'],
+                len(timings) / elapsed
+            )
+        )
+        self.stdout.write('  ' + describe_timings(timings))
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    """Django command measuring the logins per second of each hasher"""
+
+    help = 'Measure how many logins per second per core each hasher allows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--hashers', nargs='+',
+            default=sorted(settings.PASSWORD_HASHER_CHOICES),
+            choices=sorted(settings.PASSWORD_HASHER_CHOICES),
+        )
+
+    def handle(self, *args, **options):
+        cores = len(os.sched_getaffinity(0))
+        self.stdout.write('{} logins, {} concurrent, {} cores:'.format(
+            options['logins'],
+            options['concurrency'],
+            cores
+        ))
+
+        for name in options['hashers']:
+            path = settings.PASSWORD_HASHER_CHOICES[name]
+            with override_settings(PASSWORD_HASHERS=[path]):
+                hasher = get_hasher()
+                try:
+                    if hasher.library is not None:
+                        hasher._load_library()
+                except ValueError:
+                    # argon2-cffi or bcrypt isn't installed
+                    self.stdout.write('  {:8} not installed'.format(name))
+                    continue
+
+                rate = self.run(options)
+
+            self.stdout.write(
+                '  {:8} {:8.1f} logins/s {:8.1f} per core'.format(
+                    name,
+                    rate,
+                    rate / cores
+                )
+            )
+
+    def run(self, options):
+        """Log in from concurrent threads, return the logins per second"""
+
+        # committed, the threads use their own connections
+        user = get_user_model().objects.create_user(
+            email='benchmark-logins@londonappdev.com',
+            password='benchmark'
+        )
+        failures = []
+        remaining = iter(range(options['logins']))
+        lock = threading.Lock()
+
+        def login():
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    if authenticate(username=user.email,
+                                    password='benchmark') is None:
+                        failures.append(user.email)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=login)
+            for _ in range(options['concurrency'])
+        ]
+        try:
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            user.delete()
+
+        if failures:
+            raise CommandError('%s logins failed' % len(failures))
+
+        return options['logins'] / elapsed
@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from benchmark.utils import best_time, create_sample_recipes
+from core.models import Recipe
+
+
+class Command(BaseCommand):
+    """Django command comparing sequential and concurrent prefetches"""
+
+    help = 'Time loading recipes with their tags and ingredients, ' \
+           'prefetched one after the other and concurrently'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--latency', type=float, default=5,
+            help='milliseconds added to every query, like a remote db',
+        )
+
+    def handle(self, *args, **options):
+        # committed, the pool threads can't see an open transaction
+        user = get_user_model().objects.create_user(
+            email='benchmark-prefetch@londonappdev.com',
+            password='benchmark'
+        )
+        try:
+            create_sample_recipes(user, options['recipes'])
+            self.run(user, options)
+        finally:
+            user.delete()
+
+    def run(self, user, options):
+        """Time both ways of loading the recipes of the user"""
+
+        latency = options['latency'] / 1000
+
+        def add_latency(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def recipes():
+            return Recipe.objects.filter(user=user).with_related_objects()
+
+        def sequential():
+            list(recipes())
+
+        def concurrent():
+            list(recipes().prefetch_concurrently())
+
+        with connection.execute_wrapper(add_latency):
+            sequential_ms = best_time(sequential, options['repeat'])
+            concurrent_ms = best_time(concurrent, options['repeat'])
+
+        self.stdout.write(
+            'Loading {} recipes with {} ms per query, best of {}:'.format(
+                options['recipes'],
+                options['latency'],
+                options['repeat']
+            )
+        )
+        self.stdout.write('  sequential  {:8.2f} ms'.format(sequential_ms))
+        self.stdout.write('  concurrent  {:8.2f} ms'.format(concurrent_ms))
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.renderers import JSONRenderer
+
+from benchmark.utils import best_time
+from core.renderers import FastJSONRenderer, orjson
+
+
+def sample_payload(count):
+    """Return a recipe list page shaped like the API response"""
+
+    results = [
+        OrderedDict((
+            ('id', index),
+            ('title', 'Recipe number %d' % index),
+            ('ingredients', list(range(index % 7, index % 7 + 8))),
+            ('tags', list(range(index % 3, index % 3 + 3))),
+            ('time_minutes', 5 + index % 120),
+            ('price', '%d.%02d' % (index % 100, index % 100)),
+            ('link', 'https://example.com/recipes/%d' % index),
+        ))
+        for index in range(count)
+    ]
+
+    return OrderedDict((
+        ('next', None),
+        ('previous', None),
+        ('results', results),
+    ))
+
+
+class Command(BaseCommand):
+    """Django command comparing the JSON renderers on a recipe list"""
+
+    help = 'Time rendering a large recipe list with each JSON renderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        payload = sample_payload(options['recipes'])
+
+        stdlib = JSONRenderer()
+        fast = FastJSONRenderer()
+
+        if stdlib.render(payload) != fast.render(payload):
+            self.stderr.write('The renderers produced different output!')
+
+        stdlib_ms = best_time(
+            lambda: stdlib.render(payload),
+            options['repeat']
+        )
+        fast_ms = best_time(lambda: fast.render(payload), options['repeat'])
+
+        self.stdout.write(
+            'Rendering {} recipes, best of {}:'.format(
+                options['recipes'],
+                options['repeat']
+            )
+        )
+        self.stdout.write('  JSONRenderer      {:8.2f} ms'.format(stdlib_ms))
+        self.stdout.write(
+            '  FastJSONRenderer  {:8.2f} ms ({})'.format(
+                fast_ms,
+                'orjson' if orjson else 'orjson not installed'
+            )
+        )
+        self.stdout.write(self.style.SUCCESS(
+            '{:.1f}x faster'.format(stdlib_ms / fast_ms)
+        ))
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from benchmark.utils import best_time, create_sample_recipes
+from core.models import Recipe
+from recipe.serializers import RecipeSerializer, RecipeValuesSerializer
+
+
+class Command(BaseCommand):
+    """Django command comparing the model and values list serializers"""
+
+    help = 'Time listing recipes with the model and values serializers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # the sample data is rolled back once the timings are done
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email='benchmark@londonappdev.com',
+                password='benchmark'
+            )
+            create_sample_recipes(user, options['recipes'])
+
+            self.run(user, options)
+
+            transaction.set_rollback(True)
+
+    def run(self, user, options):
+        """Time both serializers on the recipes of the user"""
+
+        def recipes():
+            return Recipe.objects.filter(user=user).order_by('-id')
+
+        def model_list():
+            queryset = recipes().with_related_ids().defer('search_vector')
+            return RecipeSerializer(queryset, many=True).data
+
+        def values_list():
+            queryset = RecipeValuesSerializer().get_values(recipes())
+            return RecipeValuesSerializer(queryset, many=True).data
+
+        if model_list() != values_list():
+            self.stderr.write('The serializers produced different data!')
+
+        model_ms = best_time(model_list, options['repeat'])
+        values_ms = best_time(values_list, options['repeat'])
+
+        self.stdout.write(
+            'Listing {} recipes, best of {}:'.format(
+                options['recipes'],
+                options['repeat']
+            )
+        )
+        self.stdout.write('  RecipeSerializer        {:8.2f} ms'.format(
+            model_ms
+        ))
+        self.stdout.write('  RecipeValuesSerializer  {:8.2f} ms'.format(
+            values_ms
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            '{:.1f}x faster'.format(model_ms / values_ms)
+        ))
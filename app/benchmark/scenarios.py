@@ -0,0 +1,157 @@
+import itertools
+import json
+import random
+from collections import OrderedDict
+
+from django.urls import reverse
+
+from benchmark.data import PASSWORD
+from core.models import AuthToken, Tag, Ingredient, Recipe
+
+
+# name -> Scenario, in the order they're run
+SCENARIOS = OrderedDict()
+
+
+class Scenario:
+    """A kind of API request, sent as a random generated user"""
+
+    def __init__(self, name, method, build, authenticated=True):
+        self.name = name
+        self.method = method
+        # build(state, user) returns the path and the JSON body
+        self.build = build
+        self.authenticated = authenticated
+
+    def send(self, client, state):
+        """Send one request of the scenario, return the response"""
+
+        user = state.rng.choice(state.users)
+        path, data = self.build(state, user)
+        headers = {}
+        if self.authenticated:
+            headers['HTTP_AUTHORIZATION'] = 'Token %s' % user['token']
+
+        if data is None:
+            return getattr(client, self.method)(path, **headers)
+
+        return getattr(client, self.method)(
+            path,
+            json.dumps(data),
+            content_type='application/json',
+            **headers
+        )
+
+
+def scenario(name, method='get', authenticated=True):
+    """Register the decorated function as a scenario building requests"""
+
+    def register(build):
+        SCENARIOS[name] = Scenario(name, method, build, authenticated)
+        return build
+
+    return register
+
+
+class State:
+    """The generated users and the ids the requests pick from"""
+
+    def __init__(self, users, seed=0):
+        self.rng = random.Random(seed)
+        # makes the names of the created tags and recipes unique
+        self.counter = itertools.count()
+        self.users = []
+
+        for user in users:
+            self.users.append({
+                'email': user.email,
+                'token': AuthToken.objects.issue(user).key,
+                'recipes': list(Recipe.objects.filter(
+                    user=user
+                ).values_list('id', flat=True)),
+                'tags': list(Tag.objects.filter(
+                    user=user
+                ).values_list('id', flat=True)),
+                'ingredients': list(Ingredient.objects.filter(
+                    user=user
+                ).values_list('id', flat=True)),
+            })
+
+    def sample(self, ids, count):
+        """Return up to count random ids"""
+
+        return self.rng.sample(ids, min(count, len(ids)))
+
+
+@scenario('tags-list')
+def tags_list(state, user):
+    return reverse('recipe:tag-list'), None
+
+
+@scenario('tags-create', 'post')
+def tags_create(state, user):
+    return reverse('recipe:tag-list'), {
+        'name': 'New tag %d' % next(state.counter),
+    }
+
+
+@scenario('ingredients-list')
+def ingredients_list(state, user):
+    return reverse('recipe:ingredient-list'), None
+
+
+@scenario('ingredients-create', 'post')
+def ingredients_create(state, user):
+    return reverse('recipe:ingredient-list'), {
+        'name': 'New ingredient %d' % next(state.counter),
+    }
+
+
+@scenario('recipes-list')
+def recipes_list(state, user):
+    return reverse('recipe:recipe-list'), None
+
+
+@scenario('recipes-list-sparse')
+def recipes_list_sparse(state, user):
+    # what a mobile client showing the titles asks for
+    return '%s?fields=id,title' % reverse('recipe:recipe-list'), None
+
+
+@scenario('recipes-list-by-tag')
+def recipes_list_by_tag(state, user):
+    return '%s?tags=%s' % (
+        reverse('recipe:recipe-list'),
+        ','.join(str(pk) for pk in state.sample(user['tags'], 2))
+    ), None
+
+
+@scenario('recipes-retrieve')
+def recipes_retrieve(state, user):
+    # a user without recipes gets a 404, which is reported as a failure
+    pk = state.rng.choice(user['recipes']) if user['recipes'] else 0
+    return reverse('recipe:recipe-detail', args=[pk]), None
+
+
+@scenario('recipes-search')
+def recipes_search(state, user):
+    return '%s?q=number' % reverse('recipe:recipe-search'), None
+
+
+@scenario('recipes-create', 'post')
+def recipes_create(state, user):
+    return reverse('recipe:recipe-list'), {
+        'title': 'New recipe %d' % next(state.counter),
+        'time_minutes': state.rng.randint(5, 180),
+        'price': '%d.50' % state.rng.randint(1, 99),
+        'tags': state.sample(user['tags'], 3),
+        'ingredients': state.sample(user['ingredients'], 8),
+    }
+
+
+@scenario('token-login', 'post', authenticated=False)
+def token_login(state, user):
+    return reverse('user:token'), {
+        'email': user['email'],
+        'password': PASSWORD,
+    }
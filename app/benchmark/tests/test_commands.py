@@ -0,0 +1,155 @@
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import \
+    SimpleTestCase, \
+    TestCase, \
+    TransactionTestCase, \
+    override_settings
+
+from benchmark.utils import serve_in_thread
+from core.models import Recipe
+
+
+class RendererBenchmarkTests(SimpleTestCase):
+    """Smoke test the renderer benchmark with tiny sizes"""
+
+    def test_bench_renderers(self):
+        """Test the renderer benchmark runs and reports a speedup"""
+
+        out = StringIO()
+        err = StringIO()
+
+        call_command('bench_renderers', recipes=10, repeat=1,
+                     stdout=out, stderr=err)
+
+        self.assertIn('faster', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+
+    def test_bench_formats(self):
+        """Test the format benchmark runs and decodes the same data"""
+
+        out = StringIO()
+        err = StringIO()
+
+        call_command('bench_formats', recipes=10, repeat=1,
+                     stdout=out, stderr=err)
+
+        self.assertIn('gzip KiB', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+
+
+class SerializerBenchmarkTests(TestCase):
+    """Smoke test the serializer benchmark with tiny sizes"""
+
+    def test_bench_serializers(self):
+        """Test the serializer benchmark runs and leaves no data behind"""
+
+        out = StringIO()
+        err = StringIO()
+
+        call_command('bench_serializers', recipes=10, repeat=1,
+                     stdout=out, stderr=err)
+
+        self.assertIn('faster', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bench_export(self):
+        """Test the export benchmark runs and leaves no data behind"""
+
+        out = StringIO()
+
+        call_command('bench_export', recipes=10, stdout=out)
+
+        self.assertIn('MiB peak', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+
+# committed data, the requests are served by another thread
+class ServerBenchmarkTests(TransactionTestCase):
+    """Smoke test the benchmarks sending requests with a few of them"""
+
+    def test_bench_connections(self):
+        """Test the connection benchmark runs and leaves no user behind"""
+
+        out = StringIO()
+
+        call_command('bench_connections', requests=2, stdout=out)
+
+        self.assertIn('CONN_MAX_AGE=0', out.getvalue())
+        self.assertIn('reuse', out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
+
+    @override_settings(ALLOWED_HOSTS=['127.0.0.1'])
+    def test_bench_http(self):
+        """Test the http benchmark reports the requests per second"""
+
+        out = StringIO()
+
+        with serve_in_thread() as port:
+            call_command('bench_http', url='http://127.0.0.1:%s' % port,
+                         requests=4, concurrency=2, recipes=3, stdout=out)
+
+        self.assertIn('4 requests, 2 concurrent', out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_bench_prefetch(self):
+        """Test the prefetch benchmark runs and leaves no user behind"""
+
+        out = StringIO()
+
+        # so the pool threads don't keep the test db open
+        with patch.dict(connections.databases['default'],
+                        {'CONN_MAX_AGE': 0}):
+            call_command('bench_prefetch', recipes=3, repeat=1, latency=0,
+                         stdout=out)
+
+        self.assertIn('concurrent', out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
+
+    @override_settings(PASSWORD_HASHING=dict(
+        settings.PASSWORD_HASHING,
+        PBKDF2_ITERATIONS=10
+    ))
+    def test_bench_logins(self):
+        """Test the login benchmark reports the logins per core"""
+
+        out = StringIO()
+
+        call_command('bench_logins', logins=4, concurrency=2,
+                     hashers=['pbkdf2'], stdout=out)
+
+        self.assertIn('per core', out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
+
+    @override_settings(PASSWORD_HASHING=dict(
+        settings.PASSWORD_HASHING,
+        PBKDF2_ITERATIONS=10
+    ))
+    def test_bench_api(self):
+        """Test the API benchmark runs every scenario and compares"""
+
+        out = StringIO()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            with patch.dict(connections.databases['default'],
+                            {'CONN_MAX_AGE': 0}):
+                call_command('bench_api', users=2, recipes=3, requests=2,
+                             warmup=0, memory_requests=1, json=path,
+                             stdout=out)
+                call_command('bench_api', users=2, recipes=3, requests=2,
+                             warmup=0, memory_requests=1, compare=path,
+                             scenarios=['recipes-list'], stdout=out)
+
+        self.assertIn('token-login', out.getvalue())
+        self.assertIn('p50', out.getvalue())
+        self.assertIn('compared to commit', out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from benchmark.data import generate_data, split
+from benchmark.utils import create_sample_recipes
+from core.models import Tag, Recipe
+
+
+class GenerateDataTests(TestCase):
+    """Test generating the benchmark data"""
+
+    def test_split_uniform(self):
+        """Test that a uniform split gives everyone the same share"""
+
+        self.assertEqual(split(10, 3, 'uniform'), [4, 3, 3])
+
+    def test_split_skewed(self):
+        """Test that a skewed split keeps the total, biggest first"""
+
+        parts = split(100, 4, 'skewed')
+
+        self.assertEqual(sum(parts), 100)
+        self.assertEqual(parts, sorted(parts, reverse=True))
+        self.assertGreater(parts[0], 2 * parts[-1])
+
+    def test_generate_data(self):
+        """Test that every user gets their own linked recipes"""
+
+        users = generate_data(users=3, recipes=4, tags=5, ingredients=6,
+                              tags_per_recipe=2, ingredients_per_recipe=3,
+                              distribution='skewed')
+
+        self.assertEqual(len(users), 3)
+        self.assertEqual(Recipe.objects.count(), 12)
+        self.assertEqual(Tag.objects.filter(user=users[0]).count(), 5)
+        for recipe in Recipe.objects.all():
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 3)
+            self.assertFalse(recipe.tags.exclude(user=recipe.user).exists())
+        self.assertTrue(users[0].check_password('benchmark'))
+
+    def test_generate_data_repeatable(self):
+        """Test that the same seed generates the same recipes"""
+
+        def generate():
+            users = generate_data(users=2, recipes=5, seed=3)
+            rows = list(Recipe.objects.order_by('id').values_list(
+                'title', 'time_minutes', 'price'
+            ))
+            for user in users:
+                user.delete()
+            return rows
+
+        self.assertEqual(generate(), generate())
+
+    def test_create_sample_recipes(self):
+        """Test the sample recipes of a user are linked and counted"""
+
+        user = get_user_model().objects.create_user(
+            email='test@testuser.com',
+            password='testpassword'
+        )
+
+        recipes = create_sample_recipes(user, 4, tags=2, tags_per_recipe=1)
+
+        self.assertEqual(len(recipes), 4)
+        user.refresh_from_db()
+        self.assertEqual(user.recipe_count, 4)
+        self.assertEqual(
+            sum(tag.recipe_count for tag in Tag.objects.filter(user=user)),
+            4
+        )
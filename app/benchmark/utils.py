@@ -0,0 +1,92 @@
+import threading
+import time
+from contextlib import contextmanager
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+
+def best_time(func, repeat):
+    """Return the fastest of repeat runs of func, in milliseconds"""
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings) * 1000
+
+
+def create_sample_recipes(user, recipes, tags=20, ingredients=50,
+                          tags_per_recipe=3, ingredients_per_recipe=8):
+    """Create recipes for the user, linked to tags and ingredients"""
+
+    # imported here so the module loads before the apps are ready
+    from benchmark.data import generate_recipes
+
+    return generate_recipes(
+        [user],
+        [recipes],
+        tags=tags,
+        ingredients=ingredients,
+        tags_per_recipe=tags_per_recipe,
+        ingredients_per_recipe=ingredients_per_recipe,
+    )
+
+
+def percentile(values, pct):
+    """Return the pct percentile of the values, nearest rank"""
+
+    ordered = sorted(values)
+    index = max(0, int(round(pct / 100 * len(ordered))) - 1)
+
+    return ordered[index]
+
+
+def describe_timings(timings):
+    """Return the mean, p50, p95 and p99 of timings in seconds, as ms"""
+
+    return 'mean {:7.2f} ms  p50 {:7.2f}  p95 {:7.2f}  p99 {:7.2f}'.format(
+        sum(timings) / len(timings) * 1000,
+        percentile(timings, 50) * 1000,
+        percentile(timings, 95) * 1000,
+        percentile(timings, 99) * 1000,
+    )
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that doesn't log every request"""
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve_in_thread():
+    """Serve the django app on a free local port, yielding the port"""
+
+    # imported here so the module loads before the apps are ready
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+
+    # one thread handling one request at a time, like a sync worker
+    server = make_server(
+        '127.0.0.1', 0,
+        get_wsgi_application(),
+        handler_class=QuietRequestHandler
+    )
+
+    def serve():
+        try:
+            server.serve_forever()
+        finally:
+            # persistent connections belong to the thread that opened them
+            connections.close_all()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    try:
+        yield server.server_port
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
@@ -0,0 +1,63 @@
+from django.db import connections
+
+
+def bulk_create_with_ids(model, objs, batch_size=None, using='default'):
+    """Insert the objects in bulk and return them with their ids set"""
+
+    objs = list(objs)
+
+    # PostgreSQL returns the new ids from a multi row insert, so the
+    # objects can be linked to their tags and ingredients straight away
+    if connections[using].features.can_return_ids_from_bulk_insert:
+        return model.objects.using(using).bulk_create(
+            objs,
+            batch_size=batch_size,
+        )
+
+    # other backends (like the SQLite test db) don't, so fall back
+    # to saving the objects one by one
+    for obj in objs:
+        obj.save(using=using)
+
+    return objs
+
+
+def bulk_add_related(instances, field_name, related, batch_size=None,
+                     replace=False, using='default'):
+    """Link every instance to its related objects with one insert
+
+    related holds one iterable of objects (or ids) per instance, None
+    leaves the relation of that instance untouched. With replace the
+    existing links of the instances are removed first.
+    """
+
+    if not instances:
+        return
+
+    field = type(instances[0])._meta.get_field(field_name)
+    through = field.remote_field.through
+    # e.g. recipe_id and tag_id for the Recipe.tags through table
+    source = '%s_id' % field.m2m_field_name()
+    target = '%s_id' % field.m2m_reverse_field_name()
+
+    rows = []
+    changed = []
+    for instance, values in zip(instances, related):
+        if values is None:
+            continue
+
+        changed.append(instance.pk)
+        # an item can list the same id twice, the through table
+        # only allows one row per pair
+        target_ids = dict.fromkeys(getattr(v, 'pk', v) for v in values)
+        rows.extend(
+            through(**{source: instance.pk, target: target_id})
+            for target_id in target_ids
+        )
+
+    if replace and changed:
+        through.objects.using(using).filter(
+            **{'%s__in' % source: changed}
+        ).delete()
+
+    through.objects.using(using).bulk_create(rows, batch_size=batch_size)
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.models import Prefetch, prefetch_related_objects
+from django.db.models.constants import LOOKUP_SEP
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the thread pool running the concurrent queries"""
+
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.CONCURRENT_QUERY_THREADS,
+                thread_name_prefix='concurrent-query',
+            )
+
+    return _executor
+
+
+def _run_in_thread(func, execute_wrappers):
+    """Run func in a pool thread, as if it ran in the calling thread"""
+
+    # every pool thread has its own db connection. Checked like the
+    # connection of a request, so it's health checked and recycled too
+    close_old_connections()
+    try:
+        # e.g. the query timing of the request applies to these as well
+        with ExitStack() as stack:
+            connection = connections[DEFAULT_DB_ALIAS]
+            for wrapper in execute_wrappers:
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            return func()
+    finally:
+        close_old_connections()
+
+
+def run_concurrently(*funcs):
+    """Call the functions at the same time, return their results
+
+    Meant for independent queries. They're called one after the other
+    when concurrency is turned off, or inside a transaction: the other
+    threads use other connections and couldn't see its changes.
+    """
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    if (settings.CONCURRENT_QUERY_THREADS <= 0 or
+            len(funcs) < 2 or
+            connection.in_atomic_block):
+        return [func() for func in funcs]
+
+    futures = [
+        get_executor().submit(
+            _run_in_thread,
+            func,
+            list(connection.execute_wrappers)
+        )
+        for func in funcs[1:]
+    ]
+    # this thread would only wait otherwise, so it runs the first one
+    results = [funcs[0]()]
+    results.extend(future.result() for future in futures)
+
+    return results
+
+
+def prefetch_related_concurrently(instances, *lookups):
+    """Same as prefetch_related_objects, running the lookups concurrently"""
+
+    instances = list(instances)
+    if not instances:
+        return
+
+    # lookups through the same relation depend on each other, e.g.
+    # tags and tags__user, so they're prefetched together
+    groups = {}
+    for lookup in lookups:
+        path = lookup.prefetch_through if isinstance(lookup, Prefetch) \
+            else lookup
+        groups.setdefault(path.split(LOOKUP_SEP)[0], []).append(lookup)
+
+    # created up front, otherwise two threads could each set a new one
+    for instance in instances:
+        if not hasattr(instance, '_prefetched_objects_cache'):
+            instance._prefetched_objects_cache = {}
+
+    run_concurrently(*[
+        lambda group=group: prefetch_related_objects(instances, *group)
+        for group in groups.values()
+    ])
@@ -0,0 +1,57 @@
+from django.db.backends.postgresql import base
+
+from core.db import stats
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend checking persistent connections before reuse
+
+    With CONN_MAX_AGE a connection outlives the request that opened it.
+    If the db restarted or dropped it in the meantime, the next request
+    would fail on its first query. With CONN_HEALTH_CHECKS a reused
+    connection is tested once per request, and replaced when it's dead.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # whether the connection was used since the request started
+        self.checked_out = False
+
+    @property
+    def health_checks_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def ensure_connection(self):
+        """Connect, or check the reused connection still works"""
+
+        if not self.checked_out:
+            self.checked_out = True
+            stats.increment('checkouts')
+
+            if self.connection is not None:
+                stats.increment('reuses')
+                # never drop a connection in the middle of a transaction
+                if (self.health_checks_enabled and
+                        not self.in_atomic_block and
+                        not self.is_usable()):
+                    stats.increment('failed_health_checks')
+                    self.close()
+
+        super().ensure_connection()
+
+    def connect(self):
+        """Open a new connection"""
+
+        super().connect()
+        stats.increment('connects')
+
+    def close_if_unusable_or_obsolete(self):
+        """Close the connection if needed, the next use is a new checkout"""
+
+        # called when every request starts and finishes. The autocommit
+        # check in there uses the connection, that's not a checkout
+        self.checked_out = True
+        try:
+            super().close_if_unusable_or_obsolete()
+        finally:
+            self.checked_out = False
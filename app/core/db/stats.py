@@ -0,0 +1,49 @@
+import threading
+from collections import Counter
+
+
+# counted for the whole process, every thread has its own connections
+_counts = Counter()
+_lock = threading.Lock()
+
+
+def increment(name):
+    """Add one to a connection counter"""
+
+    with _lock:
+        _counts[name] += 1
+
+
+def get_connection_stats():
+    """Return the connection counters and the connection reuse ratio
+
+    checkouts is how many times a request (or command) started using
+    the db, connects how many connections were opened, reuses how many
+    checkouts got an already open connection and failed_health_checks
+    how many of those turned out to be broken.
+    """
+
+    with _lock:
+        stats = {
+            name: _counts[name]
+            for name in (
+                'checkouts',
+                'connects',
+                'reuses',
+                'failed_health_checks',
+            )
+        }
+
+    if stats['checkouts']:
+        stats['reuse_ratio'] = stats['reuses'] / stats['checkouts']
+    else:
+        stats['reuse_ratio'] = 0.0
+
+    return stats
+
+
+def reset_connection_stats():
+    """Set every connection counter back to zero"""
+
+    with _lock:
+        _counts.clear()
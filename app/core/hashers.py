@@ -0,0 +1,101 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class TunedPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 hasher with the iterations from the settings
+
+    Same algorithm name as django's, so it checks the existing hashes.
+    Hashes with other iterations are updated on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING['PBKDF2_ITERATIONS']
+
+
+class TunedArgon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 hasher with the costs from the settings"""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_HASHING['ARGON2_TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_HASHING['ARGON2_MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHING['ARGON2_PARALLELISM']
+
+
+class TunedBCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """bcrypt hasher with the rounds from the settings"""
+
+    @property
+    def rounds(self):
+        return settings.PASSWORD_HASHING['BCRYPT_ROUNDS']
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the thread pool hashing the passwords"""
+
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING['THREADS'],
+                thread_name_prefix='password-hashing',
+            )
+
+    return _executor
+
+
+def run_hashing(func, *args):
+    """Call func in the hashing pool and wait for its result
+
+    The pool bounds how many hashes run at once in a process. A burst
+    of logins queues up there instead of taking every core away from
+    the other requests. The hashers release the GIL meanwhile.
+    """
+
+    if settings.PASSWORD_HASHING['THREADS'] <= 0:
+        return func(*args)
+
+    return get_executor().submit(func, *args).result()
+
+
+def make_password(password):
+    """Hash the password like django's make_password, in the pool"""
+
+    return run_hashing(hashers.make_password, password)
+
+
+def check_password(password, encoded, setter=None):
+    """Check the password like django's check_password, in the pool
+
+    setter is called with the password when the hash should be
+    updated, in the calling thread, since it saves to the db.
+    """
+
+    rehash = []
+    is_correct = run_hashing(
+        hashers.check_password,
+        password,
+        encoded,
+        rehash.append
+    )
+
+    if rehash and setter is not None:
+        setter(password)
+
+    return is_correct
@@ -0,0 +1,223 @@
+import csv
+import json
+import sys
+import time
+from contextlib import nullcontext
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.bulk import bulk_create_with_ids, bulk_add_related
+from core.models import Tag, Ingredient, Recipe
+from core.signals import bulk_changed
+
+
+# the recipe columns read from every row, on top of tags and ingredients
+RECIPE_FIELDS = ('title', 'time_minutes', 'price', 'link')
+
+
+def read_csv(stream):
+    """Yield the rows of a CSV file with a header line"""
+
+    for row in csv.DictReader(stream):
+        # the names are separated by semicolons in a single column
+        for name in ('tags', 'ingredients'):
+            value = row.get(name) or ''
+            row[name] = [
+                part.strip() for part in value.split(';') if part.strip()
+            ]
+        yield row
+
+
+def read_ndjson(stream):
+    """Yield the rows of a file with one JSON object per line"""
+
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        # counted like the rows of build_recipe, blank lines left out
+        number += 1
+
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            raise CommandError('Row %s: invalid JSON, %s' % (number, error))
+        if not isinstance(row, dict):
+            raise CommandError('Row %s: must be a JSON object' % number)
+
+        yield row
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+class NameResolver:
+    """Map the tag or ingredient names of a user to ids, in batches"""
+
+    def __init__(self, model, user):
+        self.model = model
+        self.user = user
+        # the names resolved by the earlier batches
+        self.ids = {}
+
+    def resolve(self, names):
+        """Look up or create all the names with one query each"""
+
+        missing = set(names) - set(self.ids)
+        if not missing:
+            return
+
+        existing = self.model.objects.filter(
+            user=self.user,
+            name__in=missing,
+        ).order_by('id').values_list('name', 'id')
+        # when the user has the same name twice, the oldest one is used
+        for name, pk in existing:
+            self.ids.setdefault(name, pk)
+
+        created = bulk_create_with_ids(self.model, [
+            self.model(user=self.user, name=name)
+            for name in sorted(missing - set(self.ids))
+        ])
+        for obj in created:
+            self.ids[obj.name] = obj.pk
+
+    def __getitem__(self, name):
+        return self.ids[name]
+
+
+class Command(BaseCommand):
+    """Django command to import the recipes of a user from a file"""
+
+    help = 'Import recipes from a CSV or NDJSON file ("-" for stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True,
+                            help='email of the owner of the recipes')
+        parser.add_argument('--format', choices=sorted(READERS),
+                            help='defaults to the extension of the file')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError('No user with email %s' % options['user'])
+
+        file_format = options['format']
+        if file_format is None:
+            file_format = options['path'].rsplit('.', 1)[-1].lower()
+            if file_format not in READERS:
+                raise CommandError('Pass --format for %s' % options['path'])
+
+        if options['path'] == '-':
+            # stdin is left open
+            stream = nullcontext(sys.stdin)
+        else:
+            stream = open(options['path'], newline='', encoding='utf-8')
+
+        start = time.monotonic()
+        with stream as lines:
+            count = self.import_rows(
+                user,
+                READERS[file_format](lines),
+                options['batch_size']
+            )
+        elapsed = time.monotonic() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            'Imported {} recipes in {:.2f}s ({:.0f} rows/sec)'.format(
+                count,
+                elapsed,
+                count / elapsed if elapsed else 0
+            )
+        ))
+
+    def import_rows(self, user, rows, batch_size):
+        """Import the rows a batch at a time, return how many there were"""
+
+        tags = NameResolver(Tag, user)
+        ingredients = NameResolver(Ingredient, user)
+
+        count = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return count
+
+            # every batch is saved on its own, a bad row stops the
+            # import without losing the batches before it
+            with transaction.atomic():
+                recipes = self.import_batch(
+                    user,
+                    batch,
+                    count,
+                    tags,
+                    ingredients
+                )
+            count += len(batch)
+
+            # bulk_create skips post_save, this updates the search
+            # vectors and the cached lists of the user
+            bulk_changed.send(sender=Recipe, user=user, instances=recipes)
+
+            if self.verbosity >= 2:
+                self.stdout.write('%s recipes imported' % count)
+
+    def import_batch(self, user, batch, offset, tags, ingredients):
+        """Save a batch of rows and their relations"""
+
+        recipes = []
+        for number, row in enumerate(batch, start=offset + 1):
+            recipes.append(self.build_recipe(user, row, number))
+
+        tags.resolve(name for row in batch for name in row.get('tags', []))
+        ingredients.resolve(
+            name for row in batch for name in row.get('ingredients', [])
+        )
+
+        recipes = bulk_create_with_ids(Recipe, recipes)
+        bulk_add_related(recipes, 'tags', [
+            [tags[name] for name in row.get('tags', [])]
+            for row in batch
+        ])
+        bulk_add_related(recipes, 'ingredients', [
+            [ingredients[name] for name in row.get('ingredients', [])]
+            for row in batch
+        ])
+
+        return recipes
+
+    def build_recipe(self, user, row, number):
+        """Return the unsaved recipe of a row, or fail with its number"""
+
+        recipe = Recipe(user=user, **{
+            name: row[name] for name in RECIPE_FIELDS
+            if row.get(name) not in (None, '')
+        })
+
+        try:
+            # converts the strings of a CSV file to the field types
+            recipe.clean_fields(exclude=('user', 'search_vector'))
+        except ValidationError as error:
+            raise CommandError('Row %s: %s' % (number, error.message_dict))
+
+        for name in ('tags', 'ingredients'):
+            if not isinstance(row.get(name, []), list):
+                raise CommandError('Row %s: %s must be a list' % (
+                    number,
+                    name
+                ))
+
+        return recipe
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import router
+
+from core.models import AuthToken
+
+
+class Command(BaseCommand):
+    """Django command to delete the expired API tokens"""
+
+    help = 'Delete the expired API tokens, a batch at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='seconds to sleep between two batches',
+        )
+
+    def handle(self, *args, **options):
+        using = router.db_for_write(AuthToken)
+        start = time.monotonic()
+
+        count = 0
+        while True:
+            # the oldest first, found through the index on expires
+            keys = list(
+                AuthToken.objects.using(using).expired().order_by(
+                    'expires'
+                ).values_list('key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+
+            # every batch is its own short DELETE, so logins and token
+            # lookups never wait long on the locked rows. The signals
+            # drop the deleted tokens from the token cache as well
+            AuthToken.objects.using(using).filter(key__in=keys).delete()
+            count += len(keys)
+
+            if options['verbosity'] >= 2:
+                self.stdout.write('%s tokens deleted' % count)
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            'Deleted {} expired tokens in {:.2f}s'.format(
+                count,
+                time.monotonic() - start
+            )
+        ))
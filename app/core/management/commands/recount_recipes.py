@@ -0,0 +1,92 @@
+import time
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import router
+
+from core.models import Tag, Ingredient
+from core.signals import bulk_changed
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the maintained recipe counts"""
+
+    help = 'Recount the recipes of the users, tags and ingredients, ' \
+           'a batch at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='seconds to sleep between two batches',
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+
+        for model in (get_user_model(), Tag, Ingredient):
+            fixed = self.recount(model, options)
+            self.stdout.write('{}: {} wrong counts fixed'.format(
+                model._meta.verbose_name_plural,
+                fixed
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Recounted the recipes in {:.2f}s'.format(
+                time.monotonic() - start
+            )
+        ))
+
+    def recount(self, model, options):
+        """Recount the rows of the model, return how many were wrong"""
+
+        using = router.db_for_write(model)
+        queryset = model.objects.using(using)
+
+        fixed = 0
+        last_pk = 0
+        while True:
+            # walking the primary key keeps every batch an index range
+            pks = list(
+                queryset.filter(pk__gt=last_pk).order_by(
+                    'pk'
+                ).values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+
+            drifted = queryset.filter(pk__in=pks).exclude(
+                recipe_count=model.count_recipes()
+            )
+            if model is not get_user_model():
+                drifted = drifted.select_related('user')
+            drifted = list(drifted)
+
+            if drifted:
+                # every batch is its own short UPDATE, only writing the
+                # rows whose count drifted, so the requests never wait
+                # long on the locked rows
+                queryset.filter(
+                    pk__in=[obj.pk for obj in drifted]
+                ).update_recipe_count()
+                fixed += len(drifted)
+                self.send_changed(model, drifted)
+
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        return fixed
+
+    def send_changed(self, model, objs):
+        """Let the receivers know about the recounted objects"""
+
+        owned = defaultdict(list)
+        for obj in objs:
+            owned[obj if model is get_user_model() else obj.user].append(obj)
+
+        # the UPDATE doesn't send any signal, this drops the cached
+        # lists of the owners, still showing the drifted counts
+        for user, instances in owned.items():
+            bulk_changed.send(sender=model, user=user, instances=instances)
@@ -1,23 +1,96 @@
+import random
 import time
 
 from django.db import connections
 from django.db.utils import OperationalError
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """Django command to pause exec until db is available"""
 
+    help = 'Wait until the databases accept queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='alias of a database to wait for, can be repeated '
+                 '(defaults to "default")',
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='seconds to wait in total before giving up',
+        )
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.1,
+            help='seconds to wait after the first failed attempt',
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='longest wait between two attempts',
+        )
+
     # handle function is the function that will be executed
     # whenever we run the management command
     def handle(self, *args, **options):
-        self.stdout.write("Waiting for db...")
-        db_conn = None
-        while not db_conn:
+        aliases = options['databases'] or ['default']
+        for alias in aliases:
+            if alias not in connections.databases:
+                raise CommandError("No database named '%s'" % alias)
+
+        start = time.monotonic()
+        deadline = start + options['timeout']
+
+        for alias in aliases:
+            self.stdout.write("Waiting for db '%s'..." % alias)
+            attempts = self.wait_for(alias, deadline, options)
+            self.stdout.write(self.style.SUCCESS(
+                "db '{}' is available after {:.2f}s ({} attempts)".format(
+                    alias,
+                    time.monotonic() - start,
+                    attempts
+                )
+            ))
+
+    def wait_for(self, alias, deadline, options):
+        """Retry connecting to the db until it works, return the attempts"""
+
+        delay = options['initial_delay']
+        attempts = 0
+        while True:
+            attempts += 1
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('db unavailable waiting 1 sec')
-                time.sleep(1)
-        self.stdout.write(self.style.SUCCESS('db is available!'))
+                self.probe(alias)
+                return attempts
+            except OperationalError as error:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        "db '%s' still unavailable: %s" % (alias, error)
+                    )
+
+                # doubling the delay keeps a db that takes a while from
+                # being hammered, the jitter keeps containers started
+                # together from retrying in lockstep
+                sleep = min(delay, options['max_delay'], remaining)
+                sleep = sleep / 2 + random.uniform(0, sleep / 2)
+                self.stdout.write(
+                    'db unavailable, waiting {:.2f}s'.format(sleep)
+                )
+                time.sleep(sleep)
+                delay *= 2
+
+    def probe(self, alias):
+        """Run a query on the db, raising OperationalError if it's down"""
+
+        # getting the connection object doesn't connect yet, opening
+        # a cursor does. The query checks the db really answers
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except OperationalError:
+            # start over with a new connection on the next attempt
+            connection.close()
+            raise
@@ -0,0 +1,178 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from core.db.stats import get_connection_stats
+
+
+# upper bounds in seconds of the request duration histogram buckets
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+
+class RequestMetrics:
+    """Query count, db time and render time of one request"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        # the concurrent prefetches record their queries from other threads
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute wrapper timing the queries of the request"""
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.queries += 1
+                self.db_time += elapsed
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self, total):
+        """Return the Server-Timing header value of the request"""
+
+        # durations are in milliseconds, the app is what's left of the
+        # total once the db and the rendering are taken out
+        return ', '.join((
+            'db;dur={:.1f};desc="{} queries"'.format(
+                self.db_time * 1000,
+                self.queries
+            ),
+            'render;dur={:.1f}'.format(self.render_time * 1000),
+            'app;dur={:.1f}'.format(
+                max(total - self.db_time - self.render_time, 0) * 1000
+            ),
+            'total;dur={:.1f}'.format(total * 1000),
+        ))
+
+
+class _ViewStats:
+    """Totals of the requests to one view with one method"""
+
+    def __init__(self):
+        self.statuses = Counter()
+        # the count of each bucket, the last one is +Inf
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+
+# counted for the whole process, like the connection stats
+_views = {}
+_lock = threading.Lock()
+
+
+def record(view, method, status, metrics, total):
+    """Add a finished request to the totals of its view"""
+
+    with _lock:
+        stats = _views.get((view, method))
+        if stats is None:
+            stats = _views[(view, method)] = _ViewStats()
+
+        stats.statuses[status] += 1
+        stats.buckets[bisect_left(DURATION_BUCKETS, total)] += 1
+        stats.duration += total
+        stats.queries += metrics.queries
+        stats.db_time += metrics.db_time
+        stats.render_time += metrics.render_time
+
+
+def reset_request_metrics():
+    """Forget the totals of every view"""
+
+    with _lock:
+        _views.clear()
+
+
+def _labels(**labels):
+    """Return the labels of a sample, escaped for the text format"""
+
+    return '{%s}' % ','.join(
+        '%s="%s"' % (
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n')
+        )
+        for name, value in labels.items()
+    )
+
+
+def render_prometheus():
+    """Return the totals in the Prometheus text exposition format"""
+
+    with _lock:
+        views = sorted(_views.items())
+        lines = []
+
+        def metric(name, kind, description):
+            lines.append('# HELP %s %s' % (name, description))
+            lines.append('# TYPE %s %s' % (name, kind))
+
+        metric('app_requests_total', 'counter', 'Requests served')
+        for (view, method), stats in views:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append('app_requests_total%s %s' % (
+                    _labels(view=view, method=method, status=status),
+                    count
+                ))
+
+        metric('app_request_duration_seconds', 'histogram',
+               'Time to build the response')
+        for (view, method), stats in views:
+            cumulative = 0
+            bounds = [str(bound) for bound in DURATION_BUCKETS] + ['+Inf']
+            for bound, count in zip(bounds, stats.buckets):
+                cumulative += count
+                lines.append('app_request_duration_seconds_bucket%s %s' % (
+                    _labels(view=view, method=method, le=bound),
+                    cumulative
+                ))
+            labels = _labels(view=view, method=method)
+            lines.append('app_request_duration_seconds_sum%s %r' % (
+                labels,
+                stats.duration
+            ))
+            lines.append('app_request_duration_seconds_count%s %s' % (
+                labels,
+                cumulative
+            ))
+
+        for name, attr, description in (
+            ('app_request_queries_total', 'queries', 'SQL queries run'),
+            ('app_request_db_seconds_total', 'db_time',
+             'Time spent running SQL queries'),
+            ('app_request_render_seconds_total', 'render_time',
+             'Time spent rendering the response body'),
+        ):
+            metric(name, 'counter', description)
+            for (view, method), stats in views:
+                lines.append('%s%s %r' % (
+                    name,
+                    _labels(view=view, method=method),
+                    getattr(stats, attr)
+                ))
+
+    connection_stats = get_connection_stats()
+    for name in ('checkouts', 'connects', 'reuses', 'failed_health_checks'):
+        metric('app_db_connection_%s_total' % name, 'counter',
+               'Db connection %s' % name.replace('_', ' '))
+        lines.append('app_db_connection_%s_total %s' % (
+            name,
+            connection_stats[name]
+        ))
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,66 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core import metrics
+
+
+class RequestMetricsMiddleware:
+    """Record the queries, db time and render time of every request
+
+    The numbers go to the Server-Timing header of the response and to
+    the per view totals served by the metrics endpoint. Keep it first
+    in MIDDLEWARE, so the total covers the other middleware too.
+    """
+
+    def __init__(self, get_response):
+        # django drops a middleware raising this, so when the metrics
+        # are turned off the requests don't go through it at all
+        if not settings.REQUEST_METRICS['ENABLED']:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.metrics = metrics.RequestMetrics()
+
+        # the concurrent prefetches copy the wrappers of the request,
+        # so their queries are counted as well
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(request.metrics)
+                )
+            response = self.get_response(request)
+
+        # a streamed body (like the recipe export) is sent after this,
+        # only the time to the first byte is counted for it
+        total = request.metrics.total_time
+        match = request.resolver_match
+        metrics.record(
+            match.view_name if match else '<unresolved>',
+            request.method,
+            response.status_code,
+            request.metrics,
+            total
+        )
+
+        if settings.REQUEST_METRICS['SERVER_TIMING']:
+            response['Server-Timing'] = request.metrics.server_timing(total)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # the DRF responses are rendered after the view returns, which
+        # is where the data gets serialized to JSON
+        start = time.perf_counter()
+
+        def rendered(response):
+            request.metrics.render_time += time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+
+        return response
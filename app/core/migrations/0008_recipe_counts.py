@@ -0,0 +1,51 @@
+# Generated by Django 2.1.15 on 2026-10-18 03:15
+
+from django.db import migrations, models
+
+
+# same counts as the count_recipes subqueries of the models
+BACKFILL_SQL = [
+    """
+    UPDATE core_tag SET recipe_count = (
+        SELECT COUNT(*) FROM core_recipe_tags
+        WHERE core_recipe_tags.tag_id = core_tag.id
+    )
+    """,
+    """
+    UPDATE core_ingredient SET recipe_count = (
+        SELECT COUNT(*) FROM core_recipe_ingredients
+        WHERE core_recipe_ingredients.ingredient_id = core_ingredient.id
+    )
+    """,
+    """
+    UPDATE core_user SET recipe_count = (
+        SELECT COUNT(*) FROM core_recipe
+        WHERE core_recipe.user_id = core_user.id
+    )
+    """,
+]
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_authtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -1,13 +1,78 @@
-from django.db import models
+import secrets
+from datetime import timedelta
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import \
+    SearchQuery, \
+    SearchRank, \
+    SearchVector, \
+    SearchVectorField
+from django.db import connections, models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import \
     AbstractBaseUser, \
     BaseUserManager, \
     PermissionsMixin
 
 from django.conf import settings
+from django.utils import timezone
+
+from core import hashers
+from core.concurrency import prefetch_related_concurrently
+
+
+def count_subquery(queryset, field_name):
+    """Subquery counting the rows of queryset pointing at the outer row"""
+
+    return Coalesce(
+        models.Subquery(
+            queryset.filter(
+                **{field_name: models.OuterRef('pk')}
+            ).order_by().values(field_name).annotate(
+                count=models.Count('*')
+            ).values('count'),
+            output_field=models.IntegerField()
+        ),
+        0
+    )
+
+
+class RecipeCountModel(models.Model):
+    """Abstract model with a maintained count of the recipes using it
+
+    The count is kept up to date by the receivers in recipe.signals
+    with F() updates, so listing it costs no query.
+    """
+
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
 
+    def save(self, *args, **kwargs):
+        # the count in memory may be stale, writing it back would undo
+        # the F() updates made since the object was loaded
+        if not self._state.adding and not kwargs.get('force_insert') and \
+                kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'recipe_count'
+            ]
 
-class UserManager(BaseUserManager):
+        super().save(*args, **kwargs)
+
+
+class RecipeCountQuerySet(models.QuerySet):
+    """Queryset helpers for the models counting their recipes"""
+
+    def update_recipe_count(self):
+        """Recount the recipes of every row with one UPDATE"""
+
+        return self.update(recipe_count=self.model.count_recipes())
+
+
+# the user queryset gets the recipe count helpers as well
+class UserManager(BaseUserManager.from_queryset(RecipeCountQuerySet)):
 
     # **extra_fields makes it easier when adding more arguments later on
     def create_user(self, email, password=None, **extra_fields):
@@ -38,7 +103,7 @@ class UserManager(BaseUserManager):
         return user
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(AbstractBaseUser, PermissionsMixin, RecipeCountModel):
     """Custom user model that supports using email instad of username"""
 
     # Defining fields of our db model below
@@ -47,15 +112,94 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # bumped by every password change, the signed tokens carry it so a
+    # new password invalidates them
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     # create a UserManager Object
     objects = UserManager()
 
+    # the hashing runs in a bounded thread pool, so a burst of logins
+    # or sign ups can't take all the CPU of the workers
+    def set_password(self, raw_password):
+        self.password = hashers.make_password(raw_password)
+        self._password = raw_password
+        self.token_version += 1
+
+    def check_password(self, raw_password):
+        """Return whether the password is right, rehashing it if needed"""
+
+        def setter(raw_password):
+            # a new hash of the same password isn't a password change,
+            # so it keeps the token version and the signed tokens
+            self.password = hashers.make_password(raw_password)
+            self.save(update_fields=['password'])
+
+        return hashers.check_password(raw_password, self.password, setter)
+
+    @staticmethod
+    def count_recipes():
+        """Subquery counting the recipes of the user"""
+        return count_subquery(Recipe.objects.all(), 'user')
+
     # override default username to use email
     USERNAME_FIELD = 'email'
 
 
-class Tag(models.Model):
+class AuthTokenQuerySet(models.QuerySet):
+    """Queryset helpers for issuing and purging API tokens"""
+
+    def issue(self, user):
+        """Create and return a new token of the user"""
+
+        return self.create(
+            user=user,
+            key=secrets.token_hex(20),
+            expires=timezone.now() + timedelta(
+                seconds=settings.AUTH_TOKEN['TTL']
+            ),
+        )
+
+    def expired(self):
+        """Keep the tokens past their expiry date"""
+
+        return self.filter(expires__lte=timezone.now())
+
+
+class AuthToken(models.Model):
+    """API token of a user, valid until it expires"""
+
+    key = models.CharField(max_length=40, primary_key=True)
+    # a user gets a token per login, so every device has its own
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='auth_tokens',
+    )
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    # the purge command finds the expired tokens through this index
+    expires = models.DateTimeField(db_index=True)
+
+    objects = AuthTokenQuerySet.as_manager()
+
+    @property
+    def is_expired(self):
+        return self.expires <= timezone.now()
+
+    def rotate(self):
+        """Replace the token with a new one, returning the new token"""
+
+        with transaction.atomic():
+            token = AuthToken.objects.issue(self.user)
+            self.delete()
+
+        return token
+
+    def __str__(self):
+        return self.key
+
+
+class Tag(RecipeCountModel):
     """Tag to be used for a recipe"""
 
     name = models.CharField(max_length=255)
@@ -64,11 +208,28 @@ class Tag(models.Model):
         on_delete=models.CASCADE,   # delete tag when owner is deleted
     )
 
+    objects = RecipeCountQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # the tag list filters by user and sorts by name, matching
+            # the ordering of the index lets the db skip the sort
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_tag_user_name_idx',
+            ),
+        ]
+
+    @staticmethod
+    def count_recipes():
+        """Subquery counting the recipes using the tag"""
+        return count_subquery(Recipe.tags.through.objects.all(), 'tag')
+
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(RecipeCountModel):
     """Ingredient to be used on a recipe"""
 
     name = models.CharField(max_length=255)
@@ -77,10 +238,175 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = RecipeCountQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_ingredient_user_name_idx',
+            ),
+        ]
+
+    @staticmethod
+    def count_recipes():
+        """Subquery counting the recipes using the ingredient"""
+        return count_subquery(
+            Recipe.ingredients.through.objects.all(),
+            'ingredient'
+        )
+
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Queryset helpers for loading recipes with their related objects"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._concurrent_prefetch = False
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._concurrent_prefetch = self._concurrent_prefetch
+        return clone
+
+    def _prefetch_related_objects(self):
+        if not self._concurrent_prefetch:
+            return super()._prefetch_related_objects()
+
+        prefetch_related_concurrently(
+            self._result_cache,
+            *self._prefetch_related_lookups
+        )
+        self._prefetch_done = True
+
+    def prefetch_concurrently(self):
+        """Run the queries of the different prefetches at the same time"""
+
+        clone = self._chain()
+        clone._concurrent_prefetch = True
+        return clone
+
+    def with_related_ids(self, *field_names):
+        """Prefetch only the ids of the recipe ingredients and tags
+
+        field_names limits it to some of the relations, all of them by
+        default.
+        """
+
+        # the list serializer only renders primary keys, so there is
+        # no point loading the name column of every related row
+        return self._prefetch_relations(field_names, {
+            'ingredients': Ingredient.objects.only('id'),
+            'tags': Tag.objects.only('id'),
+        })
+
+    def linked_to(self, field_name, ids, match_all=False):
+        """Keep the recipes linked to any (or all) of the related ids
+
+        Filtering through a subquery on the through table rather than
+        joining the relation, so recipes matching several ids don't
+        come back duplicated.
+        """
+
+        field = self.model._meta.get_field(field_name)
+        through = field.remote_field.through
+        # e.g. recipe and tag for the Recipe.tags through table
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+
+        links = through.objects.filter(**{'%s__in' % target: ids})
+        if match_all:
+            # the recipes linked to as many of the ids as were asked for
+            links = links.values(source).annotate(
+                matched=models.Count(target)
+            ).filter(matched=len(set(ids)))
+
+        return self.filter(pk__in=links.values(source))
+
+    def search(self, text):
+        """Return the recipes matching the text, best matches first"""
+
+        if connections[self.db].vendor == 'postgresql':
+            query = SearchQuery(text, config='english')
+            # the GIN index on search_vector serves the @@ match
+            return self.filter(search_vector=query).annotate(
+                rank=SearchRank(models.F('search_vector'), query)
+            ).order_by('-rank', '-id')
+
+        # other backends (like the SQLite test db) have no full text
+        # search, fall back to a plain substring match
+        tags = Recipe.tags.through.objects.filter(tag__name__icontains=text)
+        ingredients = Recipe.ingredients.through.objects.filter(
+            ingredient__name__icontains=text
+        )
+
+        return self.filter(
+            models.Q(title__icontains=text) |
+            models.Q(pk__in=tags.values('recipe')) |
+            models.Q(pk__in=ingredients.values('recipe'))
+        ).order_by('-id')
+
+    def update_search_vector(self):
+        """Rebuild the search vector of the recipes with one UPDATE"""
+
+        if connections[self.db].vendor != 'postgresql':
+            return
+
+        # the title weighs the most, then the ingredients, then the tags
+        self.update(search_vector=(
+            SearchVector('title', weight='A', config='english') +
+            SearchVector(
+                self._related_names(Ingredient),
+                weight='B',
+                config='english'
+            ) +
+            SearchVector(
+                self._related_names(Tag),
+                weight='C',
+                config='english'
+            )
+        ))
+
+    def _related_names(self, model):
+        """Subquery joining the names of the recipe tags or ingredients"""
+
+        # imported here, it needs psycopg2 which only postgres requires
+        from django.contrib.postgres.aggregates import StringAgg
+
+        return models.Subquery(
+            model.objects.filter(
+                recipe=models.OuterRef('pk')
+            ).values('recipe').annotate(
+                names=StringAgg('name', ' ')
+            ).values('names'),
+            output_field=models.TextField()
+        )
+
+    def with_related_objects(self, *field_names):
+        """Prefetch the full ingredient and tag objects of the recipes
+
+        field_names limits it to some of the relations, all of them by
+        default.
+        """
+
+        return self._prefetch_relations(field_names, {
+            'ingredients': Ingredient.objects.all(),
+            'tags': Tag.objects.all(),
+        })
+
+    def _prefetch_relations(self, field_names, querysets):
+        """Prefetch the named relations with their queryset, by id"""
+
+        return self.prefetch_related(*[
+            models.Prefetch(name, queryset=queryset.order_by('id'))
+            for name, queryset in querysets.items()
+            if not field_names or name in field_names
+        ])
+
+
 class Recipe(models.Model):
     """Food Recipe Object"""
 
@@ -97,6 +423,24 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField(
         "Ingredient")  # name of class in string
     tags = models.ManyToManyField('Tag')
+    # title, ingredient and tag names for the full text search,
+    # kept up to date by the receivers in recipe.signals
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # recipes are listed per user, newest first
+            models.Index(
+                fields=['user', 'id'],
+                name='core_recipe_user_id_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='core_recipe_search_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
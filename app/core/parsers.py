@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.utils.translation import gettext as _
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from core.renderers import cbor2, msgpack, orjson
+
+
+class FastJSONParser(JSONParser):
+    """JSON parser decoding with orjson when it's installed"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the JSON request body"""
+
+        encoding = (parser_context or {}).get(
+            'encoding',
+            settings.DEFAULT_CHARSET
+        )
+        # orjson only reads utf-8
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(_('JSON parse error - %s') % exc)
+
+
+class MessagePackParser(BaseParser):
+    """Parser for application/msgpack request bodies"""
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the MessagePack request body"""
+
+        try:
+            # only string keys in maps, like a JSON object
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError(_('MessagePack parse error - %s') % exc)
+
+
+class CBORParser(BaseParser):
+    """Parser for application/cbor request bodies"""
+
+    media_type = 'application/cbor'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the CBOR request body"""
+
+        try:
+            return cbor2.loads(stream.read())
+        except cbor2.CBORDecodeError as exc:
+            raise ParseError(_('CBOR parse error - %s') % exc)
@@ -0,0 +1,121 @@
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# orjson is optional, without it we stick to the stdlib json module
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# so are the binary formats, the settings only offer the ones installed
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+
+# anything orjson can't encode natively (Decimal, lazy translation
+# strings, ...) is converted exactly like the default DRF encoder does.
+# Datetimes go the same way, DRF writes UTC as "Z" and orjson doesn't
+_encoder = JSONEncoder()
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+
+def dumps(data):
+    """Encode the data to compact JSON bytes, like the DRF renderer"""
+
+    if orjson is None:
+        return JSONRenderer().render(data)
+
+    try:
+        ret = orjson.dumps(data, default=_encoder.default,
+                           option=ORJSON_OPTIONS)
+    except TypeError:
+        # e.g. dicts with non string keys, which the stdlib handles
+        return JSONRenderer().render(data)
+
+    # DRF escapes these two so the JSON is valid javascript as well
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+        ret = ret.replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer encoding with orjson when it's installed"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data into JSON bytes"""
+
+        if data is None:
+            return bytes()
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+
+        # orjson only writes compact, utf-8 JSON. Indented output (e.g.
+        # for the browsable API) is left to the stdlib
+        if orjson is None or indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return dumps(data)
+
+
+def msgpack_dumps(data):
+    """Encode the data to MessagePack bytes"""
+
+    # the same conversions as the JSON, so both formats hold the same data
+    return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+def cbor_dumps(data):
+    """Encode the data to CBOR bytes"""
+
+    # CBOR has types of its own for datetimes and decimals, only what
+    # it can't encode at all is converted like the JSON. The serializers
+    # render those fields as strings anyway
+    return cbor2.dumps(
+        data,
+        default=lambda encoder, value: encoder.encode(
+            _encoder.default(value)
+        )
+    )
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer for clients asking for application/msgpack"""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data into MessagePack bytes"""
+
+        if data is None:
+            return bytes()
+
+        return msgpack_dumps(data)
+
+
+class CBORRenderer(BaseRenderer):
+    """Renderer for clients asking for application/cbor"""
+
+    media_type = 'application/cbor'
+    format = 'cbor'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data into CBOR bytes"""
+
+        if data is None:
+            return bytes()
+
+        return cbor_dumps(data)
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+
+# sent after objects were written with bulk queries, which skip the
+# usual post_save and m2m_changed signals. sender is the model class,
+# user the owner of the objects and instances the saved objects
+bulk_changed = Signal(providing_args=['user', 'instances'])
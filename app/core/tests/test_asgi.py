@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.test import SimpleTestCase
+
+from app.asgi import ThreadPoolWsgiToAsgi, application
+
+
+SCOPE = {
+    'type': 'http',
+    'http_version': '1.1',
+    'method': 'GET',
+    'query_string': b'',
+    'headers': [(b'host', b'testserver')],
+}
+
+
+async def request(app, path):
+    """Send a GET request, return the response start message"""
+
+    communicator = ApplicationCommunicator(app, dict(SCOPE, path=path))
+    await communicator.send_input({'type': 'http.request'})
+
+    start = await communicator.receive_output(timeout=5)
+    # the body has to be read too, until then the thread running
+    # the django app is blocked sending it and never finishes
+    body = await communicator.receive_output(timeout=5)
+    while body.get('more_body'):
+        body = await communicator.receive_output(timeout=5)
+    await communicator.wait(timeout=5)
+
+    return start
+
+
+class AsgiTests(SimpleTestCase):
+    """Test serving the app through the ASGI entry point"""
+
+    def test_unauthenticated_request(self):
+        """Test a request is answered by the django app"""
+
+        start = async_to_sync(request)(application, '/api/recipe/recipes/')
+
+        self.assertEqual(start['type'], 'http.response.start')
+        self.assertEqual(start['status'], 401)
+
+    def test_concurrent_requests(self):
+        """Test slow requests run at the same time, in their own thread"""
+
+        threads = set()
+
+        def slow_app(environ, start_response):
+            threads.add(threading.get_ident())
+            time.sleep(0.5)
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'done']
+
+        app = ThreadPoolWsgiToAsgi(slow_app)
+
+        async def both():
+            return await asyncio.gather(
+                request(app, '/one/'),
+                request(app, '/two/'),
+            )
+
+        start = time.monotonic()
+        responses = async_to_sync(both)()
+        elapsed = time.monotonic() - start
+
+        self.assertEqual([res['status'] for res in responses], [200, 200])
+        self.assertEqual(len(threads), 2)
+        self.assertLess(elapsed, 0.9)
@@ -1,8 +1,19 @@
-from unittest.mock import patch
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import MagicMock, patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
+from django.utils import timezone
+
+from core.models import AuthToken, Tag, Ingredient, Recipe
 
 
 class CommandTests(TestCase):
@@ -10,13 +21,15 @@ class CommandTests(TestCase):
     def test_wait_for_db_ready(self):
         """Test waiting for db when db is available"""
 
-        # use patch to mock the connection handler to just return True
-        # everytime its called
+        # use patch to mock the connection handler, so the test
+        # controls what opening a cursor does
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
             # call our management command
-            call_command('wait_for_db')
+            call_command('wait_for_db', stdout=StringIO())
             self.assertEqual(gi.call_count, 1)
+            # the connection was really used, not only looked up
+            gi.return_value.cursor.return_value.__enter__.return_value \
+                .execute.assert_called_once_with('SELECT 1')
 
     # we're mocking the time.sleep to just return True.
     # and pass that mock function into test_wait_function_for_db
@@ -26,8 +39,213 @@ class CommandTests(TestCase):
         """Test waiting for db"""
 
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            # mock OperationalError for 5 times, and the 6th time
-            # it will return true
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+            # fail to connect 5 times, and the 6th time it works
+            gi.return_value.cursor.side_effect = \
+                [OperationalError] * 5 + [MagicMock()]
+            out = StringIO()
+            call_command('wait_for_db', stdout=out)
+            self.assertEqual(gi.return_value.cursor.call_count, 6)
+            self.assertIn('(6 attempts)', out.getvalue())
+
+        # the delays double, give or take the jitter
+        delays = [call[0][0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        for attempt, delay in enumerate(delays):
+            self.assertGreaterEqual(delay, 0.1 * 2 ** attempt / 2)
+            self.assertLessEqual(delay, 0.1 * 2 ** attempt)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_max_delay(self, ts):
+        """Test that the delay between attempts is capped"""
+
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            gi.return_value.cursor.side_effect = \
+                [OperationalError] * 10 + [MagicMock()]
+            call_command('wait_for_db', max_delay=1, stdout=StringIO())
+
+        self.assertLessEqual(max(c[0][0] for c in ts.call_args_list), 1)
+
+    def test_wait_for_db_timeout(self):
+        """Test giving up once the timeout is over"""
+
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            gi.return_value.cursor.side_effect = OperationalError
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+
+    def test_wait_for_db_aliases(self):
+        """Test waiting for each of the given databases"""
+
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            call_command('wait_for_db', databases=['default', 'default'],
+                         stdout=StringIO())
+
+        self.assertEqual(gi.call_count, 2)
+
+    def test_wait_for_db_unknown_alias(self):
+        """Test that an unknown alias is rejected"""
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', databases=['nope'])
+
+
+class ImportRecipesTests(TestCase):
+    """Test importing recipes from a file"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+
+    def import_file(self, content, suffix, **options):
+        """Write the content to a temporary file and import it"""
+
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w') as f:
+            f.write(content)
+
+        out = StringIO()
+        call_command('import_recipes', path, user=self.user.email,
+                     stdout=out, **options)
+
+        return out.getvalue()
+
+    def test_import_csv(self):
+        """Test importing recipes with their tags and ingredients"""
+
+        out = self.import_file(
+            'title,time_minutes,price,link,tags,ingredients\n'
+            'Curry,30,7.50,,Spicy;Vegan,Rice\n'
+            'Salad,5,3.00,https://example.com,Vegan,\n',
+            '.csv'
+        )
+
+        self.assertIn('Imported 2 recipes', out)
+        self.assertIn('rows/sec', out)
+        curry = Recipe.objects.get(title='Curry')
+        self.assertEqual(curry.user, self.user)
+        self.assertEqual(curry.price, Decimal('7.50'))
+        self.assertEqual(
+            sorted(curry.tags.values_list('name', flat=True)),
+            ['Spicy', 'Vegan']
+        )
+        self.assertEqual(
+            list(curry.ingredients.values_list('name', flat=True)),
+            ['Rice']
+        )
+        salad = Recipe.objects.get(title='Salad')
+        self.assertEqual(salad.ingredients.count(), 0)
+        # the Vegan tag was only created once
+        self.assertEqual(Tag.objects.filter(name='Vegan').count(), 1)
+
+    def test_import_ndjson_in_batches(self):
+        """Test importing more rows than fit in a batch"""
+
+        rows = [
+            {'title': 'Recipe %d' % index, 'time_minutes': 10,
+             'price': '5.00', 'ingredients': ['Salt', 'Pepper']}
+            for index in range(5)
+        ]
+
+        self.import_file(
+            '\n'.join(json.dumps(row) for row in rows),
+            '.ndjson',
+            batch_size=2
+        )
+
+        self.assertEqual(Recipe.objects.count(), 5)
+        self.assertEqual(Ingredient.objects.count(), 2)
+        for recipe in Recipe.objects.all():
+            self.assertEqual(recipe.ingredients.count(), 2)
+
+    def test_import_reuses_existing_names(self):
+        """Test that the user's existing tags are used"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        other_user = get_user_model().objects.create_user(
+            email="user2@testuser.com",
+            password="testpassword"
+        )
+        Tag.objects.create(user=other_user, name='Spicy')
+
+        self.import_file(
+            '{"title": "Curry", "time_minutes": 30, "price": "7.50",'
+            ' "tags": ["Vegan", "Spicy"]}\n',
+            '.ndjson'
+        )
+
+        recipe = Recipe.objects.get()
+        self.assertIn(tag, recipe.tags.all())
+        self.assertEqual(
+            recipe.tags.get(name='Spicy').user,
+            self.user
+        )
+
+    def test_import_invalid_row(self):
+        """Test that a bad row is reported with its number"""
+
+        with self.assertRaisesMessage(CommandError, 'Row 2'):
+            self.import_file(
+                'title,time_minutes,price\n'
+                'Curry,30,7.50\n'
+                'Salad,soon,3.00\n',
+                '.csv'
+            )
+
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_import_invalid_json(self):
+        """Test that a line that isn't JSON is reported with its number"""
+
+        with self.assertRaisesMessage(CommandError, 'Row 2: invalid JSON'):
+            self.import_file(
+                '{"title": "Curry", "time_minutes": 30, "price": "7.50"}\n'
+                '\n'
+                '{"title": "Salad",\n',
+                '.ndjson'
+            )
+
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_import_json_not_object(self):
+        """Test that a JSON value other than an object is reported"""
+
+        with self.assertRaisesMessage(
+            CommandError,
+            'Row 1: must be a JSON object'
+        ):
+            self.import_file('[]\n', '.ndjson')
+
+    def test_import_unknown_user(self):
+        """Test importing for a user that doesn't exist"""
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', 'recipes.csv',
+                         user='nobody@testuser.com')
+
+
+class PurgeTokensTests(TestCase):
+    """Test deleting the expired API tokens"""
+
+    def test_purge_expired_tokens(self):
+        """Test that only the expired tokens are deleted, in batches"""
+
+        user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+        valid = AuthToken.objects.issue(user)
+        for _ in range(3):
+            AuthToken.objects.issue(user)
+        AuthToken.objects.exclude(pk=valid.pk).update(
+            expires=timezone.now() - timedelta(days=1)
+        )
+        out = StringIO()
+
+        call_command('purge_tokens', batch_size=2, verbosity=2, stdout=out)
+
+        self.assertEqual(list(AuthToken.objects.all()), [valid])
+        self.assertIn('2 tokens deleted', out.getvalue())
+        self.assertIn('Deleted 3 expired tokens', out.getvalue())
@@ -0,0 +1,95 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+from django.test import TransactionTestCase, override_settings
+
+from core.concurrency import run_concurrently
+from core.models import Tag, Ingredient, Recipe
+
+
+def current_thread():
+    """Return the name of the thread running this"""
+
+    return threading.current_thread().name
+
+
+# outside a transaction, the pool threads use their own connections
+class ConcurrentQueryTests(TransactionTestCase):
+    """Test running independent queries at the same time"""
+
+    def setUp(self):
+        # so the pool threads don't keep the test db open
+        patcher = patch.dict(
+            connections.databases['default'],
+            {'CONN_MAX_AGE': 0}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_run_concurrently(self):
+        """Test the functions run in several threads, results in order"""
+
+        results = run_concurrently(lambda: 1, lambda: 2, current_thread)
+
+        self.assertEqual(results[:2], [1, 2])
+        self.assertNotEqual(results[2], current_thread())
+
+    @override_settings(CONCURRENT_QUERY_THREADS=0)
+    def test_run_concurrently_disabled(self):
+        """Test that no thread is used when it's turned off"""
+
+        results = run_concurrently(current_thread, current_thread)
+
+        self.assertEqual(results, [current_thread()] * 2)
+
+    def test_run_concurrently_in_transaction(self):
+        """Test that no thread is used inside a transaction"""
+
+        with transaction.atomic():
+            results = run_concurrently(current_thread, current_thread)
+
+        self.assertEqual(results, [current_thread()] * 2)
+
+    def test_prefetch_concurrently(self):
+        """Test prefetching the tags and ingredients at the same time"""
+
+        user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+        recipe = Recipe.objects.create(
+            user=user,
+            title="Sample recipe",
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(Tag.objects.create(user=user, name="Vegan"))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=user, name="Salt")
+        )
+
+        queries = []
+
+        # execute wrappers of this thread also see the pool's queries
+        def record(execute, sql, params, many, context):
+            queries.append(current_thread())
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            recipes = list(
+                Recipe.objects.with_related_objects().prefetch_concurrently()
+            )
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len(set(queries)), 2)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [tag.name for tag in recipes[0].tags.all()],
+                ['Vegan']
+            )
+            self.assertEqual(
+                [item.name for item in recipes[0].ingredients.all()],
+                ['Salt']
+            )
@@ -0,0 +1,72 @@
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection, connections
+from django.test import TransactionTestCase
+
+from core.db.postgresql.base import DatabaseWrapper
+from core.db.stats import get_connection_stats, reset_connection_stats
+
+
+def run_request():
+    """Use the db like a request does, between its start and finish"""
+
+    connection.close_if_unusable_or_obsolete()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    connection.close_if_unusable_or_obsolete()
+
+
+# outside a transaction, so the connection can be closed and reopened
+@skipUnless(
+    isinstance(connections['default'], DatabaseWrapper),
+    'needs the postgresql backend of core'
+)
+class PersistentConnectionTests(TransactionTestCase):
+    """Test reusing and health checking the db connections"""
+
+    def setUp(self):
+        connection.close()
+        reset_connection_stats()
+
+    def tearDown(self):
+        connection.close()
+
+    def test_connection_reused(self):
+        """Test that the requests share a connection"""
+
+        with patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 60}):
+            for _ in range(4):
+                run_request()
+
+        stats = get_connection_stats()
+        self.assertEqual(stats['checkouts'], 4)
+        self.assertEqual(stats['connects'], 1)
+        self.assertEqual(stats['reuse_ratio'], 0.75)
+
+    def test_connection_closed_without_max_age(self):
+        """Test that a max age of 0 opens a connection per request"""
+
+        with patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0}):
+            for _ in range(4):
+                run_request()
+
+        stats = get_connection_stats()
+        self.assertEqual(stats['connects'], 4)
+        self.assertEqual(stats['reuse_ratio'], 0)
+
+    def test_dead_connection_replaced(self):
+        """Test that a connection dropped between requests is replaced"""
+
+        with patch.dict(connection.settings_dict, {
+            'CONN_MAX_AGE': 60,
+            'CONN_HEALTH_CHECKS': True,
+        }):
+            run_request()
+            # like the db server going away between two requests
+            connection.connection.close()
+            run_request()
+
+        stats = get_connection_stats()
+        self.assertEqual(stats['failed_health_checks'], 1)
+        self.assertEqual(stats['connects'], 2)
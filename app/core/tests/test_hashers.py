@@ -0,0 +1,99 @@
+import threading
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.test import TestCase, override_settings
+
+from core.hashers import run_hashing
+
+
+def hashing(**costs):
+    """Return the PASSWORD_HASHING setting with the given costs"""
+
+    return dict(settings.PASSWORD_HASHING, **costs)
+
+
+# a small cost keeps the tests fast
+@override_settings(PASSWORD_HASHING=hashing(PBKDF2_ITERATIONS=1000))
+class PasswordHashingTests(TestCase):
+    """Test the tuned and pooled password hashing"""
+
+    def create_user(self):
+        """Create and return a sample user"""
+
+        return get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+
+    def login(self, password="testpassword"):
+        """Authenticate, return the user fetched again from the db"""
+
+        user = authenticate(username="test@testuser.com", password=password)
+        self.assertIsNotNone(user)
+
+        return get_user_model().objects.get(pk=user.pk)
+
+    def test_iterations_from_settings(self):
+        """Test that new hashes use the configured iterations"""
+
+        user = self.create_user()
+
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_rehash_on_new_iterations(self):
+        """Test that a login updates a hash with other iterations"""
+
+        self.create_user()
+
+        with self.settings(PASSWORD_HASHING=hashing(PBKDF2_ITERATIONS=2000)):
+            user = self.login()
+
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_rehash_on_new_hasher(self):
+        """Test that a login moves a hash to the preferred hasher"""
+
+        sha1 = 'django.contrib.auth.hashers.SHA1PasswordHasher'
+        with self.settings(PASSWORD_HASHERS=[sha1]):
+            self.create_user()
+
+        # the old hasher is still listed, to check the old hashes
+        with self.settings(PASSWORD_HASHERS=settings.PASSWORD_HASHERS + [
+            sha1
+        ]):
+            user = self.login()
+
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+    def test_wrong_password(self):
+        """Test that a wrong password doesn't authenticate or rehash"""
+
+        password = self.create_user().password
+
+        with self.settings(PASSWORD_HASHING=hashing(PBKDF2_ITERATIONS=2000)):
+            user = authenticate(
+                username="test@testuser.com",
+                password="wrongpassword"
+            )
+
+        self.assertIsNone(user)
+        self.assertEqual(
+            get_user_model().objects.get().password,
+            password
+        )
+
+    def test_hashing_in_pool(self):
+        """Test that the hashing runs in its own threads"""
+
+        name = run_hashing(lambda: threading.current_thread().name)
+
+        self.assertTrue(name.startswith('password-hashing'))
+
+    @override_settings(PASSWORD_HASHING=hashing(THREADS=0))
+    def test_hashing_pool_disabled(self):
+        """Test that THREADS=0 hashes in the calling thread"""
+
+        name = run_hashing(lambda: threading.current_thread().name)
+
+        self.assertEqual(name, threading.current_thread().name)
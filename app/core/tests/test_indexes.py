@@ -0,0 +1,89 @@
+from unittest import skipUnless
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from core.bulk import bulk_create_with_ids
+from core.models import Tag, Ingredient, Recipe
+
+
+ROW_USERS = 20
+ROWS_PER_USER = 500
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans need postgres')
+class ListingIndexTests(TestCase):
+    """Test that the list queries are planned on the composite indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = bulk_create_with_ids(get_user_model(), (
+            get_user_model()(email="test%d@testuser.com" % index)
+            for index in range(ROW_USERS)
+        ))
+        cls.user = users[0]
+
+        # the plans depend on the statistics of the tables, which would
+        # be whatever the earlier tests left. Every user gets enough
+        # rows to be a small part of each table, then the statistics
+        # are taken on them. They are inserted mixed, like the rows
+        # of real users
+        for model in (Tag, Ingredient):
+            model.objects.bulk_create(
+                model(user=user, name='%s %d' % (user.pk, index))
+                for index in range(ROWS_PER_USER) for user in users
+            )
+        Recipe.objects.bulk_create(
+            Recipe(user=user, title=str(index), time_minutes=10, price=5)
+            for index in range(ROWS_PER_USER) for user in users
+        )
+        with connection.cursor() as cursor:
+            for model in (Tag, Ingredient, Recipe):
+                cursor.execute('ANALYZE %s' % model._meta.db_table)
+
+    def setUp(self):
+        # a sequential (or bitmap) scan followed by a sort can still win
+        # on the small test tables. Turning those off shows which index
+        # the planner would use on a table with real data
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            cursor.execute('SET enable_bitmapscan = off')
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('RESET enable_seqscan')
+            cursor.execute('RESET enable_bitmapscan')
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Assert a page of the queryset is read from the index, unsorted"""
+
+        # sliced like the paginated list endpoints
+        plan = queryset[:100].explain()
+
+        self.assertIn(index_name, plan)
+        # the index already returns the rows in the requested order
+        self.assertNotIn('Sort', plan)
+
+    def test_tag_list_uses_index(self):
+        """Test listing tags uses the (user, name) index"""
+
+        queryset = Tag.objects.filter(user=self.user).order_by('-name', 'id')
+
+        self.assertUsesIndex(queryset, 'core_tag_user_name_idx')
+
+    def test_ingredient_list_uses_index(self):
+        """Test listing ingredients uses the (user, name) index"""
+
+        queryset = Ingredient.objects.filter(
+            user=self.user
+        ).order_by('-name', 'id')
+
+        self.assertUsesIndex(queryset, 'core_ingredient_user_name_idx')
+
+    def test_recipe_list_uses_index(self):
+        """Test listing recipes uses the (user, id) index"""
+
+        queryset = Recipe.objects.filter(user=self.user).order_by('-id')
+
+        self.assertUsesIndex(queryset, 'core_recipe_user_id_idx')
@@ -0,0 +1,131 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import reset_request_metrics
+from core.models import Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+@override_settings(REQUEST_METRICS={
+    'ENABLED': True, 'SERVER_TIMING': True, 'ALLOWED_IPS': ['127.0.0.1'],
+})
+class RequestMetricsTests(TestCase):
+    """Test recording the queries and timings of the requests"""
+
+    def setUp(self):
+        reset_request_metrics()
+
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+        Recipe.objects.create(
+            user=self.user,
+            title="Sample recipe",
+            time_minutes=10,
+            price=5.00
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        """Test that the header has the queries and the timings"""
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(RECIPES_URL)
+
+        timing = res['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertIn('total;dur=', timing)
+        self.assertIn(
+            'desc="%s queries"' % len(context.captured_queries),
+            timing
+        )
+
+    def test_metrics_summed_per_view(self):
+        """Test that the metrics endpoint serves the totals per view"""
+
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        self.assertIn(
+            'app_requests_total{view="recipe:recipe-list",method="GET",'
+            'status="200"} 2',
+            body
+        )
+        self.assertIn(
+            'app_request_duration_seconds_count{view="recipe:recipe-list",'
+            'method="GET"} 2',
+            body
+        )
+        self.assertRegex(
+            body,
+            re.compile(r'^app_db_connection_checkouts_total \d+$', re.M)
+        )
+
+    @override_settings(REQUEST_METRICS={
+        'ENABLED': True, 'SERVER_TIMING': False,
+        'ALLOWED_IPS': ['127.0.0.1'],
+    })
+    def test_server_timing_off(self):
+        """Test that the header can be left out, still counting"""
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertIn(
+            'view="recipe:recipe-list"',
+            self.client.get(METRICS_URL).content.decode()
+        )
+
+    @override_settings(REQUEST_METRICS={
+        'ENABLED': False, 'SERVER_TIMING': True,
+        'ALLOWED_IPS': ['127.0.0.1'],
+    })
+    def test_metrics_disabled(self):
+        """Test that nothing is recorded or served when turned off"""
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+    def test_metrics_other_address(self):
+        """Test that the metrics are hidden from other addresses"""
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.5')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(REQUEST_METRICS={
+        'ENABLED': True, 'SERVER_TIMING': True,
+        'ALLOWED_IPS': ['10.0.0.0/8'],
+    })
+    def test_metrics_allowed_network(self):
+        """Test that the metrics are served to an allowed network"""
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='10.1.2.3')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,144 @@
+import datetime
+from decimal import Decimal
+from io import BytesIO
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import CBORParser, FastJSONParser, MessagePackParser
+from core.renderers import \
+    CBORRenderer, \
+    FastJSONRenderer, \
+    MessagePackRenderer, \
+    cbor2, \
+    msgpack
+
+
+class FastJSONTests(SimpleTestCase):
+    """Test the orjson based renderer and parser"""
+
+    def test_render_same_as_drf(self):
+        """Test the output is byte for byte the same as DRF's"""
+
+        data = {
+            'price': Decimal('5.50'),
+            'title': _('Sample recipe'),
+            'created': datetime.datetime(2019, 4, 19, 12, 14,
+                                         tzinfo=timezone.utc),
+            'link': 'line\u2028separator\u2029',
+            'tags': [1, 2, 3],
+            'name': 'caf\xe9',
+        }
+
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+    def test_render_indented(self):
+        """Test that an indent request is still honoured"""
+
+        rendered = FastJSONRenderer().render(
+            {'id': 1},
+            'application/json; indent=4'
+        )
+
+        self.assertEqual(rendered, b'{\n    "id": 1\n}')
+
+    def test_render_none(self):
+        """Test that no data renders an empty body"""
+
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_parse(self):
+        """Test parsing a JSON body"""
+
+        stream = BytesIO('{"name": "caf\xe9", "tags": [1]}'.encode())
+
+        data = FastJSONParser().parse(stream)
+
+        self.assertEqual(data, {'name': 'caf\xe9', 'tags': [1]})
+
+    def test_parse_invalid(self):
+        """Test that invalid JSON raises a parse error"""
+
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"name": '))
+
+
+@skipUnless(msgpack, 'msgpack is not installed')
+class MessagePackTests(SimpleTestCase):
+    """Test the MessagePack renderer and parser"""
+
+    def test_render_parse(self):
+        """Test the data goes through both ways like the JSON does"""
+
+        data = {
+            'price': Decimal('5.50'),
+            'title': _('Sample recipe'),
+            'tags': [1, 2, 3],
+            'name': 'caf\xe9',
+        }
+
+        rendered = MessagePackRenderer().render(data)
+        parsed = MessagePackParser().parse(BytesIO(rendered))
+
+        self.assertEqual(
+            parsed,
+            FastJSONParser().parse(BytesIO(FastJSONRenderer().render(data)))
+        )
+        self.assertLess(len(rendered), len(FastJSONRenderer().render(data)))
+
+    def test_render_none(self):
+        """Test that no data renders an empty body"""
+
+        self.assertEqual(MessagePackRenderer().render(None), b'')
+
+    def test_parse_invalid(self):
+        """Test that invalid MessagePack raises a parse error"""
+
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(BytesIO(b'\xc1'))
+
+
+@skipUnless(cbor2, 'cbor2 is not installed')
+class CBORTests(SimpleTestCase):
+    """Test the CBOR renderer and parser"""
+
+    def test_render_parse(self):
+        """Test the data goes through both ways like the JSON does"""
+
+        data = {
+            'title': _('Sample recipe'),
+            'price': '5.50',
+            'tags': [1, 2, 3],
+        }
+
+        parsed = CBORParser().parse(BytesIO(CBORRenderer().render(data)))
+
+        self.assertEqual(
+            parsed,
+            FastJSONParser().parse(BytesIO(FastJSONRenderer().render(data)))
+        )
+
+    def test_render_native_types(self):
+        """Test datetimes keep their CBOR type rather than a string"""
+
+        created = datetime.datetime(2019, 4, 19, 12, 14, tzinfo=timezone.utc)
+
+        rendered = CBORRenderer().render({'created': created})
+
+        self.assertEqual(CBORParser().parse(BytesIO(rendered)), {
+            'created': created,
+        })
+
+    def test_parse_invalid(self):
+        """Test that invalid CBOR raises a parse error"""
+
+        with self.assertRaises(ParseError):
+            CBORParser().parse(BytesIO(b'\x1c'))
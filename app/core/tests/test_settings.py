@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core.renderers import cbor2, msgpack
+
+
+LIST_TIMEOUT = "API_LIST_CACHE['TIMEOUT']"
+TOKEN_TTL = "TOKEN_AUTH_CACHE['TTL']"
+
+
+def load_prod_settings(expression, **environ):
+    """Import the production settings in a new interpreter
+
+    Returns the process, which printed the expression evaluated in the
+    settings module.
+    """
+
+    env = dict(os.environ, DJANGO_SECRET_KEY='test')
+    # the defaults are tested, whatever the environment running them
+    env.pop('API_LIST_CACHE_TIMEOUT', None)
+    env.pop('CACHE_BACKEND', None)
+    env.pop('TOKEN_AUTH_CACHE_TTL', None)
+    env.pop('TOKEN_AUTH_CACHE_ALIAS', None)
+    env.update(environ)
+
+    return subprocess.run(
+        [sys.executable, '-c',
+         'from app import settings_prod; '
+         'print(eval(%r, vars(settings_prod)))' % expression],
+        cwd=settings.BASE_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+
+class ProdSettingsTests(SimpleTestCase):
+    """Test the checks of the production settings"""
+
+    def test_list_cache_off_by_default(self):
+        """Test the per process cache leaves the list cache off"""
+
+        process = load_prod_settings(LIST_TIMEOUT)
+
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertEqual(process.stdout.strip(), '0')
+
+    def test_list_cache_needs_shared_cache(self):
+        """Test the list cache on a per process cache fails to start"""
+
+        process = load_prod_settings(
+            LIST_TIMEOUT,
+            API_LIST_CACHE_TIMEOUT='300'
+        )
+
+        self.assertNotEqual(process.returncode, 0)
+        self.assertIn('ImproperlyConfigured', process.stderr)
+
+    def test_list_cache_on_shared_cache(self):
+        """Test the list cache is on with a shared cache"""
+
+        process = load_prod_settings(
+            LIST_TIMEOUT,
+            CACHE_BACKEND='django.core.cache.backends.db.DatabaseCache',
+        )
+
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertEqual(process.stdout.strip(), '300')
+
+    def test_token_cache_off_by_default(self):
+        """Test the token cache is off without a shared cache"""
+
+        process = load_prod_settings(TOKEN_TTL)
+
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertEqual(process.stdout.strip(), '0')
+
+    def test_token_cache_needs_shared_cache(self):
+        """Test the token cache without a shared cache fails to start"""
+
+        process = load_prod_settings(TOKEN_TTL, TOKEN_AUTH_CACHE_TTL='60')
+
+        self.assertNotEqual(process.returncode, 0)
+        self.assertIn('ImproperlyConfigured', process.stderr)
+
+    def test_token_cache_on_shared_cache(self):
+        """Test the token cache is on with a shared cache"""
+
+        process = load_prod_settings(
+            TOKEN_TTL,
+            CACHE_BACKEND='django.core.cache.backends.db.DatabaseCache',
+            TOKEN_AUTH_CACHE_ALIAS='default',
+        )
+
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertEqual(process.stdout.strip(), '60')
+
+    def test_renderers(self):
+        """Test production only drops the browsable API renderer"""
+
+        process = load_prod_settings(
+            "REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']"
+        )
+
+        self.assertEqual(process.returncode, 0, process.stderr)
+        renderers = settings.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']
+        self.assertEqual(process.stdout.strip(), repr([
+            renderer for renderer in renderers
+            if renderer != 'rest_framework.renderers.BrowsableAPIRenderer'
+        ]))
+        if msgpack is not None:
+            self.assertIn('core.renderers.MessagePackRenderer',
+                          process.stdout)
+        if cbor2 is not None:
+            self.assertIn('core.renderers.CBORRenderer', process.stdout)
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+def format_queries(queries):
+    """Return the captured queries as a numbered list of their SQL"""
+
+    return '\n'.join(
+        '%d. %s' % (number, query['sql'])
+        for number, query in enumerate(queries, start=1)
+    )
+
+
+class QueryBudgetMixin:
+    """TestCase mixin failing when code runs more queries than it should
+
+    The budgets of the endpoints are declared on the test class, by
+    method and url name, so a new N+1 fails the tests with the SQL that
+    ran.
+    """
+
+    # (method, url name) -> the most queries a request to it may run
+    query_budgets = {}
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        """Fail if the block runs more than budget queries"""
+
+        # records every query, even when DEBUG is turned off in the tests
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        if len(context) > budget:
+            self.fail('%d queries run, over the budget of %d:\n%s' % (
+                len(context),
+                budget,
+                format_queries(context.captured_queries)
+            ))
+
+    def request_within_budget(self, method, url_name, args=None,
+                              **kwargs):
+        """Send a request to the url name, failing over its budget"""
+
+        budget = self.query_budgets.get((method, url_name))
+        if budget is None:
+            self.fail('No query budget declared for %s %s' % (
+                method.upper(),
+                url_name
+            ))
+
+        url = reverse(url_name, args=args)
+        with self.assertMaxQueries(budget):
+            return getattr(self.client, method)(url, **kwargs)
+
+    def assertQueriesIndependent(self, func, grow, using=DEFAULT_DB_ALIAS):
+        """Fail if func runs another number of queries after grow()
+
+        grow adds rows, or items to a request. Meant for endpoints that
+        must not run a query per row, like a list doing one per recipe.
+        """
+
+        connection = connections[using]
+        with CaptureQueriesContext(connection) as before:
+            func()
+
+        grow()
+
+        with CaptureQueriesContext(connection) as after:
+            func()
+
+        if len(after) != len(before):
+            self.fail('%d queries became %d after growing:\n%s' % (
+                len(before),
+                len(after),
+                format_queries(after.captured_queries)
+            ))
@@ -0,0 +1,37 @@
+import ipaddress
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+from core.metrics import render_prometheus
+
+
+@require_GET
+def metrics(request):
+    """Serve the request and db connection totals to Prometheus"""
+
+    # the timings and traffic of every route are for the scraper only
+    if not settings.REQUEST_METRICS['ENABLED'] or \
+            not is_metrics_client(request):
+        raise Http404()
+
+    # the totals are per process, every worker is its own target
+    return HttpResponse(
+        render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def is_metrics_client(request):
+    """Return whether the client address may read the metrics"""
+
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.REQUEST_METRICS['ALLOWED_IPS']
+    )
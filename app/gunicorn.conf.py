@@ -0,0 +1,46 @@
+"""
+gunicorn settings for serving the app in production
+
+    gunicorn -c gunicorn.conf.py app.wsgi
+
+Every setting can be changed through the environment.
+"""
+
+import multiprocessing
+import os
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# the usual 2 workers per core plus one. Each worker handles one
+# request at a time per thread, with its own db connection per thread
+workers = int(os.environ.get(
+    'GUNICORN_WORKERS',
+    multiprocessing.cpu_count() * 2 + 1
+))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+# load the app once in the master, the workers are forked from it and
+# share the memory of the imported code
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# recycle the workers now and then so a leak can't grow forever,
+# the jitter keeps them from restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# e.g. - for stdout, off by default
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or None
+
+
+def pre_fork(server, worker):
+    """Make sure the workers don't inherit a db connection of the master"""
+
+    # nothing should connect while the app is preloaded, but a socket
+    # shared by several processes would get their queries mixed up
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,116 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+VERSION_KEY = 'api-list-version:%s'
+RESPONSE_KEY = 'api-list:%s:%s'
+
+
+def get_cache():
+    """Return the django cache holding the list responses"""
+
+    return caches[settings.API_LIST_CACHE['CACHE_ALIAS']]
+
+
+def get_list_version(user_id):
+    """Return the (version, last modified time) of the user's lists"""
+
+    version = get_cache().get(VERSION_KEY % user_id)
+    if version is None:
+        version = bump_list_version(user_id)
+
+    return version
+
+
+def bump_list_version(user_id):
+    """Invalidate every cached list of the user"""
+
+    cache = get_cache()
+    previous = cache.get(VERSION_KEY % user_id)
+
+    # Last-Modified only has a one second precision, make sure a write
+    # always moves it forward so If-Modified-Since can't go stale
+    last_modified = int(time.time())
+    if previous is not None:
+        last_modified = max(last_modified, previous[1] + 1)
+
+    version = (uuid.uuid4().hex, last_modified)
+    # the old responses are never looked up again, they simply expire
+    cache.set(VERSION_KEY % user_id, version, None)
+
+    return version
+
+
+class CachedListMixin:
+    """Cache the list responses of the user until they write anything"""
+
+    def list(self, request, *args, **kwargs):
+        """Return the list from the cache, or a 304 when it's unchanged"""
+
+        timeout = settings.API_LIST_CACHE['TIMEOUT']
+        if timeout <= 0:
+            return super().list(request, *args, **kwargs)
+
+        version, last_modified = get_list_version(request.user.pk)
+        # the full path holds the endpoint and the query string with
+        # the cursor, page size and filters
+        key = hashlib.md5(
+            (version + request.get_full_path()).encode()
+        ).hexdigest()
+        # weak, the same data can be rendered to different formats
+        etag = 'W/"%s"' % key
+
+        if self.is_not_modified(request, etag, last_modified):
+            # the serializer doesn't run at all
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache = get_cache()
+            data = cache.get(RESPONSE_KEY % (request.user.pk, key))
+            if data is None:
+                response = super().list(request, *args, **kwargs)
+                cache.set(
+                    RESPONSE_KEY % (request.user.pk, key),
+                    response.data,
+                    timeout
+                )
+            else:
+                response = Response(data)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # the client has to check back with us before using its copy,
+        # and shared caches must not hand it to another user. The same
+        # data is rendered to JSON, MessagePack or CBOR by Accept
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ('Authorization', 'Accept'))
+
+        return response
+
+    def is_not_modified(self, request, etag, last_modified):
+        """Return whether the client copy of the list is still current"""
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            # compare weakly, GZipMiddleware also marks etags as weak
+            tags = [
+                tag.replace('W/', '') for tag in parse_etags(if_none_match)
+            ]
+            return etag.replace('W/', '') in tags or '*' in tags
+
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE')
+        )
+
+        return (
+            if_modified_since is not None and
+            last_modified <= if_modified_since
+        )
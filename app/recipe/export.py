@@ -0,0 +1,54 @@
+from itertools import islice
+
+from core.renderers import dumps, msgpack_dumps
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to size items of the iterable"""
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_chunks(serializer, queryset, chunk_size):
+    """Yield the rendered rows of the queryset, a chunk at a time"""
+
+    # iterator() reads the rows through a server side cursor on
+    # postgres, so only one chunk of them is in memory at any time
+    rows = serializer.get_values(queryset).iterator(chunk_size=chunk_size)
+
+    for chunk in iter_chunks(rows, chunk_size):
+        serializer.add_related_ids(chunk)
+        yield [serializer.to_representation(row) for row in chunk]
+
+
+def stream_json(chunks):
+    """Yield the items of the chunks as the bytes of one JSON array"""
+
+    yield b'['
+    separator = b''
+    for chunk in chunks:
+        # one write per chunk rather than per item
+        yield separator + b','.join(dumps(item) for item in chunk)
+        separator = b','
+    yield b']'
+
+
+def stream_ndjson(chunks):
+    """Yield the items of the chunks as newline delimited JSON"""
+
+    for chunk in chunks:
+        yield b''.join(dumps(item) + b'\n' for item in chunk)
+
+
+def stream_msgpack(chunks):
+    """Yield the items of the chunks as a sequence of MessagePack maps"""
+
+    # the number of items isn't known up front, so there's no array
+    # header. msgpack.Unpacker reads the maps back one after the other
+    for chunk in chunks:
+        yield b''.join(msgpack_dumps(item) for item in chunk)
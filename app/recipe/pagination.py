@@ -0,0 +1,56 @@
+from django.conf import settings
+
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    """Keyset pagination with a client controlled page size"""
+
+    # ?page_size=50 lets the client pick a smaller or bigger page,
+    # up to the API_MAX_PAGE_SIZE cap from the settings
+    page_size_query_param = 'page_size'
+
+    # the sizes are read from the settings on every request rather
+    # than at import time, so they can be changed per environment
+    def get_page_size(self, request):
+        """Return the page size requested by the client, capped"""
+
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+
+        if requested <= 0:
+            return page_size
+
+        return min(requested, settings.API_MAX_PAGE_SIZE)
+
+
+class RecipeAttrPagination(BaseCursorPagination):
+    """Pagination for tags and ingredients"""
+
+    # the cursor position is taken from the first column, the id
+    # makes the ordering stable between tags sharing the same name
+    ordering = ('-name', 'id')
+
+
+class RecipePagination(BaseCursorPagination):
+    """Pagination for recipes, newest first"""
+
+    ordering = ('-id', )
+
+
+class RecipeSearchPagination(LimitOffsetPagination):
+    """Pagination for search results, which are sorted by rank"""
+
+    # a rank isn't unique or stored, so it can't be used as a cursor.
+    # Clients rarely go past the first few pages of a search anyway
+    def get_limit(self, request):
+        """Return the limit requested by the client, capped"""
+
+        self.default_limit = settings.REST_FRAMEWORK['PAGE_SIZE']
+        self.max_limit = settings.API_MAX_PAGE_SIZE
+
+        return super().get_limit(request)
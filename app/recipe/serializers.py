@@ -1,8 +1,285 @@
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models import prefetch_related_objects
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
 from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.relations import MANY_RELATION_KWARGS
+from core.bulk import bulk_create_with_ids, bulk_add_related
+from core.concurrency import run_concurrently
 from core.models import Tag, Ingredient, Recipe
 
 
-class TagSerializer(serializers.ModelSerializer):
+class BatchManyRelatedField(serializers.ManyRelatedField):
+    """Many related field that resolves all the submitted ids at once"""
+
+    default_error_messages = {
+        'does_not_exist': _(
+            'Invalid pk(s) {pk_values} - object(s) do not exist.'
+        ),
+    }
+
+    # set by BulkListSerializer to the objects of the ids sent in all
+    # the items of a list, so every item doesn't look its own ids up
+    preloaded = None
+
+    def to_internal_value(self, data):
+        """Return the objects for the list of ids, in the same order"""
+
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                self.child_relation.fail('incorrect_type', data_type='bool')
+            try:
+                pks.append(int(item))
+            except (TypeError, ValueError):
+                self.child_relation.fail(
+                    'incorrect_type',
+                    data_type=type(item).__name__
+                )
+
+        # drop repeated ids but keep the order they were sent in
+        pks = list(dict.fromkeys(pks))
+        if self.preloaded is not None:
+            found = self.preloaded
+        else:
+            # one "WHERE id IN (...)" query instead of one query per id
+            found = self.child_relation.get_queryset().in_bulk(pks)
+
+        missing = [pk for pk in pks if pk not in found]
+        if missing:
+            self.fail(
+                'does_not_exist',
+                pk_values=', '.join('"%s"' % pk for pk in missing)
+            )
+
+        # the objects are kept, so saving the relation doesn't fetch
+        # them again
+        return [found[pk] for pk in pks]
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field limited to the objects of the request user"""
+
+    def get_queryset(self):
+        """Return the objects owned by the authenticated user"""
+
+        queryset = super().get_queryset()
+
+        request = self.context.get('request')
+        if request is not None:
+            queryset = queryset.filter(user=request.user)
+
+        return queryset
+
+    # same as RelatedField.many_init, with our batched list field
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchManyRelatedField(**list_kwargs)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Serializer writing a list of objects with bulk queries"""
+
+    def to_internal_value(self, data):
+        """Validate the items, looking up their related ids together"""
+
+        if not isinstance(data, list) or \
+                (not self.allow_empty and not data):
+            # the errors of the base class
+            return super().to_internal_value(data)
+
+        fields = self.preload_related(data)
+        # a bulk update has the list of instances, in the order of the
+        # items (see BulkModelMixin.get_bulk_instances)
+        instances = self.instance if isinstance(self.instance, list) \
+            else [None] * len(data)
+
+        ret = []
+        errors = []
+        try:
+            for item, instance in zip(data, instances):
+                # the child validates every item against its own
+                # instance, like the detail route, and not the whole list
+                self.child.instance = instance
+                try:
+                    validated = self.child.run_validation(item)
+                except serializers.ValidationError as exc:
+                    errors.append(exc.detail)
+                else:
+                    ret.append(validated)
+                    errors.append({})
+        finally:
+            self.child.instance = self.instance
+            for field in fields:
+                field.preloaded = None
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return ret
+
+    def preload_related(self, data):
+        """Look up the ids of all the items, return the fields of them"""
+
+        fields = [
+            field for field in self.child.fields.values()
+            if isinstance(field, BatchManyRelatedField) and
+            not field.read_only
+        ]
+
+        for field in fields:
+            pks = set()
+            for item in data:
+                values = item.get(field.field_name) \
+                    if isinstance(item, dict) else None
+                if not isinstance(values, list):
+                    continue
+                for value in values:
+                    # the field rejects anything else, item by item
+                    if isinstance(value, int) and \
+                            not isinstance(value, bool):
+                        pks.add(value)
+                    elif isinstance(value, str) and value.isdigit():
+                        pks.add(int(value))
+            field.preloaded = field.child_relation.get_queryset().in_bulk(
+                list(pks)
+            )
+
+        return fields
+
+    def split_related(self, validated_data):
+        """Split the many to many values out of every validated item"""
+
+        model = self.child.Meta.model
+        names = [field.name for field in model._meta.many_to_many]
+
+        rows = []
+        related = {name: [] for name in names}
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            for name in names:
+                # None means the item didn't touch that relation
+                related[name].append(attrs.pop(name, None))
+            rows.append(attrs)
+
+        return rows, related
+
+    def create(self, validated_data):
+        """Insert all the items and their relations in bulk"""
+
+        model = self.child.Meta.model
+        rows, related = self.split_related(validated_data)
+
+        with transaction.atomic():
+            instances = bulk_create_with_ids(
+                model,
+                [model(**attrs) for attrs in rows],
+            )
+            for name, values in related.items():
+                bulk_add_related(instances, name, values)
+
+        # so rendering the response doesn't query the relations per item
+        prefetch_related_objects(instances, *related)
+
+        return instances
+
+    def update(self, instances, validated_data):
+        """Update the instances, paired with the items by position"""
+
+        rows, related = self.split_related(validated_data)
+
+        with transaction.atomic():
+            # there's no bulk update in this version of django,
+            # but it all runs in the one request and transaction
+            for instance, attrs in zip(instances, rows):
+                if not attrs:
+                    continue
+                for attr, value in attrs.items():
+                    setattr(instance, attr, value)
+                instance.save(update_fields=list(attrs))
+
+            for name, values in related.items():
+                bulk_add_related(instances, name, values, replace=True)
+
+        for instance in instances:
+            instance._prefetched_objects_cache = {}
+        prefetch_related_objects(instances, *related)
+
+        return instances
+
+
+class RecipeAttrListSerializer(BulkListSerializer):
+    """Bulk serializer for user owned recipe attributes"""
+
+    def to_internal_value(self, data):
+        """Optionally reject a name sent twice in the list"""
+
+        validated_data = super().to_internal_value(data)
+        if not settings.UNIQUE_RECIPE_ATTR_NAMES:
+            return validated_data
+
+        # the child only compares every name with the ones already saved
+        names = set()
+        errors = []
+        for attrs in validated_data:
+            name = attrs.get('name')
+            if name is not None and name in names:
+                errors.append({'name': [ErrorDetail(
+                    _('This name is already in the list.'),
+                    code='unique',
+                )]})
+            else:
+                errors.append({})
+            names.add(name)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return validated_data
+
+
+class RecipeAttrSerializer(serializers.ModelSerializer):
+    """Base serializer for user owned recipe attributes"""
+
+    def validate_name(self, value):
+        """Optionally reject a name the user already has"""
+
+        request = self.context.get('request')
+        if not settings.UNIQUE_RECIPE_ATTR_NAMES or request is None:
+            return value
+
+        # cheap lookup thanks to the (user, name) index
+        existing = self.Meta.model.objects.filter(
+            user=request.user,
+            name=value,
+        )
+        if isinstance(self.instance, self.Meta.model):
+            existing = existing.exclude(id=self.instance.id)
+
+        if existing.exists():
+            raise serializers.ValidationError(
+                _('You already have one with this name.'),
+                code='unique',
+            )
+
+        return value
+
+
+class TagSerializer(RecipeAttrSerializer):
     """Serializer for Tag objects"""
 
     # Meta class to know which model that we need,
@@ -13,11 +290,14 @@ class TagSerializer(serializers.ModelSerializer):
         fields = (
             'id',
             'name',
+            'recipe_count',
         )
-        read_only_fields = ('id', )
+        # the count is a column kept up to date by recipe.signals
+        read_only_fields = ('id', 'recipe_count')
+        list_serializer_class = RecipeAttrListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(RecipeAttrSerializer):
     """Serializer for Ingredient objects"""
 
     class Meta:
@@ -25,21 +305,47 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = (
             'id',
             'name',
+            'recipe_count',
         )
-        read_only_fields = ('id', )
+        # the count is a column kept up to date by recipe.signals
+        read_only_fields = ('id', 'recipe_count')
+        list_serializer_class = RecipeAttrListSerializer
+
 
+class SparseFieldsSerializer(serializers.ModelSerializer):
+    """Model serializer rendering only the fields the client asked for
 
-class RecipeSerializer(serializers.ModelSerializer):
+    The view puts the names in the 'sparse_fields' context key, None
+    (or no key) keeps every field.
+    """
+
+    def get_fields(self):
+        """Return the fields, without the ones the client left out"""
+
+        fields = super().get_fields()
+
+        names = self.context.get('sparse_fields')
+        if names is None:
+            return fields
+
+        return OrderedDict(
+            (name, field) for name, field in fields.items()
+            if name in names
+        )
+
+
+class RecipeSerializer(SparseFieldsSerializer):
     """Serializer for Recipe objects"""
 
     # list the ingredients and tags objects using its id only
-    # not the whole freakin fields.
-    ingredients = serializers.PrimaryKeyRelatedField(
+    # not the whole freakin fields. Only the user's own ingredients
+    # and tags can be picked, and all the ids are checked in one query
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,  # because its a many to many field
         queryset=Ingredient.objects.all(),  # this behaves like "select * from"
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all(),
     )
@@ -56,6 +362,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             "link",
         )
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
 
 
 class RecipeDetailSerializer(RecipeSerializer):
@@ -65,3 +372,202 @@ class RecipeDetailSerializer(RecipeSerializer):
     # needs to be read_only, otherwise it wont work
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+
+
+class ValuesListSerializer(serializers.ListSerializer):
+    """Read only list serializer for rows of queryset.values()"""
+
+    def to_representation(self, data):
+        """Return the rendered rows"""
+
+        rows = list(data)
+        self.child.add_related_ids(rows)
+
+        return [self.child.to_representation(row) for row in rows]
+
+
+class ValuesSerializer(serializers.BaseSerializer):
+    """Read only serializer rendering rows of queryset.values()
+
+    Renders exactly what Meta.serializer_class renders for the model
+    instances, without building the instances or running every field
+    of every row.
+    """
+
+    # the db already returns these the way the fields render them
+    passthrough_fields = (
+        serializers.IntegerField,
+        serializers.CharField,
+        serializers.BooleanField,
+    )
+
+    class Meta:
+        list_serializer_class = ValuesListSerializer
+
+    @cached_property
+    def columns(self):
+        """Return the (name, source, many, converter) of every field"""
+
+        model_serializer = self.Meta.serializer_class(context=self.context)
+
+        columns = []
+        for name, field in model_serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ManyRelatedField):
+                columns.append((name, field.source, True, None))
+            elif isinstance(field, self.passthrough_fields):
+                columns.append((name, field.source, False, None))
+            else:
+                # e.g. a DecimalField formatting the price as a string
+                columns.append(
+                    (name, field.source, False, field.to_representation)
+                )
+
+        return columns
+
+    @property
+    def related_sources(self):
+        """Return the sources of the many to many fields"""
+
+        return [
+            source for name, source, many, convert in self.columns if many
+        ]
+
+    def get_values(self, queryset):
+        """Return the queryset of the rows this serializer renders"""
+
+        pk = queryset.model._meta.pk.attname
+        sources = [
+            source for name, source, many, convert in self.columns
+            if not many
+        ]
+        if pk not in sources:
+            # needed to look the related ids up
+            sources.append(pk)
+
+        # the prefetches can't be attached to plain rows
+        queryset = queryset.prefetch_related(None).values(*sources)
+
+        # postgres aggregates the related ids of every row right in the
+        # list query, other dbs get them after the page was fetched
+        if connections[queryset.db].vendor == 'postgresql':
+            queryset = queryset.annotate(**{
+                self.related_key(source): self.related_ids(
+                    queryset.model,
+                    source
+                )
+                for source in self.related_sources
+            })
+
+        return queryset
+
+    def related_key(self, source):
+        """Return the row key holding the related ids of the field"""
+
+        # annotations can't share the name of a model field
+        return '%s_ids' % source
+
+    def related_ids(self, model, source):
+        """Subquery aggregating the related ids of the outer row"""
+
+        # imported here, they need psycopg2 which only postgres requires
+        from django.contrib.postgres.aggregates import ArrayAgg
+        from django.contrib.postgres.fields import ArrayField
+
+        field = model._meta.get_field(source)
+        through = field.remote_field.through
+        source_name = field.m2m_field_name()
+        target = through._meta.get_field(field.m2m_reverse_field_name())
+
+        # one small aggregate per relation rather than joining both
+        # relations into the list query, which would multiply the rows.
+        # DISTINCT makes postgres sort the ids, like the prefetch does
+        links = through.objects.filter(
+            **{source_name: models.OuterRef('pk')}
+        ).order_by().values(source_name).annotate(
+            ids=ArrayAgg(target.attname, distinct=True)
+        ).values('ids')
+
+        return models.Subquery(
+            links,
+            output_field=ArrayField(models.IntegerField())
+        )
+
+    def add_related_ids(self, rows):
+        """Fetch the related ids of the rows that weren't aggregated"""
+
+        if not rows:
+            return
+
+        # the relations are independent, their queries run concurrently
+        run_concurrently(*[
+            lambda source=source: self.add_field_related_ids(rows, source)
+            for source in self.related_sources
+            if self.related_key(source) not in rows[0]
+        ])
+
+    def add_field_related_ids(self, rows, source):
+        """Set the related ids of one many to many field on the rows"""
+
+        model = self.Meta.serializer_class.Meta.model
+        pk = model._meta.pk.attname
+
+        field = model._meta.get_field(source)
+        through = field.remote_field.through
+        source_field = through._meta.get_field(field.m2m_field_name())
+        target = through._meta.get_field(field.m2m_reverse_field_name())
+
+        # one query on the through table for the whole page
+        links = through.objects.filter(**{
+            '%s__in' % source_field.attname: [row[pk] for row in rows]
+        }).order_by(target.attname).values_list(
+            source_field.attname,
+            target.attname
+        )
+
+        related = defaultdict(list)
+        for row_id, related_id in links:
+            related[row_id].append(related_id)
+
+        key = self.related_key(source)
+        for row in rows:
+            row[key] = related[row[pk]]
+
+    def to_representation(self, row):
+        """Return the rendered row"""
+
+        ret = OrderedDict()
+        for name, source, many, convert in self.columns:
+            if many:
+                # no related objects comes back as NULL from postgres
+                ret[name] = row[self.related_key(source)] or []
+                continue
+
+            value = row[source]
+            if convert is not None and value is not None:
+                value = convert(value)
+            ret[name] = value
+
+        return ret
+
+
+class TagValuesSerializer(ValuesSerializer):
+    """Read only serializer for listing tags"""
+
+    class Meta(ValuesSerializer.Meta):
+        serializer_class = TagSerializer
+
+
+class IngredientValuesSerializer(ValuesSerializer):
+    """Read only serializer for listing ingredients"""
+
+    class Meta(ValuesSerializer.Meta):
+        serializer_class = IngredientSerializer
+
+
+class RecipeValuesSerializer(ValuesSerializer):
+    """Read only serializer for listing recipes"""
+
+    class Meta(ValuesSerializer.Meta):
+        serializer_class = RecipeSerializer
@@ -0,0 +1,214 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import \
+    m2m_changed, \
+    post_delete, \
+    post_save, \
+    pre_delete
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+from core.signals import bulk_changed
+
+from recipe.cache import bump_list_version
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def invalidate_owner_lists(sender, instance, **kwargs):
+    """Invalidate the cached lists of the owner of a changed object"""
+
+    bump_list_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_relation_lists(sender, instance, action, **kwargs):
+    """Invalidate the cached lists when recipe tags or ingredients change"""
+
+    # instance is the recipe, or the tag / ingredient for reverse changes.
+    # Both belong to the same user
+    if action.startswith('post_'):
+        bump_list_version(instance.user_id)
+
+
+@receiver(bulk_changed)
+def invalidate_bulk_lists(sender, user, **kwargs):
+    """Invalidate the cached lists after a bulk write"""
+
+    bump_list_version(user.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+def start_user_lists(sender, instance, created, **kwargs):
+    """Start new users on a fresh version
+
+    A new user can get the id of a deleted one, which must not see the
+    responses cached for the old user.
+    """
+
+    if created:
+        bump_list_version(instance.pk)
+
+
+# -------------------------------------------
+#           Full text search vectors
+# -------------------------------------------
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search(sender, instance, update_fields, **kwargs):
+    """Rebuild the search vector when the title may have changed"""
+
+    if update_fields is None or 'title' in update_fields:
+        Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_relation_search(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Rebuild the search vectors when recipe tags or ingredients change"""
+
+    if not reverse:
+        # instance is the recipe
+        if action.startswith('post_'):
+            Recipe.objects.filter(pk=instance.pk).update_search_vector()
+        return
+
+    # instance is the tag or ingredient, pk_set the recipes. Clearing
+    # doesn't say which recipes, so they're looked up beforehand
+    if action == 'pre_clear':
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        pk_set = instance.__dict__.pop('_search_recipe_ids', [])
+
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        Recipe.objects.filter(pk__in=pk_set).update_search_vector()
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_named_recipes(sender, instance, **kwargs):
+    """Note the recipes of a tag or ingredient before it's deleted"""
+
+    # the links are gone by the time post_delete is sent
+    instance._search_recipe_ids = list(
+        instance.recipe_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def update_named_recipes_search(sender, instance, **kwargs):
+    """Rebuild the search vectors of recipes using a renamed tag"""
+
+    if kwargs.get('created'):
+        return
+
+    recipe_ids = instance.__dict__.pop('_search_recipe_ids', None)
+    if recipe_ids is None:
+        recipe_ids = instance.recipe_set.values('pk')
+
+    Recipe.objects.filter(pk__in=recipe_ids).update_search_vector()
+
+
+@receiver(bulk_changed)
+def update_bulk_search(sender, instances, **kwargs):
+    """Rebuild the search vectors after a bulk write"""
+
+    pks = [instance.pk for instance in instances]
+
+    if sender is Recipe:
+        Recipe.objects.filter(pk__in=pks).update_search_vector()
+    elif sender in (Tag, Ingredient):
+        field_name = 'tags' if sender is Tag else 'ingredients'
+        Recipe.objects.linked_to(field_name, pks).update_search_vector()
+
+
+# -------------------------------------------
+#              Recipe counts
+# -------------------------------------------
+
+def add_recipe_count(queryset, amount):
+    """Add amount to the recipe count of the rows, in the db"""
+
+    # F() makes it a single "SET recipe_count = recipe_count + n",
+    # concurrent requests can't overwrite each other's counts
+    return queryset.update(recipe_count=F('recipe_count') + amount)
+
+
+@receiver(post_save, sender=Recipe)
+def count_user_recipe(sender, instance, created, **kwargs):
+    """Count a new recipe of the user"""
+
+    if created:
+        add_recipe_count(
+            get_user_model().objects.filter(pk=instance.user_id),
+            1
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_deleted_recipe(sender, instance, **kwargs):
+    """Uncount a deleted recipe from its user, tags and ingredients"""
+
+    # the links are deleted along with the recipe, without sending
+    # m2m_changed, so they're uncounted while they still exist
+    add_recipe_count(Tag.objects.filter(recipe=instance), -1)
+    add_recipe_count(Ingredient.objects.filter(recipe=instance), -1)
+    add_recipe_count(
+        get_user_model().objects.filter(pk=instance.user_id),
+        -1
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_related_recipes(sender, instance, action, reverse, model,
+                          pk_set, **kwargs):
+    """Count the recipes of tags and ingredients as they're linked"""
+
+    if not reverse:
+        # instance is the recipe, model the Tag or Ingredient. pk_set
+        # only holds the new links on add, but every id asked for on
+        # remove, so the removed ones are found through the links
+        if action == 'post_add':
+            add_recipe_count(model.objects.filter(pk__in=pk_set), 1)
+        elif action == 'pre_remove':
+            add_recipe_count(
+                model.objects.filter(pk__in=pk_set, recipe=instance),
+                -1
+            )
+        elif action == 'pre_clear':
+            add_recipe_count(model.objects.filter(recipe=instance), -1)
+        return
+
+    # instance is the tag or ingredient, pk_set the recipes
+    counted = type(instance).objects.filter(pk=instance.pk)
+    if action == 'post_add':
+        add_recipe_count(counted, len(pk_set))
+    elif action == 'pre_remove':
+        links = instance.recipe_set.filter(pk__in=pk_set)
+        add_recipe_count(counted, -links.count())
+    elif action == 'post_clear':
+        counted.update(recipe_count=0)
+
+
+@receiver(bulk_changed)
+def recount_bulk_recipes(sender, user, **kwargs):
+    """Recount the recipes of the user's objects after a bulk write"""
+
+    # the bulk writes don't say which links they replaced, recounting
+    # every object of the user is a single UPDATE per model
+    if sender is Recipe:
+        Tag.objects.filter(user=user).update_recipe_count()
+        Ingredient.objects.filter(user=user).update_recipe_count()
+        get_user_model().objects.filter(pk=user.pk).update_recipe_count()
@@ -0,0 +1,252 @@
+from unittest import skipUnless
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Tag, Ingredient, Recipe
+from core.tests.utils import QueryBudgetMixin
+
+
+TAGS_BULK_URL = reverse('recipe:tag-bulk')
+RECIPES_BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+
+    defaults = {
+        "title": "Sample recipe",
+        "time_minutes": 10,
+        "price": 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class BulkApiTests(QueryBudgetMixin, TestCase):
+    """Test the bulk create, update and delete endpoints"""
+
+    query_budgets = {
+        ('post', 'recipe:tag-bulk'): 4,
+    }
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_tags(self):
+        """Test creating a list of tags"""
+
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}]
+
+        res = self.request_within_budget(
+            'post',
+            'recipe:tag-bulk',
+            data=payload,
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [tag['name'] for tag in res.data],
+            ['Vegan', 'Dessert']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_recipes_with_relations(self):
+        """Test creating recipes linked to tags and ingredients"""
+
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        ingredient = Ingredient.objects.create(user=self.user, name="Tofu")
+        payload = [
+            {
+                'title': 'Fried tofu',
+                'time_minutes': 10,
+                'price': '3.00',
+                'tags': [tag.id],
+                'ingredients': [ingredient.id],
+            },
+            {
+                'title': 'Plain tofu',
+                'time_minutes': 1,
+                'price': '1.00',
+                'tags': [],
+                'ingredients': [ingredient.id],
+            },
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data[0]['tags'], [tag.id])
+        self.assertEqual(res.data[1]['ingredients'], [ingredient.id])
+
+        fried = Recipe.objects.get(user=self.user, title='Fried tofu')
+        self.assertEqual(list(fried.tags.all()), [tag])
+        self.assertEqual(list(fried.ingredients.all()), [ingredient])
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test that one invalid item fails the whole batch"""
+
+        payload = [{'name': 'Vegan'}, {'name': ''}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertFalse(Tag.objects.exists())
+
+    @override_settings(API_MAX_BULK_SIZE=1)
+    def test_bulk_size_capped(self):
+        """Test that too many items are rejected"""
+
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.exists())
+
+    @override_settings(UNIQUE_RECIPE_ATTR_NAMES=True)
+    def test_bulk_create_repeated_name(self):
+        """Test a name sent twice is rejected when names are unique"""
+
+        payload = [{'name': 'Vegan'}, {'name': 'Vegan'}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertEqual(res.data[1]['name'][0].code, 'unique')
+        self.assertFalse(Tag.objects.exists())
+
+    @override_settings(UNIQUE_RECIPE_ATTR_NAMES=True)
+    def test_bulk_update_tags_unique_names(self):
+        """Test every tag is checked against the names of the others"""
+
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        dessert = Tag.objects.create(user=self.user, name='Dessert')
+
+        # sending the name a tag already has isn't a duplicate
+        res = self.client.patch(TAGS_BULK_URL, [
+            {'id': vegan.id, 'name': 'Vegan'},
+            {'id': dessert.id, 'name': 'Sweet'},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.patch(TAGS_BULK_URL, [
+            {'id': vegan.id, 'name': 'Vegan'},
+            {'id': dessert.id, 'name': 'Vegan'},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        dessert.refresh_from_db()
+        self.assertEqual(dessert.name, 'Sweet')
+
+    def test_bulk_update_recipes(self):
+        """Test updating recipes and replacing their tags"""
+
+        old_tag = Tag.objects.create(user=self.user, name="Vegan")
+        new_tag = Tag.objects.create(user=self.user, name="Dessert")
+        recipe1 = sample_recipe(user=self.user)
+        recipe1.tags.add(old_tag)
+        recipe2 = sample_recipe(user=self.user)
+        payload = [
+            {'id': recipe1.id, 'tags': [new_tag.id]},
+            {'id': recipe2.id, 'title': 'Renamed'},
+        ]
+
+        res = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['tags'], [new_tag.id])
+        recipe2.refresh_from_db()
+        self.assertEqual(recipe2.title, 'Renamed')
+        self.assertEqual(list(recipe1.tags.all()), [new_tag])
+
+    def test_bulk_update_other_users_recipe(self):
+        """Test that recipes of other users can't be updated"""
+
+        user2 = get_user_model().objects.create_user(
+            email="user2@testuser.com",
+            password="testpassword"
+        )
+        recipe = sample_recipe(user=user2)
+        payload = [{'id': recipe.id, 'title': 'Stolen'}]
+
+        res = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[0])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Sample recipe')
+
+    def test_bulk_delete_recipes(self):
+        """Test deleting a list of recipes"""
+
+        recipe1 = sample_recipe(user=self.user)
+        recipe2 = sample_recipe(user=self.user)
+        kept = sample_recipe(user=self.user)
+
+        res = self.client.delete(
+            RECIPES_BULK_URL,
+            [recipe1.id, recipe2.id],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Recipe.objects.all()), [kept])
+
+    def test_bulk_delete_missing_id(self):
+        """Test that nothing is deleted when an id isn't found"""
+
+        recipe = sample_recipe(user=self.user)
+
+        res = self.client.delete(
+            RECIPES_BULK_URL,
+            [recipe.id, recipe.id + 100],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    # the other backends insert the objects one by one
+    @skipUnless(
+        connection.features.can_return_ids_from_bulk_insert,
+        'needs ids returned from bulk inserts'
+    )
+    def test_bulk_create_query_count_independent_of_items(self):
+        """Test that a bigger list of recipes doesn't run more queries"""
+
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        payload = []
+
+        def create():
+            res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        def add_items(count):
+            payload[:] = [{
+                'title': 'Recipe %d' % index,
+                'time_minutes': 10,
+                'price': '5.00',
+                'tags': [tag.id],
+                'ingredients': [],
+            } for index in range(count)]
+
+        add_items(1)
+        self.assertQueriesIndependent(create, lambda: add_items(10))
@@ -0,0 +1,138 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Tag, Recipe
+from recipe.serializers import RecipeSerializer
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def sample_recipe(user, title):
+    """Create and return a sample recipe"""
+
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=5.00
+    )
+
+
+class PublicRecipeExportApiTests(TestCase):
+    """Test the export without authentication"""
+
+    def test_login_required(self):
+        """Test that authentication is required"""
+
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+# a tiny chunk size, so the exports span several chunks
+@override_settings(API_EXPORT_CHUNK_SIZE=2)
+class PrivateRecipeExportApiTests(TestCase):
+    """Test exporting the recipes of the authenticated user"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.tag = Tag.objects.create(user=self.user, name="Vegan")
+        for index in range(5):
+            recipe = sample_recipe(self.user, "Recipe %d" % index)
+            if index % 2:
+                recipe.tags.add(self.tag)
+
+    def export(self, params=None):
+        """Return the streamed export response and its content"""
+
+        res = self.client.get(EXPORT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+
+        return res, b''.join(res.streaming_content)
+
+    def expected(self, recipes):
+        """Return the recipes as the list endpoint renders them"""
+
+        data = RecipeSerializer(recipes.order_by('-id'), many=True).data
+
+        return json.loads(json.dumps(data))
+
+    def test_export_json(self):
+        """Test exporting every recipe as one JSON array"""
+
+        res, content = self.export()
+
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(
+            json.loads(content.decode()),
+            self.expected(Recipe.objects.all())
+        )
+
+    def test_export_ndjson(self):
+        """Test exporting a recipe per line"""
+
+        res, content = self.export({'output': 'ndjson'})
+
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = content.decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            self.expected(Recipe.objects.all())
+        )
+
+    def test_export_filtered(self):
+        """Test that the export applies the list filters"""
+
+        res, content = self.export({'tags': self.tag.id})
+
+        self.assertEqual(
+            json.loads(content.decode()),
+            self.expected(Recipe.objects.filter(tags=self.tag))
+        )
+
+    def test_export_empty(self):
+        """Test exporting a user without recipes"""
+
+        user2 = get_user_model().objects.create_user(
+            email="user2@testuser.com",
+            password="testpassword"
+        )
+        self.client.force_authenticate(user2)
+
+        res, content = self.export()
+
+        self.assertEqual(json.loads(content.decode()), [])
+
+    def test_export_invalid_output(self):
+        """Test that an unknown output is rejected"""
+
+        res = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_sparse_fields(self):
+        """Test exporting only the fields asked for"""
+
+        res, content = self.export({'output': 'ndjson', 'fields': 'id,tags'})
+
+        items = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(items, [
+            {'id': recipe.id, 'tags': [self.tag.id] if index % 2 else []}
+            for index, recipe in reversed(list(enumerate(
+                Recipe.objects.order_by('id')
+            )))
+        ])
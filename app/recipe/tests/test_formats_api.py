@@ -0,0 +1,132 @@
+import gzip
+import json
+from io import BytesIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Recipe
+from core.renderers import cbor2, msgpack
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class RecipeFormatsApiTests(TestCase):
+    """Test the binary formats and the compression of the responses"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@testuser.com',
+            password='testpassword'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        for index in range(20):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title='Recipe number %d' % index,
+                time_minutes=10,
+                price=5.00,
+                link='https://example.com/recipes/%d' % index,
+            )
+            recipe.tags.add(tag)
+
+    def get_json(self, url):
+        """Return the data of the JSON response to the url"""
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return json.loads(res.content.decode())
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_list_msgpack(self):
+        """Test listing recipes as MessagePack"""
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertIn('Accept', [
+            header.strip() for header in res['Vary'].split(',')
+        ])
+        self.assertEqual(
+            msgpack.unpackb(res.content, raw=False),
+            self.get_json(RECIPES_URL)
+        )
+
+    @skipUnless(cbor2, 'cbor2 is not installed')
+    def test_list_cbor(self):
+        """Test listing tags as CBOR, picked with ?format="""
+
+        res = self.client.get(TAGS_URL, {'format': 'cbor'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/cbor')
+        self.assertEqual(cbor2.loads(res.content), self.get_json(TAGS_URL))
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_create_msgpack(self):
+        """Test creating a tag from a MessagePack body"""
+
+        res = self.client.post(
+            TAGS_URL,
+            msgpack.packb({'name': 'Dessert'}),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            msgpack.unpackb(res.content, raw=False)['name'],
+            'Dessert'
+        )
+        self.assertTrue(Tag.objects.filter(name='Dessert').exists())
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_export_msgpack(self):
+        """Test exporting the recipes as a sequence of MessagePack maps"""
+
+        res = self.client.get(EXPORT_URL, {'output': 'msgpack'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        items = list(msgpack.Unpacker(
+            BytesIO(b''.join(res.streaming_content)),
+            raw=False
+        ))
+        exported = self.client.get(EXPORT_URL)
+        self.assertEqual(items, json.loads(
+            b''.join(exported.streaming_content).decode()
+        ))
+
+    def test_list_gzip(self):
+        """Test the response is compressed for clients accepting gzip"""
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertEqual(
+            json.loads(gzip.decompress(res.content).decode()),
+            self.get_json(RECIPES_URL)
+        )
+
+    def test_list_uncompressed(self):
+        """Test the response isn't compressed without Accept-Encoding"""
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.has_header('Content-Encoding'))
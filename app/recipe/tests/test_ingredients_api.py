@@ -7,7 +7,8 @@ from rest_framework.test import APIClient
 # human readable status codes
 from rest_framework import status
 
-from core.models import Ingredient
+from core.models import Ingredient, Recipe
+from core.tests.utils import QueryBudgetMixin
 from recipe.serializers import IngredientSerializer
 
 
@@ -28,9 +29,15 @@ class PublicIngredientsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class AuthenticatedIngredientsApiTests(TestCase):
+class AuthenticatedIngredientsApiTests(QueryBudgetMixin, TestCase):
     """Test the priavte ingredients api can be retrieved by authorised user"""
 
+    query_budgets = {
+        ('get', 'recipe:ingredient-list'): 1,
+        # the insert, and the name check when names are unique
+        ('post', 'recipe:ingredient-list'): 2,
+    }
+
     def setUp(self):
         self.user = get_user_model().objects.create_user(
             email="test@testuser.com",
@@ -53,7 +60,7 @@ class AuthenticatedIngredientsApiTests(TestCase):
             name="Pepper"
         )
 
-        res = self.client.get(INGREDIENTS_URL)
+        res = self.request_within_budget('get', 'recipe:ingredient-list')
 
         # list all ingredients, sort by name in reverse order
         ingredients = Ingredient.objects.all().order_by('-name')
@@ -61,7 +68,7 @@ class AuthenticatedIngredientsApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         # making sure that what we retrieve is same as what we insert to db
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test that ingredients for the authenticated user are returned"""
@@ -84,8 +91,8 @@ class AuthenticatedIngredientsApiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
 
     def test_create_ingredients_success(self):
         """Test creating ingredients"""
@@ -93,7 +100,11 @@ class AuthenticatedIngredientsApiTests(TestCase):
         payload = {
             'name': 'Parsley'
         }
-        self.client.post(INGREDIENTS_URL, payload)
+        self.request_within_budget(
+            'post',
+            'recipe:ingredient-list',
+            data=payload
+        )
 
         exists = Ingredient.objects.filter(
             user=self.user,
@@ -110,3 +121,28 @@ class AuthenticatedIngredientsApiTests(TestCase):
         }
         res = self.client.post(INGREDIENTS_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_ingredients_assigned_to_recipes(self):
+        """Test filtering ingredients by those assigned to recipes"""
+
+        ingredient1 = Ingredient.objects.create(user=self.user, name="Apples")
+        ingredient2 = Ingredient.objects.create(user=self.user, name="Turkey")
+        for title in ("Coriander eggs on toast", "Porridge"):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=10,
+                price=5.00,
+                user=self.user
+            )
+            recipe.ingredients.add(ingredient1)
+
+        res = self.request_within_budget(
+            'get',
+            'recipe:ingredient-list',
+            data={'assigned_only': 1}
+        )
+
+        # assigned to two recipes, but only listed once
+        names = [item['name'] for item in res.data['results']]
+        self.assertEqual(names, [ingredient1.name])
+        self.assertNotIn(ingredient2.name, names)
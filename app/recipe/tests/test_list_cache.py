@@ -0,0 +1,154 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Tag, Recipe
+
+
+TAGS_URL = reverse('recipe:tag-list')
+TAGS_BULK_URL = reverse('recipe:tag-bulk')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+# off by default on the per process cache of the tests
+@override_settings(API_LIST_CACHE={
+    'TIMEOUT': 300, 'CACHE_ALIAS': 'default',
+})
+class ListCacheTests(TestCase):
+    """Test the per user cache of the list endpoints"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **headers):
+        """GET the url, returning the response and its query count"""
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url, **headers)
+
+        return res, len(context.captured_queries)
+
+    def test_list_served_from_cache(self):
+        """Test that a repeated list doesn't touch the db"""
+
+        Tag.objects.create(user=self.user, name="Vegan")
+        first, _ = self.get(TAGS_URL)
+
+        second, queries = self.get(TAGS_URL)
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.data, first.data)
+
+    def test_create_invalidates_list(self):
+        """Test that a new tag shows up in the next list"""
+
+        self.get(TAGS_URL)
+        self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        res, _ = self.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'][0]['name'], 'Vegan')
+
+    def test_bulk_create_invalidates_list(self):
+        """Test that tags created in bulk show up in the next list"""
+
+        self.get(TAGS_URL)
+        self.client.post(TAGS_BULK_URL, [{'name': 'Vegan'}], format='json')
+
+        res, _ = self.get(TAGS_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_tags_change_invalidates_recipe_list(self):
+        """Test that adding a tag to a recipe shows up in the next list"""
+
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Sample recipe",
+            time_minutes=10,
+            price=5.00
+        )
+        self.get(RECIPES_URL)
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe.tags.add(tag)
+
+        res, _ = self.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'], [tag.id])
+
+    def test_lists_cached_per_user(self):
+        """Test that users don't get each other's cached lists"""
+
+        self.get(TAGS_URL)
+        user2 = get_user_model().objects.create_user(
+            email="user2@testuser.com",
+            password="testpassword"
+        )
+        Tag.objects.create(user=user2, name="Vegan")
+        self.client.force_authenticate(user2)
+
+        res, _ = self.get(TAGS_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_etag_not_modified(self):
+        """Test that a matching If-None-Match gets a 304"""
+
+        res, _ = self.get(TAGS_URL)
+
+        res, queries = self.get(TAGS_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(queries, 0)
+
+    def test_etag_changes_after_write(self):
+        """Test that an old etag gets the new list"""
+
+        res, _ = self.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res, _ = self.get(TAGS_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since is compared to the last write"""
+
+        res, _ = self.get(TAGS_URL)
+        last_modified = res['Last-Modified']
+
+        res, _ = self.get(TAGS_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res, _ = self.get(TAGS_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(API_LIST_CACHE={
+        'TIMEOUT': 0, 'CACHE_ALIAS': 'default',
+    })
+    def test_cache_disabled(self):
+        """Test that a TIMEOUT of 0 always runs the list query"""
+
+        self.get(TAGS_URL)
+
+        res, queries = self.get(
+            TAGS_URL,
+            HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(queries, 0)
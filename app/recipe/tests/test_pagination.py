@@ -0,0 +1,132 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Tag, Recipe
+
+
+TAGS_URL = reverse('recipe:tag-list')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample_recipe(user, title="Sample recipe"):
+    """Create and return a sample recipe"""
+
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=5.00
+    )
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.RecipePagination',
+        'PAGE_SIZE': 2,
+    },
+    API_MAX_PAGE_SIZE=3,
+)
+class PaginationApiTests(TestCase):
+    """Test the cursor pagination of the list endpoints"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def collect_pages(self, url):
+        """Follow the next links and return every item in order"""
+
+        items = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+
+            items.extend(res.data['results'])
+            url = res.data['next']
+
+        return items
+
+    def test_default_page_size(self):
+        """Test that lists return PAGE_SIZE items and a next link"""
+
+        for name in ("Vegan", "Dessert", "Breakfast"):
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']],
+            ["Vegan", "Dessert"]
+        )
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_page_size_param_capped(self):
+        """Test that the page size asked by the client is capped"""
+
+        for index in range(5):
+            sample_recipe(user=self.user, title=str(index))
+
+        res = self.client.get(RECIPES_URL, {'page_size': 1})
+        self.assertEqual(len(res.data['results']), 1)
+
+        res = self.client.get(RECIPES_URL, {'page_size': 100})
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_pages_cover_tags_with_same_name(self):
+        """Test that following the cursors returns every tag once"""
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ("Vegan", "Lunch", "Lunch", "Lunch", "Dinner")
+        ]
+
+        items = self.collect_pages(TAGS_URL)
+
+        self.assertEqual(
+            [tag['id'] for tag in items],
+            [tag.id for tag in sorted(tags, key=lambda t: (t.name, -t.id),
+                                      reverse=True)]
+        )
+
+    def test_recipe_pages_newest_first(self):
+        """Test that recipes are paginated from the newest one"""
+
+        recipes = [sample_recipe(user=self.user) for _ in range(5)]
+
+        items = self.collect_pages(RECIPES_URL)
+
+        self.assertEqual(
+            [recipe['id'] for recipe in items],
+            [recipe.id for recipe in reversed(recipes)]
+        )
+
+    def test_next_page_filters_instead_of_offset(self):
+        """Test that a following page seeks on the id, not an OFFSET"""
+
+        for _ in range(5):
+            sample_recipe(user=self.user)
+
+        next_url = self.client.get(RECIPES_URL).data['next']
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(next_url)
+
+        recipe_sql = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "core_recipe"' in query['sql']
+        ][0]
+        self.assertIn('"core_recipe"."id" <', recipe_sql)
+        self.assertNotIn('OFFSET', recipe_sql)
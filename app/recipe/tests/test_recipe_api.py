@@ -8,6 +8,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 
 from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import QueryBudgetMixin
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 
@@ -52,6 +53,23 @@ def sample_recipe(user, **params):
     return Recipe.objects.create(user=user, **defaults)
 
 
+def sample_full_recipe(user, **params):
+    """Create and return a sample recipe with a tag and an ingredient"""
+
+    recipe = sample_recipe(user=user, **params)
+    recipe.tags.add(sample_tag(user=user))
+    recipe.ingredients.add(sample_ingredient(user=user))
+
+    return recipe
+
+
+def get_ok(client, url):
+    """GET the url, making sure it succeeded"""
+
+    res = client.get(url)
+    assert res.status_code == status.HTTP_200_OK, res.status_code
+
+
 class PublicRecipeApiTest(TestCase):
     """Test unauthenticated recipe API access"""
 
@@ -66,9 +84,25 @@ class PublicRecipeApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class AuthenticatedRecipeApiTest(TestCase):
+class AuthenticatedRecipeApiTest(QueryBudgetMixin, TestCase):
     """Test authenticated recipe API access"""
 
+    query_budgets = {
+        # one query on postgres, the other backends fetch the tag and
+        # ingredient ids of the page with a query each
+        ('get', 'recipe:recipe-list'): 3,
+        ('get', 'recipe:recipe-detail'): 3,
+        # the insert, the checks of the related ids, their links and
+        # the search vector update
+        ('post', 'recipe:recipe-list'): 14,
+        # the recipe, the update, the search vector and the relations
+        # rendered after it, nothing prefetched before
+        ('patch', 'recipe:recipe-detail'): 5,
+        # the recipe, then the links collected, uncounted and deleted
+        # with it
+        ('delete', 'recipe:recipe-detail'): 9,
+    }
+
     def setUp(self):
         self.client = APIClient()
 
@@ -85,13 +119,13 @@ class AuthenticatedRecipeApiTest(TestCase):
         sample_recipe(user=self.user)
         sample_recipe(user=self.user)
 
-        res = self.client.get(RECIPES_URL)
+        res = self.request_within_budget('get', 'recipe:recipe-list')
 
         recipes = Recipe.objects.all().order_by('-id')
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """Test that recipes for the authenticated user are returned"""
@@ -114,8 +148,8 @@ class AuthenticatedRecipeApiTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_view_recipe_detail(self):
         """Test viewing a recipe detail"""
@@ -126,14 +160,51 @@ class AuthenticatedRecipeApiTest(TestCase):
         # add ingredients to our recipe object
         recipe.ingredients.add(sample_ingredient(user=self.user))
 
-        # generate the URL
-        url = detail_url(recipe.id)
-        res = self.client.get(url)
+        res = self.request_within_budget(
+            'get',
+            'recipe:recipe-detail',
+            args=[recipe.id]
+        )
 
         serializer = RecipeDetailSerializer(recipe)
 
         self.assertEqual(res.data, serializer.data)
 
+    def test_update_recipe(self):
+        """Test updating a recipe doesn't prefetch what it renders again"""
+
+        recipe = sample_recipe(user=self.user)
+        tag = sample_tag(user=self.user)
+        recipe.tags.add(tag)
+        recipe.ingredients.add(sample_ingredient(user=self.user))
+
+        res = self.request_within_budget(
+            'patch',
+            'recipe:recipe-detail',
+            args=[recipe.id],
+            data={'title': 'Chicken tikka'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Chicken tikka')
+        self.assertEqual(res.data['tags'], [tag.id])
+
+    def test_delete_recipe(self):
+        """Test deleting a recipe doesn't load its relations first"""
+
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+        recipe.ingredients.add(sample_ingredient(user=self.user))
+
+        res = self.request_within_budget(
+            'delete',
+            'recipe:recipe-detail',
+            args=[recipe.id]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Recipe.objects.exists())
+
     def test_create_basic_recipe(self):
         """Test creating a basic recipe"""
 
@@ -143,7 +214,11 @@ class AuthenticatedRecipeApiTest(TestCase):
             'price': 3.00,
         }
 
-        res = self.client.post(RECIPES_URL, payload)
+        res = self.request_within_budget(
+            'post',
+            'recipe:recipe-list',
+            data=payload
+        )
 
         # standard HTTP statuscode on API when successfully
         # creating the request
@@ -173,7 +248,11 @@ class AuthenticatedRecipeApiTest(TestCase):
             'price': 20.00,
         }
 
-        res = self.client.post(RECIPES_URL, payload)
+        res = self.request_within_budget(
+            'post',
+            'recipe:recipe-list',
+            data=payload
+        )
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
@@ -199,7 +278,11 @@ class AuthenticatedRecipeApiTest(TestCase):
             'price': 5.00,
         }
 
-        res = self.client.post(RECIPES_URL, payload)
+        res = self.request_within_budget(
+            'post',
+            'recipe:recipe-list',
+            data=payload
+        )
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
@@ -210,3 +293,232 @@ class AuthenticatedRecipeApiTest(TestCase):
         self.assertEqual(ingredients.count(), 2)
         self.assertIn(ing1, ingredients)
         self.assertIn(ing2, ingredients)
+
+    def test_list_query_count_independent_of_recipes(self):
+        """Test that listing recipes doesn't run queries per recipe"""
+
+        sample_full_recipe(user=self.user)
+
+        self.assertQueriesIndependent(
+            lambda: get_ok(self.client, RECIPES_URL),
+            lambda: [sample_full_recipe(user=self.user) for _ in range(5)]
+        )
+
+    def test_detail_query_count_independent_of_relations(self):
+        """Test that a recipe detail doesn't run queries per tag"""
+
+        recipe = sample_full_recipe(user=self.user)
+
+        def add_relations():
+            for index in range(5):
+                recipe.tags.add(sample_tag(user=self.user, name=str(index)))
+                recipe.ingredients.add(
+                    sample_ingredient(user=self.user, name=str(index))
+                )
+
+        self.assertQueriesIndependent(
+            lambda: get_ok(self.client, detail_url(recipe.id)),
+            add_relations
+        )
+
+    def test_creating_recipe_with_other_users_tag(self):
+        """Test that tags of another user can't be added to a recipe"""
+
+        user2 = get_user_model().objects.create_user(
+            email="user2@testuser.com",
+            password="testpassword"
+        )
+        tag = sample_tag(user=user2)
+
+        payload = {
+            'title': "Deepfried bacon",
+            'tags': [tag.id],
+            'time_minutes': 60,
+            'price': 20.00,
+        }
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(tag.id), res.data['tags'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_creating_recipe_reports_missing_ids_together(self):
+        """Test that every unknown ingredient id is reported at once"""
+
+        ingredient = sample_ingredient(user=self.user)
+
+        payload = {
+            'title': "Stir fried mushrooms",
+            'ingredients': [ingredient.id, 1000, 1001],
+            'time_minutes': 15,
+            'price': 5.00,
+        }
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('"1000", "1001"', res.data['ingredients'][0])
+
+    def test_creating_recipe_query_count_independent_of_tags(self):
+        """Test that the submitted tags are validated in one query"""
+
+        tags = [sample_tag(user=self.user, name=str(i)) for i in range(5)]
+        payload = {
+            'title': "Deepfried bacon",
+            'tags': [tags[0].id],
+            'time_minutes': 60,
+            'price': 20.00,
+        }
+
+        def create():
+            res = self.client.post(RECIPES_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertQueriesIndependent(
+            create,
+            lambda: payload.update(tags=[tag.id for tag in tags])
+        )
+
+    def test_filter_recipes_by_tags(self):
+        """Test returning recipes with any of the given tags"""
+
+        recipe1 = sample_recipe(user=self.user, title="Thai curry")
+        recipe2 = sample_recipe(user=self.user, title="Tahini salad")
+        recipe3 = sample_recipe(user=self.user, title="Fish and chips")
+        tag1 = sample_tag(user=self.user, name="Vegan")
+        tag2 = sample_tag(user=self.user, name="Vegetarian")
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(
+            RECIPES_URL,
+            {'tags': '{},{}'.format(tag1.id, tag2.id)}
+        )
+
+        # recipe1 matches both tags but is only listed once
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe2.id, recipe1.id])
+        self.assertNotIn(recipe3.id, ids)
+
+    def test_filter_recipes_by_all_tags(self):
+        """Test returning recipes with all of the given tags"""
+
+        recipe1 = sample_recipe(user=self.user, title="Thai curry")
+        recipe2 = sample_recipe(user=self.user, title="Tahini salad")
+        tag1 = sample_tag(user=self.user, name="Vegan")
+        tag2 = sample_tag(user=self.user, name="Vegetarian")
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': '{},{}'.format(tag1.id, tag2.id),
+            'match': 'all',
+        })
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe1.id])
+
+    def test_filter_recipes_by_ingredients(self):
+        """Test returning recipes with the given ingredients"""
+
+        recipe1 = sample_recipe(user=self.user, title="Posh beans on toast")
+        recipe2 = sample_recipe(user=self.user, title="Chicken cacciatore")
+        ingredient1 = sample_ingredient(user=self.user, name="Feta cheese")
+        ingredient2 = sample_ingredient(user=self.user, name="Chicken")
+        recipe1.ingredients.add(ingredient1)
+        recipe2.ingredients.add(ingredient2)
+
+        res = self.client.get(RECIPES_URL, {'ingredients': ingredient1.id})
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe1.id])
+
+    def test_filter_recipes_invalid_ids(self):
+        """Test that non numeric ids are rejected"""
+
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_query_count_independent_of_recipes(self):
+        """Test that filtering runs the same queries for any result size"""
+
+        tag = sample_tag(user=self.user)
+        url = '{}?tags={}&match=all'.format(RECIPES_URL, tag.id)
+        sample_recipe(user=self.user).tags.add(tag)
+
+        def add_recipes():
+            for _ in range(5):
+                sample_full_recipe(user=self.user).tags.add(tag)
+
+        self.assertQueriesIndependent(
+            lambda: get_ok(self.client, url),
+            add_recipes
+        )
+
+    def test_list_sparse_fields(self):
+        """Test ?fields= lists only those fields, from one narrow query"""
+
+        sample_full_recipe(user=self.user, link='https://example.com')
+
+        with self.assertMaxQueries(1) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'title,id'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(res.data['results'][0]),
+            ['id', 'title']
+        )
+        # neither the other columns nor the relations are loaded
+        self.assertNotIn('"link"', queries.captured_queries[0]['sql'])
+        self.assertNotIn('tag', queries.captured_queries[0]['sql'])
+
+    def test_list_omit_fields(self):
+        """Test ?omit= lists every field but those"""
+
+        sample_full_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, {'omit': 'link,ingredients'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(res.data['results'][0]),
+            ['id', 'title', 'tags', 'time_minutes', 'price']
+        )
+
+    def test_detail_sparse_fields(self):
+        """Test ?fields= on the detail only prefetches the relations asked"""
+
+        recipe = sample_full_recipe(user=self.user)
+
+        with self.assertMaxQueries(2):
+            res = self.client.get(detail_url(recipe.id), {
+                'fields': 'id,tags',
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'id': recipe.id,
+            'tags': RecipeDetailSerializer(recipe).data['tags'],
+        })
+
+    def test_sparse_fields_unknown(self):
+        """Test that unknown field names are rejected"""
+
+        res = self.client.get(RECIPES_URL, {'fields': 'id,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_sparse_fields_ignored_on_create(self):
+        """Test that the writes render every field"""
+
+        res = self.client.post(RECIPES_URL + '?fields=id', {
+            'title': 'Cake',
+            'time_minutes': 30,
+            'price': '5.00',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn('title', res.data)
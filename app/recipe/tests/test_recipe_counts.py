@@ -0,0 +1,195 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from core.tests.utils import QueryBudgetMixin
+
+
+TAGS_URL = reverse('recipe:tag-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def sample_recipe(user, title='Sample recipe'):
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=5.00,
+    )
+
+
+class RecipeCountTests(QueryBudgetMixin, TestCase):
+    """Test the recipe counts kept on users, tags and ingredients"""
+
+    query_budgets = {
+        # the same single query as before the counts existed
+        ('get', 'recipe:tag-list'): 1,
+    }
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@londonappdev.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Salt'
+        )
+
+    def assertCounts(self, user, tag, ingredient):
+        """Check the recipe counts stored in the db"""
+
+        self.user.refresh_from_db()
+        self.tag.refresh_from_db()
+        self.ingredient.refresh_from_db()
+        self.assertEqual(
+            (self.user.recipe_count, self.tag.recipe_count,
+             self.ingredient.recipe_count),
+            (user, tag, ingredient)
+        )
+
+    def test_count_added_and_removed_links(self):
+        """Test linking and unlinking recipes updates the counts"""
+
+        recipe = sample_recipe(self.user)
+        other = sample_recipe(self.user, 'Other')
+        recipe.tags.add(self.tag)
+        other.tags.add(self.tag)
+        recipe.ingredients.add(self.ingredient)
+        # adding an existing link again doesn't count it twice
+        recipe.tags.add(self.tag)
+        self.assertCounts(2, 2, 1)
+
+        recipe.tags.remove(self.tag)
+        # removing a missing link doesn't uncount it
+        recipe.tags.remove(self.tag)
+        recipe.ingredients.clear()
+        self.assertCounts(2, 1, 0)
+
+    def test_count_reverse_links(self):
+        """Test linking recipes from the tag side updates the counts"""
+
+        recipes = [sample_recipe(self.user, str(i)) for i in range(3)]
+        self.tag.recipe_set.add(*recipes)
+        self.assertCounts(3, 3, 0)
+
+        self.tag.recipe_set.remove(recipes[0])
+        self.assertCounts(3, 2, 0)
+
+        self.tag.recipe_set.clear()
+        self.assertCounts(3, 0, 0)
+
+    def test_count_deleted_recipes(self):
+        """Test deleting recipes uncounts them everywhere"""
+
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.tag)
+        recipe.ingredients.add(self.ingredient)
+        sample_recipe(self.user, 'Other').tags.add(self.tag)
+
+        recipe.delete()
+
+        self.assertCounts(1, 1, 0)
+
+    def test_save_keeps_count(self):
+        """Test saving a loaded tag doesn't write back a stale count"""
+
+        stale = Tag.objects.get(pk=self.tag.pk)
+        sample_recipe(self.user).tags.add(self.tag)
+
+        stale.name = 'Vegetarian'
+        stale.save()
+
+        self.assertCounts(1, 1, 0)
+
+    def test_count_api_writes(self):
+        """Test the counts follow recipes created and deleted in bulk"""
+
+        res = self.client.post(BULK_URL, [
+            {
+                'title': 'Recipe %d' % i,
+                'time_minutes': 10,
+                'price': '5.00',
+                'tags': [self.tag.id],
+                'ingredients': [self.ingredient.id],
+            }
+            for i in range(3)
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertCounts(3, 3, 3)
+        ids = [item['id'] for item in res.data]
+
+        res = self.client.patch(BULK_URL, [
+            {'id': ids[0], 'tags': []},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCounts(3, 2, 3)
+
+        res = self.client.delete(BULK_URL, ids[1:], format='json')
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounts(1, 0, 1)
+
+    def test_list_includes_count(self):
+        """Test the tag list renders the counts at no extra query"""
+
+        sample_recipe(self.user).tags.add(self.tag)
+
+        res = self.request_within_budget('get', 'recipe:tag-list')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {'id': self.tag.id, 'name': 'Vegan', 'recipe_count': 1},
+        ])
+
+    def test_count_read_only(self):
+        """Test the counts can't be set through the API"""
+
+        res = self.client.post(TAGS_URL, {
+            'name': 'Dessert',
+            'recipe_count': 10,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['recipe_count'], 0)
+
+    def test_recount_recipes(self):
+        """Test the command fixes the counts that drifted"""
+
+        sample_recipe(self.user).tags.add(self.tag)
+        sample_recipe(self.user, 'Other')
+        Tag.objects.update(recipe_count=5)
+        get_user_model().objects.update(recipe_count=0)
+
+        out = StringIO()
+        call_command('recount_recipes', batch_size=1, stdout=out)
+
+        self.assertCounts(2, 1, 0)
+        self.assertIn('users: 1 wrong counts fixed', out.getvalue())
+        self.assertIn('tags: 1 wrong counts fixed', out.getvalue())
+        self.assertIn('ingredients: 0 wrong counts fixed', out.getvalue())
+
+    @override_settings(API_LIST_CACHE={
+        'TIMEOUT': 300, 'CACHE_ALIAS': 'default',
+    })
+    def test_recount_drops_cached_lists(self):
+        """Test the lists cached with a drifted count are refreshed"""
+
+        sample_recipe(self.user).tags.add(self.tag)
+        Tag.objects.update(recipe_count=5)
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.data['results'][0]['recipe_count'], 5)
+
+        call_command('recount_recipes', stdout=StringIO())
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.data['results'][0]['recipe_count'], 1)
@@ -0,0 +1,135 @@
+from unittest import skipUnless
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Tag, Ingredient, Recipe
+from core.tests.utils import QueryBudgetMixin
+
+
+SEARCH_URL = reverse('recipe:recipe-search')
+
+
+def sample_recipe(user, title):
+    """Create and return a sample recipe"""
+
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=5.00
+    )
+
+
+class RecipeSearchApiTests(QueryBudgetMixin, TestCase):
+    """Test searching recipes"""
+
+    query_budgets = {
+        # the count, the page, and its tags and ingredients
+        ('get', 'recipe:recipe-search'): 4,
+    }
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, text):
+        """Return the ids of the recipes found for the text"""
+
+        res = self.request_within_budget(
+            'get',
+            'recipe:recipe-search',
+            data={'q': text}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [recipe['id'] for recipe in res.data['results']]
+
+    def test_search_by_title(self):
+        """Test finding recipes by their title"""
+
+        curry = sample_recipe(user=self.user, title="Thai curry")
+        sample_recipe(user=self.user, title="Fish and chips")
+
+        self.assertEqual(self.search('curry'), [curry.id])
+
+    def test_search_by_tag_and_ingredient(self):
+        """Test finding recipes by their tag and ingredient names"""
+
+        curry = sample_recipe(user=self.user, title="Thai curry")
+        salad = sample_recipe(user=self.user, title="Greek salad")
+        curry.tags.add(Tag.objects.create(user=self.user, name="Spicy"))
+        salad.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="Feta")
+        )
+
+        self.assertEqual(self.search('spicy'), [curry.id])
+        self.assertEqual(self.search('feta'), [salad.id])
+
+    def test_search_follows_renamed_tag(self):
+        """Test that renaming a tag updates the search results"""
+
+        curry = sample_recipe(user=self.user, title="Thai curry")
+        tag = Tag.objects.create(user=self.user, name="Spicy")
+        curry.tags.add(tag)
+
+        tag.name = "Mild"
+        tag.save()
+
+        self.assertEqual(self.search('spicy'), [])
+        self.assertEqual(self.search('mild'), [curry.id])
+
+    def test_search_limited_to_user(self):
+        """Test that other users' recipes aren't found"""
+
+        user2 = get_user_model().objects.create_user(
+            email="user2@testuser.com",
+            password="testpassword"
+        )
+        sample_recipe(user=user2, title="Thai curry")
+
+        self.assertEqual(self.search('curry'), [])
+
+    def test_search_requires_text(self):
+        """Test that an empty search is rejected"""
+
+        res = self.client.get(SEARCH_URL, {'q': ' '})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'postgresql', 'ranking needs postgres')
+    def test_search_ranked(self):
+        """Test that title matches rank above ingredient matches"""
+
+        stew = sample_recipe(user=self.user, title="Beef stew")
+        soup = sample_recipe(user=self.user, title="Tomato soup")
+        stew.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="Tomato")
+        )
+
+        self.assertEqual(self.search('tomato'), [soup.id, stew.id])
+
+    def test_search_query_count_independent_of_results(self):
+        """Test that more matches don't run more queries"""
+
+        tag = Tag.objects.create(user=self.user, name="Spicy")
+        sample_recipe(user=self.user, title="Thai curry").tags.add(tag)
+
+        def add_recipes():
+            for index in range(5):
+                title = "Curry %d" % index
+                sample_recipe(user=self.user, title=title).tags.add(tag)
+
+        self.assertQueriesIndependent(
+            lambda: self.search('curry'),
+            add_recipes
+        )
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 # because we need user model for our test
 from django.contrib.auth import get_user_model
 from django.urls import reverse  # spits the url of a page given the view path
@@ -7,7 +7,8 @@ from rest_framework.test import APIClient
 # human readable status codes
 from rest_framework import status
 
-from core.models import Tag
+from core.models import Tag, Recipe
+from core.tests.utils import QueryBudgetMixin
 from recipe.serializers import TagSerializer
 
 
@@ -30,9 +31,15 @@ class PublicTagsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class AuthenticatedApiTests(TestCase):
+class AuthenticatedApiTests(QueryBudgetMixin, TestCase):
     """Test the authorised user tags API"""
 
+    query_budgets = {
+        ('get', 'recipe:tag-list'): 1,
+        # the insert, and the name check when names are unique
+        ('post', 'recipe:tag-list'): 2,
+    }
+
     def setUp(self):
         self.user = get_user_model().objects.create_user(
             email="test@testuser.com",
@@ -55,7 +62,7 @@ class AuthenticatedApiTests(TestCase):
             name="MainCourse"
         )
 
-        res = self.client.get(TAGS_URL)
+        res = self.request_within_budget('get', 'recipe:tag-list')
 
         # alphabetical reverse order, based on the name
         tags = Tag.objects.all().order_by('-name')
@@ -63,7 +70,7 @@ class AuthenticatedApiTests(TestCase):
         # so that we can compare it with the data from the response
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tag_limited_to_user(self):
         """Test that tags returned are for authenticated users only"""
@@ -88,10 +95,10 @@ class AuthenticatedApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         # make sure that it only returns 1 data
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
         # the response returned by the server is our tag f
         # rom the authenticated user
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_success(self):
         """Test creating a new tag"""
@@ -99,7 +106,7 @@ class AuthenticatedApiTests(TestCase):
         payload = {
             'name': 'Test Tag',
         }
-        self.client.post(TAGS_URL, payload)
+        self.request_within_budget('post', 'recipe:tag-list', data=payload)
 
         exists = Tag.objects.filter(
             user=self.user,
@@ -117,3 +124,76 @@ class AuthenticatedApiTests(TestCase):
 
         res = self.client.post(TAGS_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(UNIQUE_RECIPE_ATTR_NAMES=True)
+    def test_create_duplicate_tag_rejected(self):
+        """Test that a repeated name is rejected when names are unique"""
+
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    @override_settings(UNIQUE_RECIPE_ATTR_NAMES=True)
+    def test_create_tag_named_like_other_users_tag(self):
+        """Test that unique names are only checked for the same user"""
+
+        user_two = get_user_model().objects.create_user(
+            email="u2@testuser.com",
+            password="testpassword"
+        )
+        Tag.objects.create(user=user_two, name="Vegan")
+
+        res = self.request_within_budget(
+            'post',
+            'recipe:tag-list',
+            data={'name': 'Vegan'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_retrieve_tags_assigned_to_recipes(self):
+        """Test filtering tags by those assigned to recipes"""
+
+        tag1 = Tag.objects.create(user=self.user, name="Breakfast")
+        tag2 = Tag.objects.create(user=self.user, name="Lunch")
+        for title in ("Coriander eggs on toast", "Porridge"):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=10,
+                price=5.00,
+                user=self.user
+            )
+            recipe.tags.add(tag1)
+
+        res = self.request_within_budget(
+            'get',
+            'recipe:tag-list',
+            data={'assigned_only': 1}
+        )
+
+        # assigned to two recipes, but only listed once
+        names = [item['name'] for item in res.data['results']]
+        self.assertEqual(names, [tag1.name])
+        self.assertNotIn(tag2.name, names)
+
+    def test_assigned_tags_query_count_independent_of_recipes(self):
+        """Test that filtering assigned tags doesn't query per recipe"""
+
+        tag = Tag.objects.create(user=self.user, name="Breakfast")
+
+        def add_recipes():
+            for index in range(5):
+                Recipe.objects.create(
+                    title=str(index),
+                    time_minutes=10,
+                    price=5.00,
+                    user=self.user
+                ).tags.add(tag)
+
+        self.assertQueriesIndependent(
+            lambda: self.client.get(TAGS_URL, {'assigned_only': 1}),
+            add_recipes
+        )
@@ -0,0 +1,104 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from recipe import views
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+# the list cache would hand back the first response
+@override_settings(API_LIST_CACHE={'TIMEOUT': 0, 'CACHE_ALIAS': 'default'})
+class ValuesSerializerTests(TestCase):
+    """Test listing from values rows renders the same as the models"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        vegan = Tag.objects.create(user=self.user, name="Vegan")
+        dessert = Tag.objects.create(user=self.user, name="Dessert")
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Cheesecake",
+            time_minutes=45,
+            price=12.5,
+            link="https://example.com/cheesecake",
+        )
+        recipe.tags.add(vegan, dessert)
+        recipe.ingredients.add(salt)
+        Recipe.objects.create(
+            user=self.user,
+            title="Toast",
+            time_minutes=3,
+            price=0.99,
+        )
+
+    def assertSameAsModelSerializer(self, viewset, url):
+        """Assert the list renders the same bytes with either serializer"""
+
+        res = self.client.get(url)
+        with patch.object(viewset, 'values_serializer_class', None):
+            expected = self.client.get(url)
+
+        self.assertEqual(
+            JSONRenderer().render(res.data),
+            JSONRenderer().render(expected.data)
+        )
+
+    def test_recipes_same_as_model_serializer(self):
+        """Test the recipe list, with and without related objects"""
+
+        self.assertSameAsModelSerializer(views.RecipeViewset, RECIPES_URL)
+
+    def test_filtered_recipes_same_as_model_serializer(self):
+        """Test the recipe list with filters and a page size"""
+
+        tag = Tag.objects.get(name="Vegan")
+
+        self.assertSameAsModelSerializer(
+            views.RecipeViewset,
+            RECIPES_URL + '?tags=%s&page_size=1' % tag.id
+        )
+
+    def test_tags_same_as_model_serializer(self):
+        """Test the tag list"""
+
+        self.assertSameAsModelSerializer(views.TagViewSet, TAGS_URL)
+
+    def test_ingredients_same_as_model_serializer(self):
+        """Test the ingredient list"""
+
+        self.assertSameAsModelSerializer(
+            views.IngredientViewSet,
+            INGREDIENTS_URL + '?assigned_only=1'
+        )
+
+    def test_recipe_related_ids(self):
+        """Test the related ids are sorted and empty lists are kept"""
+
+        res = self.client.get(RECIPES_URL)
+
+        toast, cheesecake = res.data['results']
+        tag_ids = sorted(
+            Tag.objects.filter(user=self.user).values_list('id', flat=True)
+        )
+        self.assertEqual(cheesecake['tags'], tag_ids)
+        self.assertEqual(cheesecake['price'], '12.50')
+        self.assertEqual(toast['tags'], [])
+        self.assertEqual(toast['ingredients'], [])
@@ -1,19 +1,275 @@
-from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from core.models import Tag, Ingredient, Recipe
+from core.renderers import msgpack
+from core.signals import bulk_changed
+from user.authentication import CachedTokenAuthentication
 
 from recipe import serializers
+from recipe.cache import CachedListMixin
+from recipe.export import \
+    export_chunks, \
+    stream_json, \
+    stream_msgpack, \
+    stream_ndjson
+from recipe.pagination import \
+    RecipeAttrPagination, \
+    RecipePagination, \
+    RecipeSearchPagination
+
+
+def params_to_ints(request, name):
+    """Return the comma separated ids of a query param as ints"""
+
+    value = request.query_params.get(name)
+    if not value:
+        return []
+
+    try:
+        return [int(pk) for pk in value.split(',')]
+    except ValueError:
+        raise ValidationError(
+            {name: [_('Expected a comma separated list of ids.')]}
+        )
+
+
+def params_to_names(request, name):
+    """Return the comma separated names of a query param"""
+
+    value = request.query_params.get(name)
+    if not value:
+        return []
+
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class SparseFieldsMixin:
+    """Render only some of the fields, picked with ?fields= or ?omit=
+
+    ?fields=id,title renders only those fields and ?omit=link every
+    field but that one. The queryset only loads what's rendered, so a
+    client asking for a couple of columns gets a narrow query without
+    the prefetches of the relations it left out.
+    """
+
+    # the writes always render every field
+    sparse_fields_actions = ('list', 'retrieve', 'search', 'export')
+
+    def get_sparse_fields(self):
+        """Return the names of the fields to render, None for all"""
+
+        if self.action not in self.sparse_fields_actions:
+            return None
+
+        requested = params_to_names(self.request, 'fields')
+        omitted = params_to_names(self.request, 'omit')
+        if not requested and not omitted:
+            return None
+
+        available = self.serializer_class.Meta.fields
+        for param, names in (('fields', requested), ('omit', omitted)):
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise ValidationError({param: [
+                    _('Unknown fields: {unknown}. Expected some of: '
+                      '{available}.').format(
+                        unknown=', '.join(unknown),
+                        available=', '.join(available)
+                    )
+                ]})
+
+        # in the serializer order, whatever order they were asked in
+        return [
+            name for name in available
+            if (not requested or name in requested) and
+            name not in omitted
+        ]
+
+    def get_serializer_context(self):
+        """Pass the fields to render to the serializers"""
+
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+
+        return context
+
+
+class BulkModelMixin:
+    """Create, update or delete a list of objects in a single request"""
+
+    # POST a list of new objects, PATCH a list of objects with their id,
+    # or DELETE a list of ids. Errors are reported per item, in the
+    # same order as the request, and nothing is written if any fail.
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """Handle a bulk request"""
+
+        if not isinstance(request.data, list):
+            raise ValidationError(_('Expected a list of items.'))
+
+        if len(request.data) > settings.API_MAX_BULK_SIZE:
+            raise ValidationError(
+                _('Ensure there are no more than {max} items.').format(
+                    max=settings.API_MAX_BULK_SIZE
+                )
+            )
+
+        if request.method == 'POST':
+            return self.bulk_create(request)
+        if request.method == 'PATCH':
+            return self.bulk_update(request)
+
+        return self.bulk_destroy(request)
+
+    def bulk_create(self, request):
+        """Create every object in the list"""
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_bulk_create(serializer)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_bulk_create(self, serializer):
+        """Save the new objects for the authenticated user"""
+
+        instances = serializer.save(user=self.request.user)
+        self.send_bulk_changed(instances)
+
+    def bulk_update(self, request):
+        """Partially update every object in the list"""
+
+        ids = [
+            item.get('id') if isinstance(item, dict) else None
+            for item in request.data
+        ]
+        instances = self.get_bulk_instances(ids)
+
+        serializer = self.get_serializer(
+            instances,
+            data=request.data,
+            many=True,
+            partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_bulk_update(serializer)
+
+        return Response(serializer.data)
+
+    def perform_bulk_update(self, serializer):
+        """Save the updated objects"""
+
+        instances = serializer.save()
+        self.send_bulk_changed(instances)
+
+    def bulk_destroy(self, request):
+        """Delete every object in the list of ids"""
+
+        instances = self.get_bulk_instances(request.data)
+        self.perform_bulk_destroy(instances)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def perform_bulk_destroy(self, instances):
+        """Delete the objects with a single query"""
 
-class BaseRecipeAttr(viewsets.GenericViewSet,
+        self.get_queryset().filter(
+            id__in=[instance.id for instance in instances]
+        ).delete()
+
+    def send_bulk_changed(self, instances):
+        """Let the receivers know about objects saved in bulk"""
+
+        # bulk_create and the through table inserts don't send the
+        # post_save and m2m_changed signals
+        bulk_changed.send(
+            sender=self.queryset.model,
+            user=self.request.user,
+            instances=instances,
+        )
+
+    def get_bulk_instances(self, ids):
+        """Return the user's objects for the ids, in the same order"""
+
+        errors = []
+        for pk in ids:
+            if isinstance(pk, int) and not isinstance(pk, bool):
+                errors.append({})
+            else:
+                errors.append({'id': [_('A valid integer is required.')]})
+
+        if any(errors):
+            raise ValidationError(errors)
+
+        # in_bulk fetches all of them with one id__in query
+        found = self.get_queryset().in_bulk(ids)
+
+        errors = [
+            {} if pk in found else {'id': [_('Not found.')]}
+            for pk in ids
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+
+        return [found[pk] for pk in ids]
+
+
+class ValuesListMixin:
+    """Render the list action from plain rows instead of model instances"""
+
+    # a ValuesSerializer producing the same data as the serializer_class,
+    # or None to list with the model serializer
+    values_serializer_class = None
+
+    def use_values(self):
+        """Return whether this request is listed from values rows"""
+
+        return (
+            self.action == 'list' and
+            self.values_serializer_class is not None
+        )
+
+    def get_serializer_class(self):
+        """Return the values serializer when listing"""
+
+        if self.use_values():
+            return self.values_serializer_class
+
+        return super().get_serializer_class()
+
+    def filter_queryset(self, queryset):
+        """Turn the list queryset into the rows of the values serializer"""
+
+        queryset = super().filter_queryset(queryset)
+
+        if self.use_values():
+            serializer = self.values_serializer_class(
+                context=self.get_serializer_context()
+            )
+            queryset = serializer.get_values(queryset)
+
+        return queryset
+
+
+class BaseRecipeAttr(BulkModelMixin,
+                     CachedListMixin,
+                     ValuesListMixin,
+                     viewsets.GenericViewSet,
                      mixins.ListModelMixin,
                      mixins.CreateModelMixin):
     """Base Viewset for user owned recipte attributes"""
 
-    authentication_classes = (TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (IsAuthenticated, )
+    pagination_class = RecipeAttrPagination
 
     # queryset and serializer_class will be filled by each of the
     # classes, since they have different values.
@@ -29,6 +285,12 @@ class BaseRecipeAttr(viewsets.GenericViewSet,
             user=self.request.user
         )
 
+        # ?assigned_only=1 keeps the ones used by at least one recipe,
+        # from their maintained count rather than the through table
+        assigned_only = self.request.query_params.get('assigned_only')
+        if self.action == 'list' and assigned_only in ('1', 'true'):
+            filtered_queryset = filtered_queryset.filter(recipe_count__gt=0)
+
         return filtered_queryset.order_by('-name')
 
     # overrides the perform_create so that we can assign
@@ -47,6 +309,7 @@ class TagViewSet(BaseRecipeAttr):
     # as a query set
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    values_serializer_class = serializers.TagValuesSerializer
 
 
 class IngredientViewSet(BaseRecipeAttr):
@@ -54,16 +317,23 @@ class IngredientViewSet(BaseRecipeAttr):
 
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    values_serializer_class = serializers.IngredientValuesSerializer
 
 
-class RecipeViewset(viewsets.ModelViewSet):
+class RecipeViewset(BulkModelMixin,
+                    CachedListMixin,
+                    SparseFieldsMixin,
+                    ValuesListMixin,
+                    viewsets.ModelViewSet):
     """Manage Recipe in the db"""
 
     # the default action is list
     serializer_class = serializers.RecipeSerializer
+    values_serializer_class = serializers.RecipeValuesSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (IsAuthenticated, )
+    pagination_class = RecipePagination
 
     def get_queryset(self):
         """return objects for authenticated user only"""
@@ -72,7 +342,111 @@ class RecipeViewset(viewsets.ModelViewSet):
             user=self.request.user
         )
 
-        return filtered_queryset
+        # ?tags=1,2&ingredients=3 keeps the recipes with any of those
+        # tags and any of those ingredients, ?match=all with all of them
+        if self.action in ('list', 'search', 'export'):
+            match_all = self.request.query_params.get('match') == 'all'
+            for field_name in ('tags', 'ingredients'):
+                ids = params_to_ints(self.request, field_name)
+                if ids:
+                    filtered_queryset = filtered_queryset.linked_to(
+                        field_name,
+                        ids,
+                        match_all=match_all
+                    )
+
+        fields = self.get_sparse_fields()
+        relations = [
+            name for name in ('ingredients', 'tags')
+            if fields is None or name in fields
+        ]
+
+        # load the ingredients and tags of every recipe up front,
+        # otherwise the serializer runs two queries per recipe.
+        # The detail serializer renders the whole related objects,
+        # the search results only need their ids. The values rows of
+        # the list and export get the ids themselves, a delete doesn't
+        # render anything, and an update drops the prefetched objects
+        # before rendering, so those load nothing here.
+        # The two prefetch queries don't depend on each other, so they
+        # run at the same time. A relation left out by ?fields= or
+        # ?omit= isn't loaded at all
+        if relations and self.action == 'retrieve':
+            filtered_queryset = filtered_queryset.with_related_objects(
+                *relations
+            ).prefetch_concurrently()
+        elif relations and self.action in ('list', 'search') and \
+                not self.use_values():
+            filtered_queryset = filtered_queryset.with_related_ids(
+                *relations
+            ).prefetch_concurrently()
+
+        if fields is not None:
+            # the id is always loaded, the pagination sorts by it
+            filtered_queryset = filtered_queryset.only('id', *[
+                name for name in fields if name not in relations
+            ])
+        else:
+            # the search vector is only used inside the db
+            filtered_queryset = filtered_queryset.defer('search_vector')
+
+        return filtered_queryset.order_by('-id')
+
+    @action(detail=False, pagination_class=RecipeSearchPagination)
+    def search(self, request):
+        """Return the recipes matching ?q=, best matches first"""
+
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': [_('This field is required.')]})
+
+        # matches the title, ingredient and tag names
+        queryset = self.get_queryset().search(text)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+    # ?output= rather than ?format=, which picks a DRF renderer
+    export_outputs = {
+        'json': (stream_json, 'application/json'),
+        'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    }
+    if msgpack is not None:
+        export_outputs['msgpack'] = (stream_msgpack, 'application/msgpack')
+
+    @action(detail=False)
+    def export(self, request):
+        """Stream every recipe of the user, as JSON or NDJSON"""
+
+        output = request.query_params.get('output', 'json')
+        if output not in self.export_outputs:
+            raise ValidationError({'output': [
+                _('Expected one of: {outputs}.').format(
+                    outputs=', '.join(sorted(self.export_outputs))
+                )
+            ]})
+        stream, content_type = self.export_outputs[output]
+
+        # the rows are rendered while the response is being sent,
+        # so neither the recipes nor the JSON are ever all in memory
+        chunks = export_chunks(
+            serializers.RecipeValuesSerializer(
+                context=self.get_serializer_context()
+            ),
+            self.get_queryset(),
+            settings.API_EXPORT_CHUNK_SIZE
+        )
+
+        response = StreamingHttpResponse(
+            stream(chunks),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = \
+            'attachment; filename="recipes.%s"' % output
+
+        return response
 
     # change a serializer class for a particular request.
     # This is the function that we wanna use to handle
@@ -85,7 +459,7 @@ class RecipeViewset(viewsets.ModelViewSet):
         if self.action == 'retrieve':
             return serializers.RecipeDetailSerializer
 
-        return self.serializer_class
+        return super().get_serializer_class()
 
     def perform_create(self, serializer):
         """create and return a new object"""
@@ -0,0 +1,213 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.models import AuthToken
+
+
+class TokenCache:
+    """LRU cache of token key -> (user, token) entries with a TTL
+
+    Entries live in a dict local to the process, which only sees the
+    invalidations of its own writes. When the settings name a django
+    cache, entries live in that cache instead, shared by the processes
+    so every invalidation reaches all of them.
+    """
+
+    key_prefix = 'auth-token:'
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return settings.TOKEN_AUTH_CACHE['TTL']
+
+    @property
+    def shared(self):
+        alias = settings.TOKEN_AUTH_CACHE['CACHE_ALIAS']
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        """Return the cached (user, token) or None"""
+
+        if self.ttl <= 0:
+            return None
+
+        if self.shared is not None:
+            # no local copy, it would outlive an invalidation made by
+            # another process. The cache unpickles a new value each time
+            return self.shared.get(self.key_prefix + key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        # every request gets its own copy, so a view changing
+        # request.user can't leak into the cached user
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        """Cache the (user, token) of the key"""
+
+        if self.ttl <= 0:
+            return
+
+        if self.shared is not None:
+            self.shared.set(self.key_prefix + key, value, self.ttl)
+            return
+
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            # drop the least recently used entries over the limit
+            while len(self._entries) > settings.TOKEN_AUTH_CACHE['MAX_SIZE']:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        """Forget the entries of the keys"""
+
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+        if self.shared is not None:
+            self.shared.delete_many([self.key_prefix + key for key in keys])
+
+    def clear(self):
+        """Forget every entry of this process"""
+
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+# signed tokens are "<user id>:<password fingerprint>:<time>:<signature>"
+# and stored keys are hex, so a colon tells them apart
+SIGNED_TOKEN_SALT = 'user.authentication.signed-token'
+
+
+def password_fingerprint(user):
+    """Return a short digest of the token version of the user"""
+
+    # a new password changes it, which invalidates the signed tokens.
+    # Not the hash itself, a login rehashing the same password with a
+    # new hasher or cost would invalidate them too
+    return salted_hmac(
+        SIGNED_TOKEN_SALT,
+        str(user.token_version)
+    ).hexdigest()[:12]
+
+
+def sign_token(user):
+    """Return a signed token of the user, valid for the token TTL"""
+
+    return signing.TimestampSigner(salt=SIGNED_TOKEN_SALT).sign(
+        '%s:%s' % (user.pk, password_fingerprint(user))
+    )
+
+
+def signed_user_key(pk):
+    """Return the token cache key of the user of signed tokens"""
+
+    # all the signed tokens of a user share one cache entry, so the
+    # user signals can drop it without knowing the tokens
+    return 'signed-user:%s' % pk
+
+
+def issue_token(user):
+    """Return the token key and expiry date of a new login"""
+
+    if settings.AUTH_TOKEN['SIGNED']:
+        # nothing is written for a signed token
+        key = sign_token(user)
+        expires = timezone.now() + timedelta(
+            seconds=settings.AUTH_TOKEN['TTL']
+        )
+        return key, expires
+
+    token = AuthToken.objects.issue(user)
+    return token.key, token.expires
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token -> user lookup"""
+
+    model = AuthToken
+
+    # otherwise every authenticated request runs a token JOIN user query
+    def authenticate_credentials(self, key):
+        """Return the user and token of the key, from the cache if we can"""
+
+        if ':' in key:
+            return self.authenticate_signed(key)
+
+        cached = token_cache.get(key)
+        if cached is None:
+            # only valid tokens of active users get cached, anything
+            # else raises AuthenticationFailed here
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+
+        # an entry can outlive its token by up to the cache TTL
+        user, token = cached
+        if token.is_expired:
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+        return user, token
+
+    def authenticate_signed(self, key):
+        """Return the user of a signed token, and the token itself"""
+
+        try:
+            value = signing.TimestampSigner(salt=SIGNED_TOKEN_SALT).unsign(
+                key,
+                max_age=settings.AUTH_TOKEN['TTL']
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        pk, fingerprint = value.split(':', 1)
+        cached = token_cache.get(signed_user_key(pk))
+        if cached is None:
+            user = get_user_model().objects.filter(
+                pk=pk,
+                is_active=True
+            ).first()
+            if user is None:
+                raise exceptions.AuthenticationFailed(
+                    _('User inactive or deleted.')
+                )
+            cached = (user, None)
+            token_cache.set(signed_user_key(pk), cached)
+
+        user = cached[0]
+        if not constant_time_compare(fingerprint, password_fingerprint(user)):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        return user, key
@@ -14,8 +14,10 @@ class UserSerializer(serializers.ModelSerializer):
         fields = (
             'email',
             'password',
-            'name'
+            'name',
+            'recipe_count',
         )
+        read_only_fields = ('recipe_count', )
         extra_kwargs = {
             'password': {
                 'write_only': True,
@@ -38,17 +40,15 @@ class UserSerializer(serializers.ModelSerializer):
         # if the key of password does not exist within our validated data,
         # we provide a default value of None
         password = validated_data.pop('password', None)
-        # calling the default update function from the
-        # ModelSerializer superclass, and update that particular object
-        user = super().update(instance, validated_data)
 
         # if the user provided a password, we update it with
-        # that pssword
+        # that pssword. Set before the update, so the user is saved once
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
 
-        return user
+        # calling the default update function from the
+        # ModelSerializer superclass, and update that particular object
+        return super().update(instance, validated_data)
 
 
 class AuthTokenSerializer(serializers.Serializer):
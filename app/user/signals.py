@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import AuthToken
+from user.authentication import token_cache, signed_user_key
+
+
+@receiver(post_delete, sender=AuthToken)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a deleted token straight away"""
+
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_user_tokens(sender, instance, created, **kwargs):
+    """Drop the cached tokens of a user that changed
+
+    This covers deactivation, a new password, or any other field the
+    cached user object would otherwise serve stale.
+    """
+
+    if created:
+        return
+
+    keys = AuthToken.objects.filter(
+        user=instance
+    ).values_list('key', flat=True)
+    token_cache.delete(signed_user_key(instance.pk), *keys)
+
+
+@receiver(post_delete, sender=get_user_model())
+def forget_deleted_user(sender, instance, **kwargs):
+    """Stop authenticating the signed tokens of a deleted user"""
+
+    # the stored tokens are deleted with the user, sending their own
+    # post_delete
+    token_cache.delete(signed_user_key(instance.pk))
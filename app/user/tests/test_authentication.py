@@ -0,0 +1,274 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import AuthToken
+from user.authentication import TokenCache, signed_user_key, token_cache
+
+
+ME_URL = reverse('user:me')
+TOKEN_URL = reverse('user:token')
+ROTATE_URL = reverse('user:token-rotate')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating API requests with a cached token"""
+
+    def setUp(self):
+        token_cache.clear()
+
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword",
+            name="test user",
+        )
+        self.token = AuthToken.objects.issue(self.user)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def count_queries(self, expected_status=status.HTTP_200_OK):
+        """Return the number of queries authenticating a GET of me"""
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, expected_status)
+
+        # the view itself reloads the recipe count of the user
+        if res.status_code == status.HTTP_200_OK:
+            return len(context.captured_queries) - 1
+
+        return len(context.captured_queries)
+
+    def test_token_lookup_cached(self):
+        """Test that only the first request looks the token up"""
+
+        self.assertEqual(self.count_queries(), 1)
+        self.assertEqual(self.count_queries(), 0)
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'TTL': 0, 'MAX_SIZE': 10, 'CACHE_ALIAS': None,
+    })
+    def test_cache_disabled(self):
+        """Test that a TTL of 0 looks the token up every time"""
+
+        self.assertEqual(self.count_queries(), 1)
+        self.assertEqual(self.count_queries(), 1)
+
+    def test_deleted_token_rejected(self):
+        """Test that a deleted token stops working straight away"""
+
+        self.count_queries()
+        self.token.delete()
+
+        self.count_queries(status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test that a deactivated user can't use a cached token"""
+
+        self.count_queries()
+        self.user.is_active = False
+        self.user.save()
+
+        self.count_queries(status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_not_served_stale(self):
+        """Test that changes to the user aren't hidden by the cache"""
+
+        self.count_queries()
+        res = self.client.patch(ME_URL, {
+            'name': 'new name',
+            'password': 'newpassword',
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'new name')
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'TTL': 60, 'MAX_SIZE': 2, 'CACHE_ALIAS': None,
+    })
+    def test_least_recently_used_evicted(self):
+        """Test that the cache keeps at most MAX_SIZE entries"""
+
+        for key in ('a', 'b', 'c'):
+            token_cache.set(key, (key, key))
+
+        self.assertIsNone(token_cache.get('a'))
+        self.assertEqual(token_cache.get('c'), ('c', 'c'))
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'TTL': 60, 'MAX_SIZE': 10, 'CACHE_ALIAS': 'default',
+    })
+    def test_shared_entry_copied(self):
+        """Test that an entry from the shared cache isn't handed out"""
+
+        caches['default'].clear()
+        token_cache.set(self.token.key, (self.user, self.token))
+
+        user, token = token_cache.get(self.token.key)
+        user.name = 'changed by a view'
+
+        user, token = token_cache.get(self.token.key)
+        self.assertEqual(user.name, 'test user')
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'TTL': 60, 'MAX_SIZE': 10, 'CACHE_ALIAS': 'default',
+    })
+    def test_shared_invalidation(self):
+        """Test that a token deleted in a process is dropped in all"""
+
+        caches['default'].clear()
+        # the cache of another worker
+        other_cache = TokenCache()
+        key = self.token.key
+        self.count_queries()
+        self.assertIsNotNone(other_cache.get(key))
+
+        self.token.delete()
+
+        self.assertIsNone(other_cache.get(key))
+
+    def test_deleted_user_forgotten(self):
+        """Test that deleting a user drops its cached signed tokens"""
+
+        key = signed_user_key(self.user.pk)
+        token_cache.set(key, (self.user, None))
+
+        self.user.delete()
+
+        self.assertIsNone(token_cache.get(key))
+
+    def test_expired_token_rejected(self):
+        """Test that a token stops working once it expires, even cached"""
+
+        self.count_queries()
+        AuthToken.objects.filter(pk=self.token.pk).update(
+            expires=timezone.now() - timedelta(seconds=1)
+        )
+        token_cache.clear()
+
+        self.count_queries(status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_token_expires(self):
+        """Test that a cached entry doesn't outlive its token"""
+
+        self.count_queries()
+        user, token = token_cache.get(self.token.key)
+        token.expires = timezone.now()
+        token_cache.set(self.token.key, (user, token))
+
+        self.count_queries(status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotate_token(self):
+        """Test that rotating replaces the token of the request"""
+
+        res = self.client.post(ROTATE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], self.token.key)
+        self.count_queries(status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + res.data['token']
+        )
+        self.count_queries()
+
+
+@override_settings(AUTH_TOKEN={'TTL': 60, 'SIGNED': True})
+class SignedTokenAuthenticationTests(TestCase):
+    """Test authenticating API requests with a signed token"""
+
+    def setUp(self):
+        token_cache.clear()
+
+        self.user = get_user_model().objects.create_user(
+            email="test@testuser.com",
+            password="testpassword",
+        )
+        res = APIClient().post(TOKEN_URL, {
+            'email': 'test@testuser.com',
+            'password': 'testpassword',
+        })
+        self.key = res.data['token']
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.key)
+
+    def count_queries(self, expected_status=status.HTTP_200_OK):
+        """Return the number of queries authenticating a GET of me"""
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, expected_status)
+
+        # the view itself reloads the recipe count of the user
+        if res.status_code == status.HTTP_200_OK:
+            return len(context.captured_queries) - 1
+
+        return len(context.captured_queries)
+
+    def test_signed_token_not_stored(self):
+        """Test that a signed token is checked without the token table"""
+
+        self.assertFalse(AuthToken.objects.exists())
+        # the user is loaded once, then cached
+        self.assertEqual(self.count_queries(), 1)
+        self.assertEqual(self.count_queries(), 0)
+
+    def test_tampered_token_rejected(self):
+        """Test that a token with a changed user id is rejected"""
+
+        other = get_user_model().objects.create_user(
+            email="other@testuser.com",
+            password="testpassword",
+        )
+        key = '%s%s' % (other.pk, self.key[self.key.index(':'):])
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + key)
+
+        self.count_queries(status.HTTP_401_UNAUTHORIZED)
+
+    def test_new_password_rejects_token(self):
+        """Test that changing the password invalidates signed tokens"""
+
+        self.count_queries()
+        self.user.set_password('newpassword')
+        self.user.save()
+
+        self.count_queries(status.HTTP_401_UNAUTHORIZED)
+
+    def test_rehash_keeps_token(self):
+        """Test that a login rehashing the password keeps signed tokens"""
+
+        password = self.user.password
+        with self.settings(PASSWORD_HASHING=dict(
+            settings.PASSWORD_HASHING,
+            PBKDF2_ITERATIONS=1000
+        )):
+            res = APIClient().post(TOKEN_URL, {
+                'email': 'test@testuser.com',
+                'password': 'testpassword',
+            })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.user.password, password)
+
+        self.count_queries()
+
+    def test_expired_signed_token_rejected(self):
+        """Test that a signed token older than the TTL is rejected"""
+
+        with override_settings(AUTH_TOKEN={'TTL': -1, 'SIGNED': True}):
+            self.count_queries(status.HTTP_401_UNAUTHORIZED)
@@ -1,3 +1,5 @@
+from unittest import skipUnless
+
 from django.test import TestCase
 # because we need user model for our test
 from django.contrib.auth import get_user_model
@@ -8,6 +10,10 @@ from rest_framework.test import APIClient
 # human readable status codes
 from rest_framework import status
 
+from core.models import AuthToken
+from core.renderers import msgpack
+from core.tests.utils import QueryBudgetMixin
+
 
 # obtain the URL of user endpoints
 CREATE_USER_URL = reverse('user:create')
@@ -21,9 +27,14 @@ def create_user(**params):
 
 
 # seperate public user and logged in user test cases
-class PublicUserApiTests(TestCase):
+class PublicUserApiTests(QueryBudgetMixin, TestCase):
     """Test the user API (public)"""
 
+    query_budgets = {
+        # the user lookup, and the insert of the token
+        ('post', 'user:token'): 2,
+    }
+
     def setUp(self):
         self.client = APIClient()
 
@@ -95,9 +106,10 @@ class PublicUserApiTests(TestCase):
         }
 
         create_user(**payload)
-        res = self.client.post(TOKEN_URL, payload)
+        res = self.request_within_budget('post', 'user:token', data=payload)
 
         self.assertIn('token', res.data)
+        self.assertIn('expires', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
     def test_create_token_invalid_creds(self):
@@ -147,6 +159,29 @@ class PublicUserApiTests(TestCase):
         self.assertNotIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_create_token_msgpack(self):
+        """Test logging in with a MessagePack body and response"""
+
+        create_user(
+            email="test@testuser.com",
+            password="testpassword"
+        )
+
+        res = self.client.post(
+            TOKEN_URL,
+            msgpack.packb({
+                'email': "test@testuser.com",
+                'password': "testpassword",
+            }),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertIn('token', msgpack.unpackb(res.content, raw=False))
+
     # -------------------------------------------------------
     #           User Endpoint Management Unit tests
     # -------------------------------------------------------
@@ -159,9 +194,18 @@ class PublicUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateUserApiTests(TestCase):
+class PrivateUserApiTests(QueryBudgetMixin, TestCase):
     """Test API requests that require authentication"""
 
+    query_budgets = {
+        # the user comes from the authentication, only its recipe
+        # count is reloaded
+        ('get', 'user:me'): 1,
+        # the count, the update, and the lookup of the cached tokens
+        # to drop
+        ('patch', 'user:me'): 3,
+    }
+
     # -------------------------------------------------------
     #           User Endpoint Management Unit tests
     # -------------------------------------------------------
@@ -178,13 +222,35 @@ class PrivateUserApiTests(TestCase):
     def test_retrieve_profile_success(self):
         """Test retrieving profile for logged in user"""
 
-        res = self.client.get(ME_URL)
+        res = self.request_within_budget('get', 'user:me')
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, {
             'name': self.user.name,
             'email': self.user.email,
+            'recipe_count': 0,
         })
 
+    def test_retrieve_profile_current_count(self):
+        """Test the profile counts a recipe created after the login"""
+
+        # a real token, so the user comes from the token cache
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION='Token %s' % AuthToken.objects.issue(
+                self.user
+            ).key
+        )
+        self.assertEqual(client.get(ME_URL).data['recipe_count'], 0)
+
+        res = client.post(reverse('recipe:recipe-list'), {
+            'title': 'Cake',
+            'time_minutes': 30,
+            'price': '5.00',
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(client.get(ME_URL).data['recipe_count'], 1)
+
     def test_post_me_not_allowed(self):
         """Test that POST is not allowed on me endpoint"""
 
@@ -199,7 +265,7 @@ class PrivateUserApiTests(TestCase):
             'password': 'newpassword',
         }
 
-        res = self.client.patch(ME_URL, payload)
+        res = self.request_within_budget('patch', 'user:me', data=payload)
 
         # get the latest data of user from db after we update
         self.user.refresh_from_db()
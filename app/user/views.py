@@ -1,6 +1,10 @@
-from rest_framework import generics, authentication, permissions
-from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework import generics, permissions
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from core.models import AuthToken
+from user.authentication import CachedTokenAuthentication, issue_token
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -12,20 +16,57 @@ class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
 
 
-class CreateTokenView(ObtainAuthToken):
+def token_response(key, expires):
+    """Return the response handing a token to the client"""
+
+    return Response({'token': key, 'expires': expires})
+
+
+class CreateTokenView(APIView):
     """Create a new auth token for user"""
 
+    # logging in is open to anyone
+    throttle_classes = ()
+    permission_classes = ()
     serializer_class = AuthTokenSerializer
     # so that we can login from our browser, and see the token
     # otherwise we hv to make the HTTP post request using burp or something
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(
+            data=request.data,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        # every login gets a token of its own, which expires
+        return token_response(*issue_token(serializer.validated_data['user']))
+
+
+class RotateTokenView(APIView):
+    """Replace the token of the request with a new one"""
+
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        if isinstance(request.auth, AuthToken):
+            # the old token stops working straight away, the token cache
+            # is shared by the workers or off in production
+            token = request.auth.rotate()
+            return token_response(token.key, token.expires)
+
+        # a signed token can't be revoked, the client gets a new one
+        # and the old one keeps working until it expires
+        return token_response(*issue_token(request.user))
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """manage the authenticated user"""
 
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     # overriding the get_object function to return the particular
@@ -36,4 +77,8 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
         # user, because of the authentication_classes that
         # takes care of getting the authenticated user,
         # and assigning it to request
-        return self.request.user
+        user = self.request.user
+        # the authentication can serve the user from its cache, while
+        # the count is changed with F() updates that don't clear it
+        user.refresh_from_db(fields=['recipe_count'])
+        return user